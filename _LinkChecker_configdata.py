@@ -0,0 +1,22 @@
+# -*- coding: iso-8859-1 -*-
+# this file is automatically created by setup.py
+config_dir = '/root/package/config'
+install_data = '/root/package'
+install_scripts = '/root/package'
+name = u'LinkChecker'
+version = u'9.4'
+author = u'Bastian Kleineidam'
+author_email = u'bastian.kleineidam@web.de'
+maintainer = u'Bastian Kleineidam'
+maintainer_email = u'bastian.kleineidam@web.de'
+url = u'http://wummel.github.io/linkchecker/'
+license = u'GPL'
+description = u'check links in web documents or full websites'
+long_description = u'LinkChecker\n============\n\n|Build Status|_ |Latest Version|_ |License|_\n\n.. |Build Status| image:: https://travis-ci.org/wummel/linkchecker.png?branch=master\n.. _Build Status: https://travis-ci.org/wummel/linkchecker\n.. |Latest Version| image:: http://img.shields.io/pypi/v/LinkChecker.svg\n.. _Latest Version: https://pypi.python.org/pypi/LinkChecker\n.. |License| image:: http://img.shields.io/badge/license-GPL2-d49a6a.svg\n.. _License: http://opensource.org/licenses/GPL-2.0\n\nCheck for broken links in web sites.\n\nFeatures\n---------\n\n- recursive and multithreaded checking and site crawling\n- output in colored or normal text, HTML, SQL, CSV, XML or a sitemap graph in different formats\n- HTTP/1.1, HTTPS, FTP, mailto:, news:, nntp:, Telnet and local file links support\n- restrict link checking with regular expression filters for URLs\n- proxy support\n- username/password authorization for HTTP, FTP and Telnet\n- honors robots.txt exclusion protocol\n- Cookie support\n- HTML5 support\n- a command line, GUI and web interface\n- various check plugins available, eg. HTML syntax and antivirus checks.\n\nInstallation\n-------------\nSee doc/install.txt in the source code archive.\nPython 2.7.2 or later is needed.\n\nUsage\n------\nExecute ``linkchecker http://www.example.com``.\nFor other options see ``linkchecker --help``.\n'
+keywords = ['link', 'url', 'site', 'checking', 'crawling', 'verification', 'validation']
+platforms = ['UNKNOWN']
+fullname = u'LinkChecker-9.4'
+contact = u'Bastian Kleineidam'
+contact_email = u'bastian.kleineidam@web.de'
+release_date = "xx.xx.xxxx"
+portable = 0
@@ -2385,8 +2385,8 @@ static PyObject* parser_peek (parser_object* self, PyObject* args) {
     if (!buflen || self->userData->bufpos >= buflen) {
         return PyString_FromString("");
     }
-    if (self->userData->bufpos + len >= buflen) {
-        len = buflen - self->userData->bufpos - 1;
+    if (self->userData->bufpos + len > buflen) {
+        len = buflen - self->userData->bufpos;
     }
     return PyString_FromStringAndSize(self->userData->buf + self->userData->bufpos, len);
 }
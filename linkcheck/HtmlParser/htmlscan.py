@@ -0,0 +1,230 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+HTML tag scanner with the parser interface of htmlsax.
+
+The scanner searches HTML tags with regular expressions and only
+reports start and end tags, which is all that link finders need.
+Comments, declarations, processing instructions and the content of
+<script> and <style> elements are skipped; character data is not
+reported.
+"""
+import re
+from . import resolve_entities, set_encoding
+from ..containers import ListDict
+
+# markup not completed within this many bytes is treated as text
+MAX_MARKUP_SIZE = 0x10000
+# maximum number of cached tag names
+MAX_TAGS = 1000
+
+# markup at a "<" character: skipped markup without links (comments,
+# CDATA sections, declarations and processing instructions) or a start
+# or end tag where quoted attribute values may contain ">"
+_markup_re = re.compile(r"""<(?:(?P<skip>!--.*?--|!\[CDATA\[.*?\]\]|"""
+    r"""!(?!--|\[CDATA\[)[^>]*|\?[^>]*)|(?P<end>/)?"""
+    r"""(?P<name>[a-zA-Z][^\s/>]*)"""
+    r"""(?P<attrs>[^>=]*(?:=(?:\s*"[^"]*"|\s*'[^']*')?[^>=]*)*))>""",
+    re.DOTALL)
+# one tag attribute with optional value, a stray quote around
+# unquoted values is ignored
+_attr_re = re.compile(r"""([^\s"'>/=]+)(?:\s*(=)\s*(?:"([^"]*)"|'([^']*)'|"""
+    r"""["']?([^\s"'>]*)))?""")
+# end of elements whose content is not HTML
+_cdata_end_re = {
+    u"script": re.compile(r"(?i)</script\s*>"),
+    u"style": re.compile(r"(?i)</style\s*>"),
+}
+
+
+class parser (object):
+    """Scan HTML data fed in chunks and call the start_element,
+    start_end_element and end_element methods of the handler."""
+
+    def __init__ (self, handler=None):
+        """Initialize scanner state."""
+        self.handler = handler
+        self.encoding = "iso8859-1"
+        self.doctype = "HTML"
+        self.reset()
+
+    def reset (self):
+        """Throw away all buffered data."""
+        self.buf = ""
+        # buffer positions of the current tag start and end
+        self.tagstart = self.bufpos = 0
+        # line and column of the current tag start and end, calculated
+        # when they are needed
+        self.positions = None
+        # line and column of a buffer position before the current tag
+        self.pos = 0
+        self.pos_lineno = self.pos_column = 1
+        # name of the <script> or <style> element being skipped
+        self.cdata_tag = None
+        # mapping {tag name -> decoded lowercase tag name}
+        self.tagnames = {}
+
+    def feed (self, data):
+        """Scan all complete tags of the buffered data."""
+        self.buf += data
+        self._scan(False)
+
+    def flush (self):
+        """Scan the remaining data."""
+        self._scan(True)
+        return 0
+
+    def _scan (self, final):
+        """Scan buffered data. Incomplete markup at the end of the buffer
+        is kept for the next call unless final is True."""
+        buf = self.buf
+        buflen = len(buf)
+        pos = 0
+        while True:
+            if self.cdata_tag is not None:
+                mo = _cdata_end_re[self.cdata_tag].search(buf, pos)
+                if mo is None:
+                    if final:
+                        pos = buflen
+                    break
+                self.cdata_tag = None
+                pos = mo.end()
+                continue
+            start = buf.find("<", pos)
+            if start == -1:
+                pos = buflen
+                break
+            # looking for ">" first avoids slow regex backtracking
+            # on incomplete markup
+            if buf.find(">", start) == -1:
+                mo = None
+            else:
+                mo = _markup_re.match(buf, start)
+            if mo is None:
+                if not final and buflen - start < MAX_MARKUP_SIZE:
+                    # wait for the rest of the markup
+                    pos = start
+                    break
+                # not markup
+                pos = start + 1
+                continue
+            pos = mo.end()
+            if mo.group("name") is not None:
+                self.tagstart = start
+                self.bufpos = pos
+                self.positions = None
+                self._tag(mo)
+        # keep the current tag position valid until the next feed
+        self._get_positions()
+        self._move_position(pos)
+        self.buf = buf[pos:]
+        self.pos = self.tagstart = self.bufpos = 0
+
+    def _tag (self, mo):
+        """Report start or end tag."""
+        tag = self._get_tag(mo.group("name"))
+        if mo.group("end"):
+            func = getattr(self.handler, "end_element", None)
+            if func is not None:
+                func(tag)
+            return
+        attrs = ListDict()
+        attrdata = mo.group("attrs").rstrip()
+        # a trailing slash ends an empty element unless it is part of
+        # an unquoted attribute value
+        empty = attrdata.endswith("/") and \
+            (len(attrdata) == 1 or attrdata[-2] in " \t\r\n\"'")
+        if attrdata:
+            encoding = self.encoding
+            for name, equals, value1, value2, value3 in \
+                    _attr_re.findall(attrdata):
+                name = name.lower().decode("ascii", "ignore")
+                if equals:
+                    # at most one of the values is not empty
+                    value = (value1 + value2 + value3).decode(encoding,
+                        "ignore")
+                    if u"&" in value:
+                        value = resolve_entities(value)
+                    attrs[name] = value
+                else:
+                    attrs[name] = None
+            if tag == u"meta":
+                set_encoding(self, attrs)
+        if empty:
+            func = getattr(self.handler, "start_end_element", None)
+        else:
+            func = getattr(self.handler, "start_element", None)
+            if tag in _cdata_end_re:
+                self.cdata_tag = tag
+        if func is not None:
+            func(tag, attrs)
+
+    def _get_tag (self, name):
+        """Return decoded lowercase tag name."""
+        tag = self.tagnames.get(name)
+        if tag is None:
+            tag = name.lower().decode("ascii", "ignore")
+            if len(self.tagnames) < MAX_TAGS:
+                self.tagnames[name] = tag
+        return tag
+
+    def _move_position (self, pos):
+        """Calculate line and column of given buffer position, which
+        must not be before the last calculated position."""
+        buf = self.buf
+        num = buf.count("\n", self.pos, pos)
+        if num:
+            self.pos_lineno += num
+            self.pos_column = pos - buf.rfind("\n", self.pos, pos)
+        else:
+            self.pos_column += pos - self.pos
+        self.pos = pos
+        return self.pos_lineno, self.pos_column
+
+    def _get_positions (self):
+        """Return line and column of the current tag start and end."""
+        if self.positions is None:
+            self.positions = (self._move_position(self.tagstart) +
+                              self._move_position(self.bufpos))
+        return self.positions
+
+    def lineno (self):
+        """Return line number after the current tag."""
+        return self._get_positions()[2]
+
+    def column (self):
+        """Return column after the current tag."""
+        return self._get_positions()[3]
+
+    def last_lineno (self):
+        """Return line number of the current tag."""
+        return self._get_positions()[0]
+
+    def last_column (self):
+        """Return column of the current tag."""
+        return self._get_positions()[1]
+
+    def peek (self, length):
+        """Return up to length bytes of data following the current tag."""
+        if length < 0:
+            raise TypeError("peek length must not be negative")
+        buflen = len(self.buf)
+        if self.bufpos >= buflen:
+            return ""
+        if self.bufpos + length > buflen:
+            length = buflen - self.bufpos
+        return self.buf[self.bufpos:self.bufpos + length]
@@ -0,0 +1,69 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Cache the anchors of HTML pages so that links to other anchors of an
+already checked page can be checked without parsing the page again.
+"""
+from collections import namedtuple, OrderedDict
+from ..decorators import synchronized
+from ..lock import get_lock
+
+
+# lock object
+anchor_lock = get_lock("anchor_cache_lock")
+
+# anchors of one page
+# - names: sorted list of anchor names
+# - quoted: set of URL-quoted anchor names as found in URL fragments
+Anchors = namedtuple("Anchors", "names quoted")
+
+
+class AnchorCache (object):
+    """
+    Thread-safe bounded cache of page anchors. When the cache is full
+    the least recently used pages are removed.
+    format: {cache key (string) -> page anchors (Anchors)}
+    """
+
+    def __init__ (self, max_size=10000):
+        """Initialize empty cache.
+        @param max_size: maximum number of cached pages
+        @ptype max_size: int
+        """
+        self.cache = OrderedDict()
+        self.max_size = max_size
+
+    @synchronized(anchor_lock)
+    def get_anchors (self, key):
+        """Return cached anchors or None if not found."""
+        anchors = self.cache.pop(key, None)
+        if anchors is not None:
+            # mark as most recently used
+            self.cache[key] = anchors
+        return anchors
+
+    @synchronized(anchor_lock)
+    def add_anchors (self, key, anchors):
+        """Add anchors of the page with given key."""
+        self.cache.pop(key, None)
+        self.cache[key] = anchors
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+
+    def __len__ (self):
+        """Get number of cached pages."""
+        return len(self.cache)
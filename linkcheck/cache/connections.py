@@ -0,0 +1,153 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+HTTP connection pools shared by the request sessions of all checker
+threads, so that a kept-alive connection to a host is reused by any
+thread checking the next URL of that host.
+"""
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3 import connectionpool
+from ..decorators import synchronized
+from ..lock import get_lock
+
+
+# lock object
+connections_lock = get_lock("connections_lock")
+
+# minimum number of hosts with kept connections, the requests default
+MIN_HOST_POOLS = 10
+# maximum number of hosts with kept connections, limiting the number
+# of open sockets
+MAX_HOST_POOLS = 256
+
+
+def get_pool_sizes (threads, max_host_connections=0):
+    """Get the number of hosts with kept connections and the number of
+    kept connections per host for given number of checker threads.
+    The threads check at most one URL each, so there are no more
+    connections to one host than threads or the allowed number of
+    connections per host. Connections are kept for twice as many
+    hosts as there are threads, since the URL queue serves the hosts
+    in turn.
+    @param threads: number of checker threads, zero for no threads
+    @ptype threads: int
+    @param max_host_connections: allowed number of connections per
+       host, zero for no limit
+    @ptype max_host_connections: int
+    @return: number of host pools and connections per host
+    @rtype: tuple (int, int)
+    """
+    threads = max(1, threads)
+    maxsize = threads
+    if max_host_connections > 0:
+        maxsize = min(maxsize, max_host_connections)
+    num_pools = min(MAX_HOST_POOLS, max(MIN_HOST_POOLS, 2 * threads))
+    return num_pools, maxsize
+
+
+class ConnectionStats (object):
+    """Thread-safe counters of opened connections and sent requests."""
+
+    def __init__ (self):
+        """Initialize counters."""
+        self.opened = 0
+        self.requests = 0
+
+    @synchronized(connections_lock)
+    def add (self, opened=0, requests=0):
+        """Count opened connections and sent requests."""
+        self.opened += opened
+        self.requests += requests
+
+    def get_reused (self):
+        """Get number of requests sent over an already open connection.
+        @rtype: int
+        """
+        return max(0, self.requests - self.opened)
+
+
+def get_pool_classes (stats):
+    """Get connection pool classes counting opened connections and
+    sent requests in given stats.
+    @return: mapping {scheme -> connection pool class}
+    @rtype: dict
+    """
+    classes = {}
+    for scheme, pool_class in (("http", connectionpool.HTTPConnectionPool),
+                               ("https", connectionpool.HTTPSConnectionPool)):
+        conn_class = type(pool_class.ConnectionCls.__name__,
+            (CountingConnection, pool_class.ConnectionCls), {"stats": stats})
+        classes[scheme] = type(pool_class.__name__,
+            (CountingConnectionPool, pool_class),
+            {"stats": stats, "ConnectionCls": conn_class})
+    return classes
+
+
+class CountingConnection (object):
+    """Connection mixin counting the opened connections."""
+
+    stats = None
+
+    def connect (self):
+        """Open the connection."""
+        super(CountingConnection, self).connect()
+        self.stats.add(opened=1)
+
+
+class CountingConnectionPool (object):
+    """Connection pool mixin counting the sent requests."""
+
+    stats = None
+
+    def _make_request (self, *args, **kwargs):
+        """Send a request."""
+        self.stats.add(requests=1)
+        return super(CountingConnectionPool, self)._make_request(*args,
+            **kwargs)
+
+
+class SharedHTTPAdapter (HTTPAdapter):
+    """Transport adapter whose connection pools can be mounted in the
+    request sessions of several threads. The pools count the opened
+    connections and the sent requests.
+    """
+
+    def __init__ (self, num_pools, maxsize):
+        """Initialize pools for given number of hosts with given
+        number of kept connections per host. When all connections
+        to a host are in use, a new connection is opened instead of
+        waiting for a free one.
+        """
+        self.stats = ConnectionStats()
+        super(SharedHTTPAdapter, self).__init__(pool_connections=num_pools,
+            pool_maxsize=maxsize, pool_block=False)
+
+    def init_poolmanager (self, *args, **kwargs):
+        """Create counting pool manager."""
+        super(SharedHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = \
+            get_pool_classes(self.stats)
+
+    @synchronized(connections_lock)
+    def proxy_manager_for (self, proxy, **proxy_kwargs):
+        """Create counting pool manager for given proxy."""
+        new = proxy not in self.proxy_manager
+        manager = super(SharedHTTPAdapter, self).proxy_manager_for(proxy,
+            **proxy_kwargs)
+        if new:
+            manager.pool_classes_by_scheme = get_pool_classes(self.stats)
+        return manager
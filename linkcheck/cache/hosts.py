@@ -0,0 +1,80 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Schedule requests to hosts in a thread-safe manner.
+"""
+import random
+from time import time as _time
+from ..decorators import synchronized
+from ..lock import get_lock
+
+
+# lock object
+hosts_lock = get_lock("hosts_lock")
+
+
+def get_host_key (url_data):
+    """Return the key used to throttle requests for the given URL, or None
+    if requests for this URL are not throttled."""
+    if url_data.has_result or not url_data.urlparts or not url_data.is_http():
+        return None
+    return url_data.urlparts[1]
+
+
+class HostScheduler (object):
+    """
+    Thread-safe store of the time each host is ready for the next request.
+    Reserving a request slot never blocks; the caller decides whether
+    to wait for the slot or to look for other work.
+    format: {host (string) -> ready time (float)}
+    """
+
+    def __init__ (self, requests_per_second):
+        """Initialize wait times from the allowed number of requests
+        per second and host."""
+        # mapping {host -> time of next allowed request}
+        self.times = {}
+        self.wait_time_min = 1.0 / requests_per_second
+        self.wait_time_max = max(self.wait_time_min + 0.5, 0.5)
+
+    def is_due (self, host, now=None):
+        """Non-thread-safe function to check if a request to the host
+        would not have to wait."""
+        if now is None:
+            now = _time()
+        return self.times.get(host, 0) <= now
+
+    def get_due_time (self, host):
+        """Non-thread-safe function returning the time at which the host
+        is ready for the next request."""
+        return self.times.get(host, 0)
+
+    @synchronized(hosts_lock)
+    def reserve (self, host):
+        """Reserve the next request slot for the given host.
+        @return: number of seconds to wait until the slot begins
+        @rtype: float
+        """
+        now = _time()
+        slot = max(now, self.times.get(host, 0))
+        wait_time = random.uniform(self.wait_time_min, self.wait_time_max)
+        self.times[host] = slot + wait_time
+        return slot - now
+
+    def __len__ (self):
+        """Get number of known hosts. This is not thread-safe."""
+        return len(self.times)
@@ -0,0 +1,98 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Store check results of pages across program runs so that unchanged
+pages can be revalidated with conditional HTTP requests.
+"""
+import sqlite3
+import cPickle as pickle
+from collections import namedtuple
+from ..decorators import synchronized
+from ..lock import get_lock
+
+
+# lock object
+persistent_lock = get_lock("persistent_cache_lock")
+
+# stored data of one page
+# - etag, modified: the ETag and Last-Modified response headers or None
+# - content_hash: SHA-1 hex digest of the page content or None
+# - result: the UrlData.to_wire() result
+# - links: list of add_url() argument tuples (url, line, column, page,
+#   name, base) or None if the page content has not been parsed
+# - anchors: sorted list of anchor names of the page or None if the
+#   anchors have not been searched
+Page = namedtuple("Page", "etag modified content_hash result links anchors")
+
+# number of stored pages after which the changes are committed
+COMMIT_INTERVAL = 1000
+
+
+class PersistentCache (object):
+    """
+    Thread-safe store of check results and HTTP validators in a SQLite
+    database file.
+    format: {cache key (string) -> stored page (Page)}
+    """
+
+    def __init__ (self, filename):
+        """Open or create the database."""
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.text_factory = str
+        self.conn.execute("CREATE TABLE IF NOT EXISTS pages "
+            "(key TEXT PRIMARY KEY, etag TEXT, modified TEXT, "
+            "content_hash TEXT, result BLOB, links BLOB, anchors BLOB)")
+        self.num_changes = 0
+
+    @synchronized(persistent_lock)
+    def get_page (self, key):
+        """Return stored page or None if not found."""
+        if self.conn is None:
+            return None
+        row = self.conn.execute("SELECT etag, modified, content_hash, "
+            "result, links, anchors FROM pages WHERE key=?",
+            (key,)).fetchone()
+        if row is None:
+            return None
+        etag, modified, content_hash, result, links, anchors = row
+        return Page(etag, modified, content_hash, pickle.loads(str(result)),
+            pickle.loads(str(links)), pickle.loads(str(anchors)))
+
+    @synchronized(persistent_lock)
+    def add_page (self, key, page):
+        """Store page with given key."""
+        if self.conn is None:
+            return
+        result = pickle.dumps(page.result, pickle.HIGHEST_PROTOCOL)
+        links = pickle.dumps(page.links, pickle.HIGHEST_PROTOCOL)
+        anchors = pickle.dumps(page.anchors, pickle.HIGHEST_PROTOCOL)
+        self.conn.execute("INSERT OR REPLACE INTO pages VALUES "
+            "(?, ?, ?, ?, ?, ?, ?)", (key, page.etag, page.modified,
+            page.content_hash, sqlite3.Binary(result),
+            sqlite3.Binary(links), sqlite3.Binary(anchors)))
+        self.num_changes += 1
+        if self.num_changes >= COMMIT_INTERVAL:
+            self.conn.commit()
+            self.num_changes = 0
+
+    @synchronized(persistent_lock)
+    def close (self):
+        """Commit changes and close the database."""
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
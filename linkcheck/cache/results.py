@@ -17,6 +17,16 @@
 """
 Cache check results.
 """
+import os
+import sys
+import math
+import struct
+import shutil
+import sqlite3
+import tempfile
+import hashlib
+import cPickle as pickle
+from collections import OrderedDict
 from ..decorators import synchronized
 from ..lock import get_lock
 
@@ -25,41 +35,231 @@ from ..lock import get_lock
 cache_lock = get_lock("results_cache_lock")
 
 
+def get_key_digest (key):
+    """Get a compact digest of a cache key, used to remember keys
+    without keeping the key strings in memory.
+    @rtype: string
+    """
+    return hashlib.md5(key.encode("utf-8")).digest()
+
+
+def get_result_size (key, result):
+    """Estimate the number of bytes used by a cached result. Only the
+    result object, its attributes and the items of list attributes
+    are counted, which is good enough to bound the cache memory."""
+    size = sys.getsizeof(key) + sys.getsizeof(result)
+    for attr in getattr(result, "__slots__", ()):
+        value = getattr(result, attr, None)
+        size += sys.getsizeof(value)
+        if isinstance(value, (list, tuple)):
+            size += sum(sys.getsizeof(x) for x in value)
+    return size
+
+
+class BloomFilter (object):
+    """Set of key digests in a fixed amount of memory. Membership tests
+    have no false negatives, but a small rate of false positives that
+    grows when more than the given capacity of digests are added."""
+
+    def __init__ (self, capacity=1000000, error_rate=0.001):
+        """Allocate the bit array for the given number of digests and
+        false positive rate."""
+        num_bits = -capacity * math.log(error_rate) / (math.log(2) ** 2)
+        self.num_bits = max(8, int(num_bits))
+        num_hashes = self.num_bits * math.log(2) / capacity
+        self.num_hashes = max(1, int(round(num_hashes)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def get_positions (self, digest):
+        """Get the bit positions of a digest from get_key_digest()."""
+        h1, h2 = struct.unpack("<QQ", digest)
+        for i in xrange(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add (self, digest):
+        """Add a digest.
+        @return: True if the digest was not in the set before, with
+          the false positive rate of membership tests
+        @rtype: bool
+        """
+        added = False
+        for pos in self.get_positions(digest):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                added = True
+        return added
+
+    def __contains__ (self, digest):
+        """Check if the digest is possibly in the set."""
+        return all(self.bits[pos >> 3] & (1 << (pos & 7))
+                   for pos in self.get_positions(digest))
+
+
+class DiskStore (object):
+    """Store evicted results in a SQLite database inside a temporary
+    directory. The store is not thread-safe; the result cache serializes
+    all access except for containment checks, which only look at the
+    in-memory filter of stored keys."""
+
+    def __init__ (self):
+        """Create the database."""
+        self.tmpdir = tempfile.mkdtemp(prefix="linkchecker")
+        filename = os.path.join(self.tmpdir, "results.sqlite")
+        self.conn = sqlite3.connect(filename, check_same_thread=False,
+            isolation_level=None)
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("CREATE TABLE results "
+            "(key TEXT PRIMARY KEY, result BLOB)")
+        # digests of the keys of the stored results
+        self.digests = BloomFilter()
+
+    def get (self, key):
+        """Return stored result or None if not found."""
+        if key not in self:
+            return None
+        row = self.conn.execute("SELECT result FROM results WHERE key=?",
+            (key,)).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(str(row[0]))
+
+    def put (self, key, result):
+        """Store result with given key."""
+        data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        self.conn.execute("INSERT OR REPLACE INTO results "
+            "VALUES (?, ?)", (key, sqlite3.Binary(data)))
+        self.digests.add(get_key_digest(key))
+
+    def __contains__ (self, key):
+        """Check if a result for key is possibly stored. Rarely, True
+        is returned for a key that is not stored."""
+        return get_key_digest(key) in self.digests
+
+    def close (self):
+        """Close and remove the database."""
+        self.conn.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
 class ResultCache(object):
     """
     Thread-safe cache of UrlData.to_wire() results.
-    the cache is limited in size since we rather recheck the same URL
-    multiple times instead of running out of memory.
+    The cache is limited in the number of results and optionally in
+    the estimated memory size of the results. When a limit is reached
+    the least recently used results are evicted, either to the
+    optional disk store or discarded. Discarded URLs are rechecked
+    when they are found again.
     format: {cache key (string) -> result (UrlData.towire())}
     """
 
-    def __init__(self, max_size=100000):
-        """Initialize result cache."""
-        # mapping {URL -> cached result}
-        self.cache = {}
+    def __init__(self, max_size=100000, max_bytes=0, use_disk=False):
+        """Initialize result cache.
+        @param max_size: maximum number of results kept in memory
+        @ptype max_size: int
+        @param max_bytes: maximum estimated memory size of the results
+          kept in memory, zero means no limit
+        @ptype max_bytes: int
+        @param use_disk: evict results to a temporary disk store
+        @ptype use_disk: bool
+        """
+        # mapping {URL -> cached result} in least recently used order
+        self.cache = OrderedDict()
+        # mapping {URL -> estimated size of cached result}
+        self.sizes = {}
+        self.num_bytes = 0
         self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.disk = DiskStore() if use_disk else None
+        # number of added results
+        self.num_results = 0
+        # digests of the keys of all added results; a few new keys
+        # might be taken as added before and not be counted
+        self.checked = BloomFilter()
+        # functions called with the key of each added result
+        self.listeners = []
+
+    def add_listener(self, func):
+        """Call func(key) after a result has been added to the cache."""
+        self.listeners.append(func)
 
     @synchronized(cache_lock)
     def get_result(self, key):
         """Return cached result or None if not found."""
-        return self.cache.get(key)
+        if key in self.cache:
+            # mark as most recently used
+            result = self.cache.pop(key)
+            self.cache[key] = result
+            return result
+        if self.disk is not None:
+            result = self.disk.get(key)
+            if result is not None:
+                self._store(key, result)
+            return result
+        return None
 
-    @synchronized(cache_lock)
     def add_result(self, key, result):
+        """Add result object to cache with given key and notify the
+        listeners. The request is ignored when the key is None.
+        """
+        if self._add_result(key, result):
+            # listeners are called without holding the cache lock
+            for func in self.listeners:
+                func(key)
+
+    @synchronized(cache_lock)
+    def _add_result(self, key, result):
         """Add result object to cache with given key.
-        The request is ignored when the cache is already full or the key
-        is None.
+        @return: True if the result has been added, else False
         """
-        if len(self.cache) > self.max_size:
-            return
-        if key is not None:
-            self.cache[key] = result
+        if key is None:
+            return False
+        if self.checked.add(get_key_digest(key)):
+            self.num_results += 1
+        self._store(key, result)
+        return True
+
+    def _store (self, key, result):
+        """Store result as most recently used and evict the least
+        recently used results if the cache is full."""
+        if key in self.cache:
+            del self.cache[key]
+            self.num_bytes -= self.sizes.pop(key)
+        self.cache[key] = result
+        size = get_result_size(key, result)
+        self.sizes[key] = size
+        self.num_bytes += size
+        while len(self.cache) > 1 and (len(self.cache) > self.max_size or
+              (self.max_bytes and self.num_bytes > self.max_bytes)):
+            self._evict()
+
+    def _evict (self):
+        """Remove the least recently used result from memory."""
+        key, result = self.cache.popitem(last=False)
+        self.num_bytes -= self.sizes.pop(key)
+        if self.disk is not None:
+            self.disk.put(key, result)
 
     def has_result(self, key):
-        """Non-thread-safe function for fast containment checks."""
-        return key in self.cache
+        """Function for fast containment checks. Not thread-safe, but
+        it takes no lock and does not access the disk store database,
+        so it can be called while holding the URL queue lock."""
+        disk = self.disk
+        return key in self.cache or (disk is not None and key in disk)
+
+    @synchronized(cache_lock)
+    def close (self):
+        """Remove the disk store."""
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
 
     def __len__(self):
-        """Get number of cached elements. This is not thread-safe and is
-        likely to change before the returned value is used."""
-        return len(self.cache)
+        """Get number of cached elements, including results that have
+        been evicted from the cache. Results that have been discarded
+        and added again are counted once, and rarely a new result is
+        not counted.
+        This is not thread-safe and is likely to change before the
+        returned value is used."""
+        return self.num_results
@@ -0,0 +1,63 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Share equal strings of check results.
+
+Check results repeat many strings: all links of a page have the same
+parent URL, which is also the URL of the page result, and all URLs of
+a site share the domain. The builtin intern() does not support unicode
+strings, so results intern their strings in a string table.
+"""
+
+
+class StringTable (object):
+    """Bounded table of shared strings. When the table is full it
+    is emptied; strings shared before stay shared.
+    Thread-safe since the table is changed only with atomic dict
+    operations and replaced instead of cleared. Concurrent calls
+    can store a string twice, which only costs memory."""
+
+    def __init__ (self, max_size=0x40000):
+        """Initialize empty table."""
+        # mapping {(string type, string) -> shared string}; the type is
+        # part of the key since equal str and unicode strings are equal
+        # dictionary keys
+        self.strings = {}
+        self.max_size = max_size
+
+    def intern (self, s):
+        """Return the shared string equal to s and of the same type.
+        None is returned unchanged."""
+        if s is None:
+            return s
+        key = (type(s), s)
+        strings = self.strings
+        try:
+            return strings[key]
+        except KeyError:
+            pass
+        if len(strings) >= self.max_size:
+            strings = self.strings = {}
+        return strings.setdefault(key, s)
+
+    def __len__ (self):
+        """Return number of shared strings."""
+        return len(self.strings)
+
+
+# table shared by all check results
+result_strings = StringTable()
@@ -21,6 +21,8 @@ import threading
 import collections
 from time import time as _time
 from .. import log, LOG_CACHE
+from .hosts import get_host_key
+from .results import get_key_digest
 
 
 class Timeout(Exception):
@@ -32,17 +34,60 @@ class Empty(Exception):
     pass
 
 
-NUM_PUTS_CLEANUP = 10000
+def get_wait_key (url_data):
+    """Return the key of the cached result a queued URL waits for:
+    its cache key, or the seen key of a pending URL whose cache key
+    is not known yet. None if the URL cannot get a cached result."""
+    if url_data.cache_url is not None:
+        return url_data.cache_url
+    return getattr(url_data, "seen_key", None)
 
 class UrlQueue (object):
     """A queue supporting several consumer tasks. The task_done() idea is
-    from the Python 2.5 implementation of Queue.Queue()."""
+    from the Python 2.5 implementation of Queue.Queue().
 
-    def __init__ (self, max_allowed_urls=None):
-        """Initialize the queue state and task counters."""
+    The queue has two lanes. URLs with a cached result are served
+    first from the cached lane. URLs needing network access wait in
+    the network lane, which is partitioned in one FIFO sub-queue per
+    host. get() serves the hosts round-robin and skips hosts that are
+    not ready for the next request or that already have the maximum
+    number of URLs in progress.
+    When a result gets cached, move_cached() moves all URLs waiting
+    for that result to the cached lane."""
+
+    def __init__ (self, max_allowed_urls=None, host_scheduler=None,
+                  max_host_connections=0, journal=None, max_seen_urls=100000):
+        """Initialize the queue state and task counters.
+        If a host scheduler is given, URLs are partitioned by host and
+        get() prefers hosts that are ready for the next request.
+        If max_host_connections is positive, get() hands out no more
+        than the given number of URLs per host at the same time.
+        If a checkpoint journal is given, queued and finished URLs
+        are recorded in it.
+        At most max_seen_urls seen URLs are remembered; the oldest are
+        forgotten first."""
         # Note: don't put a maximum size on the queue since it would
         # lead to deadlocks when all worker threads called put().
-        self.queue = collections.deque()
+        # URLs with a cached result that need no network access
+        self.cached = collections.deque()
+        # mapping {host -> FIFO queue of [url_data] entries}; moved
+        # or removed entries are set to [None]
+        self.hosts = {}
+        # mapping {cache key or seen key -> list of entries in the host
+        # queues}, see get_wait_key()
+        self.waiting = {}
+        # round-robin order of hosts with queued URLs
+        self.host_order = collections.deque()
+        # mapping {host -> number of URLs in progress}
+        self.host_in_progress = {}
+        # mapping {id(url_data) -> host} of URLs in progress
+        self.in_progress_hosts = {}
+        # number of URLs in the host queues, not counting removed entries
+        self.num_queued = 0
+        # mapping {seen key digest -> cache key} of URLs already put
+        # in the queue, in insertion order
+        self.seen = collections.OrderedDict()
+        self.max_seen_urls = max_seen_urls
         # mutex must be held whenever the queue is mutating.  All methods
         # that acquire mutex must release it before returning.  mutex
         # is shared between the two conditions, so acquiring and
@@ -61,12 +106,18 @@ class UrlQueue (object):
         if max_allowed_urls is not None and max_allowed_urls <= 0:
             raise ValueError("Non-positive number of allowed URLs: %d" % max_allowed_urls)
         self.max_allowed_urls = max_allowed_urls
-        self.num_puts = 0
+        self.host_scheduler = host_scheduler
+        self.max_host_connections = max_host_connections
+        self.journal = journal
 
     def qsize (self):
         """Return the approximate size of the queue (not reliable!)."""
         with self.mutex:
-            return len(self.queue)
+            return self._qsize()
+
+    def _qsize (self):
+        """Return the size of the queue. Not thread-safe!"""
+        return len(self.cached) + self.num_queued
 
     def empty (self):
         """Return True if the queue is empty, False otherwise.
@@ -78,7 +129,7 @@ class UrlQueue (object):
     def _empty (self):
         """Return True if the queue is empty, False otherwise.
         Not thread-safe!"""
-        return not self.queue
+        return not (self.cached or self.num_queued)
 
     def get (self, timeout=None):
         """Get first not-in-progress url from the queue and
@@ -91,66 +142,191 @@ class UrlQueue (object):
         """Non thread-safe utility function of self.get() doing the real
         work."""
         if timeout is None:
-            while self._empty():
-                self.not_empty.wait()
+            endtime = None
         else:
             if timeout < 0:
                 raise ValueError("'timeout' must be a positive number")
             endtime = _time() + timeout
-            while self._empty():
+        while True:
+            if endtime is None:
+                remaining = None
+            else:
                 remaining = endtime - _time()
-                if remaining <= 0.0:
-                    raise Empty()
-                self.not_empty.wait(remaining)
+            if self.cached:
+                url_data = self.cached.popleft()
+                break
+            host, due_time = self._next_host()
+            if host is not False:
+                url_data = self._pop_host(host)
+                break
+            # no host is ready; wait for its time slot or a new URL
+            if due_time is None:
+                wait = remaining
+            else:
+                wait = due_time - _time()
+                if remaining is not None:
+                    wait = min(wait, remaining)
+            if remaining is not None and remaining <= 0.0:
+                raise Empty()
+            if wait is None or wait > 0:
+                self.not_empty.wait(wait)
         self.in_progress += 1
-        return self.queue.popleft()
+        return url_data
+
+    def _next_host (self):
+        """Search the queued hosts round-robin for one that may get its
+        next request. All hosts are inspected before waiting, so a ready
+        host is found however many hosts are busy.
+        @return: tuple (host, None) of a ready host, or (False, due time)
+          if no host is ready. The due time is None if no host will
+          get ready by waiting.
+        """
+        now = _time()
+        due_time = None
+        for dummy in range(len(self.host_order)):
+            host = self.host_order[0]
+            self.host_order.rotate(-1)
+            queue = self.hosts[host]
+            while queue[0][0] is None:
+                # skip entries moved to the cached lane
+                queue.popleft()
+                if not queue:
+                    break
+            if not queue:
+                del self.hosts[host]
+                self.host_order.pop()
+                continue
+            if host is None:
+                return host, None
+            if self.max_host_connections > 0 and \
+               self.host_in_progress.get(host, 0) >= self.max_host_connections:
+                continue
+            if self.host_scheduler.is_due(host, now):
+                return host, None
+            host_due_time = self.host_scheduler.get_due_time(host)
+            if due_time is None or host_due_time < due_time:
+                due_time = host_due_time
+        return False, due_time
+
+    def _pop_host (self, host):
+        """Remove and return the first URL of the given host queue and
+        count it as being in progress. When the last URL waiting for a
+        cache key is dequeued, the key is removed from the waiting URLs,
+        so keys of URLs that get no cached result are not kept."""
+        queue = self.hosts[host]
+        entry = queue.popleft()
+        url_data = entry[0]
+        entry[0] = None
+        self.num_queued -= 1
+        key = get_wait_key(url_data)
+        entries = self.waiting.get(key)
+        if entries is not None:
+            while entries and entries[-1][0] is None:
+                entries.pop()
+            if not entries:
+                del self.waiting[key]
+        if not queue:
+            del self.hosts[host]
+            self.host_order.remove(host)
+        if host is not None:
+            self.host_in_progress[host] = self.host_in_progress.get(host, 0) + 1
+            self.in_progress_hosts[id(url_data)] = host
+        return url_data
+
+    def get_seen (self, key):
+        """Return the cache key of an already seen URL, or None if the
+        URL has not been seen or has been forgotten. The result is not
+        reliable since other threads could add the URL before the result
+        is returned!"""
+        if key is None:
+            return None
+        return self.seen.get(get_key_digest(key))
+
+    def add_seen (self, key, cache_key):
+        """Remember an URL that has been seen, and forget the oldest
+        seen URL if too many are remembered. Queued pending URLs with
+        the given seen key get the cache key, so that they are moved
+        to the cached lane when the result is cached."""
+        if key is None:
+            return
+        digest = get_key_digest(key)
+        with self.mutex:
+            if digest not in self.seen:
+                self.seen[digest] = cache_key
+                if len(self.seen) > self.max_seen_urls:
+                    self.seen.popitem(last=False)
+            entries = self.waiting.pop(key, None)
+            if entries:
+                entries = [entry for entry in entries if entry[0] is not None]
+                for entry in entries:
+                    entry[0].cache_url = cache_key
+                if entries:
+                    self.waiting.setdefault(cache_key, []).extend(entries)
 
     def put (self, item):
         """Put an item into the queue.
         Block if necessary until a free slot is available.
+        The journal records the URL before it is queued, so that no
+        thread can finish the URL before it is recorded, and outside
+        of the queue lock, so that the other threads do not wait for
+        the journal.
         """
+        if self.journal is not None:
+            self.journal.add_url(item)
         with self.mutex:
-            self._put(item)
+            queued = self._put(item)
             self.not_empty.notify()
+        if not queued and self.journal is not None:
+            self.journal.url_done(item)
 
     def _put (self, url_data):
-        """Put URL in queue, increase number of unfished tasks."""
+        """Put URL in queue, increase number of unfished tasks.
+        @return: True if the URL was queued
+        @rtype: bool
+        """
         if self.shutdown or self.max_allowed_urls == 0:
-            return
+            return False
         log.debug(LOG_CACHE, "queueing %s", url_data.url)
         key = url_data.cache_url
         cache = url_data.aggregate.result_cache
-        if url_data.has_result or cache.has_result(key):
-            self.queue.appendleft(url_data)
+        if url_data.has_result or (key is not None and cache.has_result(key)):
+            self.cached.appendleft(url_data)
         else:
-            assert key is not None, "no result for None key: %s" % url_data
             if self.max_allowed_urls is not None:
                 self.max_allowed_urls -= 1
-            self.num_puts += 1
-            if self.num_puts >= NUM_PUTS_CLEANUP:
-                self.cleanup()
-            self.queue.append(url_data)
+            self._put_host(url_data)
         self.unfinished_tasks += 1
+        return True
+
+    def _put_host (self, url_data):
+        """Append URL to the network lane queue of its host."""
+        if self.host_scheduler is None:
+            host = None
+        else:
+            host = get_host_key(url_data)
+        if host not in self.hosts:
+            self.hosts[host] = collections.deque()
+            self.host_order.append(host)
+        entry = [url_data]
+        self.hosts[host].append(entry)
+        key = get_wait_key(url_data)
+        if key is not None:
+            self.waiting.setdefault(key, []).append(entry)
+        self.num_queued += 1
 
-    def cleanup(self):
-        """Move cached elements to top."""
-        self.num_puts = 0
-        cached = []
-        for i, url_data in enumerate(self.queue):
-            key = url_data.cache_url
-            cache = url_data.aggregate.result_cache
-            if cache.has_result(key):
-                cached.append(i)
-        for pos in cached:
-            self._move_to_top(pos)
-
-    def _move_to_top(self, pos):
-        """Move element at given position to top of queue."""
-        if pos > 0:
-            self.queue.rotate(-pos)
-            item = self.queue.popleft()
-            self.queue.rotate(pos)
-            self.queue.appendleft(item)
+    def move_cached (self, key):
+        """Move all URLs waiting for the result with given cache key
+        to the cached lane. The cost does not depend on the queue size."""
+        with self.mutex:
+            entries = self.waiting.pop(key, None)
+            if not entries:
+                return
+            for entry in entries:
+                if entry[0] is not None:
+                    self.cached.append(entry[0])
+                    entry[0] = None
+                    self.num_queued -= 1
+                    self.not_empty.notify()
 
     def task_done (self, url_data):
         """
@@ -167,11 +343,20 @@ class UrlQueue (object):
         Raises a ValueError if called more times than there were items
         placed in the queue.
         """
+        if self.journal is not None:
+            self.journal.url_done(url_data)
         with self.all_tasks_done:
             log.debug(LOG_CACHE, "task_done %s", url_data.url)
             self.finished_tasks += 1
             self.unfinished_tasks -= 1
             self.in_progress -= 1
+            host = self.in_progress_hosts.pop(id(url_data), None)
+            if host is not None:
+                self.host_in_progress[host] -= 1
+                if not self.host_in_progress[host]:
+                    del self.host_in_progress[host]
+                # the host may accept another URL now
+                self.not_empty.notify()
             if self.unfinished_tasks <= 0:
                 if self.unfinished_tasks < 0:
                     raise ValueError('task_done() called too many times')
@@ -203,8 +388,12 @@ class UrlQueue (object):
     def do_shutdown (self):
         """Shutdown the queue by not accepting any more URLs."""
         with self.mutex:
-            unfinished = self.unfinished_tasks - len(self.queue)
-            self.queue.clear()
+            unfinished = self.unfinished_tasks - self._qsize()
+            self.cached.clear()
+            self.hosts.clear()
+            self.waiting.clear()
+            self.host_order.clear()
+            self.num_queued = 0
             if unfinished <= 0:
                 if unfinished < 0:
                     raise ValueError('shutdown is in error')
@@ -215,4 +404,4 @@ class UrlQueue (object):
     def status (self):
         """Get tuple (finished tasks, in progress, queue size)."""
         # no need to acquire self.mutex since the numbers are unreliable anyways.
-        return (self.finished_tasks, self.in_progress, len(self.queue))
+        return (self.finished_tasks, self.in_progress, self._qsize())
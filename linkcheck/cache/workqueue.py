@@ -0,0 +1,429 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Work queues shared by a coordinator and worker processes, possibly
+running on different machines.
+
+A work queue stores tasks and check results. A task is identified by
+a key, usually the URL to check, and carries the get_url_from()
+arguments of the first link to the URL. Adding a task with an already
+known key records the arguments as another link to the URL instead, so
+each URL is checked once. When the task is finished, its result is
+stored and the coordinator logs a copy of it for each recorded link.
+
+A task taken by a worker is leased for TASK_LEASE_SECS seconds. If the
+worker does not finish it in time, for example because the worker
+crashed, the task is pending again.
+"""
+import threading
+import collections
+import sqlite3
+import time
+import cPickle as pickle
+from multiprocessing.managers import BaseManager
+from ..decorators import notimplemented
+from .urlqueue import Empty
+
+# states of tasks in the SQLite work queue
+PENDING, IN_PROGRESS, DONE = range(3)
+
+# interval in seconds to poll the SQLite work queue
+POLL_INTERVAL_SECS = 0.2
+
+# seconds after which unfinished tasks of a worker are pending again
+TASK_LEASE_SECS = 600
+
+
+class WorkQueue (object):
+    """Interface of work queues. All methods must be thread-safe."""
+
+    @notimplemented
+    def put (self, key, args):
+        """Add a task unless a task with the same key has been added.
+        Else the arguments are recorded as another link of the task.
+        @return: True if the task has been added, else False
+        """
+        pass
+
+    @notimplemented
+    def get (self, timeout=None):
+        """Lease and return the next pending task as tuple (key, args).
+        Raise Empty if no task is pending within the given timeout.
+        """
+        pass
+
+    @notimplemented
+    def task_done (self, key, result=None):
+        """Mark the task with given key as finished and store its
+        check result for the links of the task."""
+        pass
+
+    @notimplemented
+    def is_finished (self):
+        """Return True if no task is pending or in progress."""
+        pass
+
+    @notimplemented
+    def get_links (self):
+        """Remove and return the links of finished tasks as list of
+        tuples (args, result). Links of tasks without result are
+        removed without being returned."""
+        pass
+
+    @notimplemented
+    def add_result (self, result):
+        """Add a check result to be logged by the coordinator."""
+        pass
+
+    @notimplemented
+    def get_results (self, timeout=None):
+        """Remove and return the list of added results. Wait up to the
+        given timeout if there are no results."""
+        pass
+
+    @notimplemented
+    def set_info (self, name, value):
+        """Store a value shared with all workers."""
+        pass
+
+    @notimplemented
+    def get_info (self, name):
+        """Return shared value or None if not found."""
+        pass
+
+
+class MemoryWorkQueue (WorkQueue):
+    """Work queue in the memory of the coordinator. Workers access it
+    over TCP connections, see serve_work_queue()."""
+
+    def __init__ (self):
+        """Initialize empty queue."""
+        self.mutex = threading.Lock()
+        self.changed = threading.Condition(self.mutex)
+        self.pending = collections.deque()
+        self.keys = set()
+        # mapping {key -> (args, lease end time)} of tasks in progress
+        self.in_progress = {}
+        # mapping {key -> result} of finished tasks
+        self.done = {}
+        # list of (key, args) links to already added tasks
+        self.links = []
+        self.results = []
+        self.info = {}
+
+    def put (self, key, args):
+        """Add a task unless a task with the same key has been added."""
+        with self.mutex:
+            if key in self.keys:
+                self.links.append((key, args))
+                return False
+            self.keys.add(key)
+            self.pending.append((key, args))
+            self.changed.notifyAll()
+            return True
+
+    def get (self, timeout=None):
+        """Lease and return the next pending task."""
+        with self.mutex:
+            endtime = None if timeout is None else time.time() + timeout
+            self._requeue_expired()
+            while not self.pending:
+                if endtime is None:
+                    self.changed.wait(POLL_INTERVAL_SECS)
+                else:
+                    remaining = endtime - time.time()
+                    if remaining <= 0.0:
+                        raise Empty()
+                    self.changed.wait(min(remaining, POLL_INTERVAL_SECS))
+                self._requeue_expired()
+            key, args = self.pending.popleft()
+            self.in_progress[key] = (args, time.time() + TASK_LEASE_SECS)
+            return key, args
+
+    def _requeue_expired (self):
+        """Make tasks with expired leases pending again."""
+        now = time.time()
+        for key, (args, endtime) in self.in_progress.items():
+            if endtime <= now:
+                del self.in_progress[key]
+                self.pending.append((key, args))
+
+    def task_done (self, key, result=None):
+        """Mark the task with given key as finished. A task finished
+        after its lease expired is not checked again."""
+        with self.mutex:
+            if key in self.done:
+                return
+            if key in self.in_progress:
+                del self.in_progress[key]
+            else:
+                # the lease expired and the task is pending again
+                self.pending = collections.deque(task for task in
+                    self.pending if task[0] != key)
+            self.done[key] = result
+            self.changed.notifyAll()
+
+    def is_finished (self):
+        """Check if tasks have been added and all of them are finished."""
+        with self.mutex:
+            return self._is_finished()
+
+    def _is_finished (self):
+        """Non-thread-safe finish check."""
+        return not (self.pending or self.in_progress)
+
+    def get_links (self):
+        """Remove and return the links of finished tasks."""
+        with self.mutex:
+            links = []
+            remaining = []
+            for key, args in self.links:
+                if key not in self.done:
+                    remaining.append((key, args))
+                elif self.done[key] is not None:
+                    links.append((args, self.done[key]))
+            self.links = remaining
+            return links
+
+    def add_result (self, result):
+        """Add a check result."""
+        with self.mutex:
+            self.results.append(result)
+            self.changed.notifyAll()
+
+    def get_results (self, timeout=None):
+        """Remove and return the list of added results."""
+        with self.mutex:
+            if not self.results and not self._is_finished():
+                self.changed.wait(timeout)
+            results = self.results
+            self.results = []
+            return results
+
+    def set_info (self, name, value):
+        """Store a value shared with all workers."""
+        with self.mutex:
+            self.info[name] = value
+
+    def get_info (self, name):
+        """Return shared value or None if not found."""
+        with self.mutex:
+            return self.info.get(name)
+
+
+class SqliteWorkQueue (WorkQueue):
+    """Work queue in a SQLite database file that can be shared by
+    processes on one machine."""
+
+    def __init__ (self, filename):
+        """Open or create the database."""
+        self.conn = sqlite3.connect(filename, timeout=60,
+            check_same_thread=False, isolation_level=None)
+        self.conn.text_factory = str
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS tasks "
+                "(key TEXT PRIMARY KEY, args BLOB, state INTEGER, "
+                "lease REAL, result BLOB)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_state "
+                "ON tasks (state)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS links "
+                "(id INTEGER PRIMARY KEY, key TEXT, args BLOB)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS results "
+                "(id INTEGER PRIMARY KEY, result BLOB)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS info "
+                "(name TEXT PRIMARY KEY, value BLOB)")
+
+    def put (self, key, args):
+        """Add a task unless a task with the same key has been added."""
+        data = sqlite3.Binary(pickle.dumps(args, pickle.HIGHEST_PROTOCOL))
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self.conn.execute("INSERT OR IGNORE INTO tasks "
+                    "(key, args, state) VALUES (?, ?, ?)",
+                    (key, data, PENDING))
+                added = cursor.rowcount > 0
+                if not added:
+                    self.conn.execute("INSERT INTO links (key, args) "
+                        "VALUES (?, ?)", (key, data))
+            finally:
+                self.conn.execute("COMMIT")
+            return added
+
+    def get (self, timeout=None):
+        """Lease and return the next pending task."""
+        endtime = None if timeout is None else time.time() + timeout
+        while True:
+            task = self._get()
+            if task is not None:
+                return task
+            if endtime is not None and time.time() >= endtime:
+                raise Empty()
+            time.sleep(POLL_INTERVAL_SECS)
+
+    def _get (self):
+        """Mark the next pending task as in progress and return it,
+        or return None if no task is pending. Tasks with expired leases
+        are pending again."""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("UPDATE tasks SET state=? "
+                    "WHERE state=? AND lease<=?", (PENDING, IN_PROGRESS, now))
+                row = self.conn.execute("SELECT key, args FROM tasks "
+                    "WHERE state=? ORDER BY rowid LIMIT 1",
+                    (PENDING,)).fetchone()
+                if row is not None:
+                    self.conn.execute("UPDATE tasks SET state=?, lease=? "
+                        "WHERE key=?", (IN_PROGRESS, now + TASK_LEASE_SECS,
+                        row[0]))
+            finally:
+                self.conn.execute("COMMIT")
+        if row is None:
+            return None
+        return (row[0].decode("utf-8"), pickle.loads(str(row[1])))
+
+    def task_done (self, key, result=None):
+        """Mark the task with given key as finished. A task finished
+        after its lease expired is not checked again."""
+        if result is not None:
+            result = sqlite3.Binary(pickle.dumps(result,
+                pickle.HIGHEST_PROTOCOL))
+        with self.lock:
+            self.conn.execute("UPDATE tasks SET state=?, result=? "
+                "WHERE key=? AND state<>?", (DONE, result, key, DONE))
+
+    def is_finished (self):
+        """Check if no task is pending or in progress."""
+        with self.lock:
+            row = self.conn.execute("SELECT 1 FROM tasks WHERE state<>? "
+                "LIMIT 1", (DONE,)).fetchone()
+        return row is None
+
+    def get_links (self):
+        """Remove and return the links of finished tasks."""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute("SELECT links.id, links.args, "
+                    "tasks.result FROM links JOIN tasks "
+                    "ON links.key=tasks.key WHERE tasks.state=? "
+                    "ORDER BY links.id", (DONE,)).fetchall()
+                self.conn.executemany("DELETE FROM links WHERE id=?",
+                    [(row[0],) for row in rows])
+            finally:
+                self.conn.execute("COMMIT")
+        return [(pickle.loads(str(row[1])), pickle.loads(str(row[2])))
+                for row in rows if row[2] is not None]
+
+    def add_result (self, result):
+        """Add a check result."""
+        data = sqlite3.Binary(pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+        with self.lock:
+            self.conn.execute("INSERT INTO results (result) VALUES (?)",
+                (data,))
+
+    def get_results (self, timeout=None):
+        """Remove and return the list of added results."""
+        endtime = None if timeout is None else time.time() + timeout
+        while True:
+            with self.lock:
+                self.conn.execute("BEGIN IMMEDIATE")
+                try:
+                    rows = self.conn.execute("SELECT id, result FROM results "
+                        "ORDER BY id").fetchall()
+                    if rows:
+                        self.conn.execute("DELETE FROM results WHERE id<=?",
+                            (rows[-1][0],))
+                finally:
+                    self.conn.execute("COMMIT")
+            if rows or (endtime is not None and time.time() >= endtime):
+                return [pickle.loads(str(row[1])) for row in rows]
+            time.sleep(POLL_INTERVAL_SECS)
+
+    def set_info (self, name, value):
+        """Store a value shared with all workers."""
+        data = sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO info VALUES (?, ?)",
+                (name, data))
+
+    def get_info (self, name):
+        """Return shared value or None if not found."""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM info WHERE name=?",
+                (name,)).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(str(row[0]))
+
+    def clear (self):
+        """Remove all tasks, links, results and shared values."""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("DELETE FROM tasks")
+                self.conn.execute("DELETE FROM links")
+                self.conn.execute("DELETE FROM results")
+                self.conn.execute("DELETE FROM info")
+            finally:
+                self.conn.execute("COMMIT")
+
+    def close (self):
+        """Close the database."""
+        with self.lock:
+            self.conn.close()
+
+
+class WorkQueueManager (BaseManager):
+    """Serve a work queue over TCP connections."""
+    pass
+
+
+class WorkQueueClientManager (BaseManager):
+    """Connect to a work queue served over TCP."""
+    pass
+
+WorkQueueClientManager.register("get_work_queue")
+
+
+def serve_work_queue (work_queue, address, authkey):
+    """Serve the work queue at the given (host, port) address in
+    a background thread. Clients must use the same authentication key.
+    @return: the server object
+    """
+    # each server needs its own manager class registering its queue
+    manager_class = type("WorkQueueManager", (WorkQueueManager,), {})
+    manager_class.register("get_work_queue", callable=lambda: work_queue)
+    manager = manager_class(address=address, authkey=authkey)
+    server = manager.get_server()
+    t = threading.Thread(target=server.serve_forever,
+        name="WorkQueueServer")
+    t.daemon = True
+    t.start()
+    return server
+
+
+def connect_work_queue (address, authkey):
+    """Connect to a work queue served at the given (host, port) address.
+    @return: proxy object of the work queue
+    """
+    manager = WorkQueueClientManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager.get_work_queue()
@@ -102,27 +102,41 @@ def get_url_from (base_url, recursion_level, aggregate,
     if base_ref is not None:
         base_ref = strformat.unicode_safe(base_ref)
     name = strformat.unicode_safe(name)
+    url = absolute_url(base_url_stripped, base_ref, parent_url)
+    if ":" not in url and not (url or name):
+        # use filename as base url, with slash as path seperator
+        name = base_url.replace("\\", "/")
+    klass = get_urlclass(base_url, recursion_level, aggregate,
+        parent_url=parent_url, base_ref=base_ref,
+        parent_content_type=parent_content_type)
+    log.debug(LOG_CHECK, "%s handles url %s", klass.__name__, base_url)
+    return klass(base_url, recursion_level, aggregate,
+                 parent_url=parent_url, base_ref=base_ref,
+                 line=line, column=column, page=page, name=name, extern=extern)
+
+
+def get_urlclass (base_url, recursion_level, aggregate, parent_url=None,
+                  base_ref=None, parent_content_type=None):
+    """Return checker class for given base data without constructing
+    the URL object. See get_url_from() for the parameters."""
+    if base_url is not None:
+        base_url = strformat.unicode_safe(base_url)
+        base_url_stripped = base_url.lstrip()
+    else:
+        base_url_stripped = base_url
     url = absolute_url(base_url_stripped, base_ref, parent_url).lower()
     if ":" in url:
         scheme = url.split(":", 1)[0].lower()
     else:
         scheme = None
-        if not (url or name):
-            # use filename as base url, with slash as path seperator
-            name = base_url.replace("\\", "/")
     allowed_schemes = aggregate.config["allowedschemes"]
     # ignore local PHP files with execution directives
     local_php = (parent_content_type == 'application/x-httpd-php' and
        '<?' in base_url and '?>' in base_url and scheme == 'file')
     if local_php or (allowed_schemes and scheme not in allowed_schemes):
-        klass = ignoreurl.IgnoreUrl
-    else:
-        assume_local_file = (recursion_level == 0)
-        klass = get_urlclass_from(scheme, assume_local_file=assume_local_file)
-    log.debug(LOG_CHECK, "%s handles url %s", klass.__name__, base_url)
-    return klass(base_url, recursion_level, aggregate,
-                 parent_url=parent_url, base_ref=base_ref,
-                 line=line, column=column, page=page, name=name, extern=extern)
+        return ignoreurl.IgnoreUrl
+    assume_local_file = (recursion_level == 0)
+    return get_urlclass_from(scheme, assume_local_file=assume_local_file)
 
 
 def get_urlclass_from (scheme, assume_local_file=False):
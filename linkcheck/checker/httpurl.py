@@ -18,6 +18,8 @@
 Handle http links.
 """
 
+import hashlib
+import time
 import requests
 # The validity of SSL certs is ignored to be able
 # the check the URL and recurse into it.
@@ -35,8 +37,7 @@ except ImportError:
 from .. import (log, LOG_CHECK, strformat, mimeutil,
     url as urlutil, LinkCheckerError, httputil)
 from . import (internpaturl, proxysupport)
-from ..HtmlParser import htmlsax
-from ..htmlutil import linkparse
+from ..cache import persistent
 # import warnings
 from .const import WARN_HTTP_EMPTY_CONTENT
 from requests.sessions import REDIRECT_STATI
@@ -64,6 +65,12 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport):
         self.auth = None
         self.ssl_cipher = None
         self.ssl_cert = None
+        # page stored by a previous run, used for revalidation
+        self.cached_page = None
+        # flag if the server confirmed that the stored page is unchanged
+        self.not_modified = False
+        # SHA-1 digest of content parsed while downloading
+        self.content_hash = None
 
     def allows_robots (self, url):
         """
@@ -84,26 +91,13 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport):
         """
         if not self.is_html():
             return True
-        # construct parser object
-        handler = linkparse.MetaRobotsFinder()
-        parser = htmlsax.parser(handler)
-        handler.parser = parser
-        if self.charset:
-            parser.encoding = self.charset
-        # parse
-        try:
-            parser.feed(self.get_content())
-            parser.flush()
-        except linkparse.StopParse as msg:
-            log.debug(LOG_CHECK, "Stopped parsing: %s", msg)
-            pass
-        # break cyclic dependencies
-        handler.parser = None
-        parser.handler = None
-        return handler.follow
+        return self.get_html_content().follow
 
     def add_size_info (self):
         """Get size of URL content from HTTP header."""
+        if self.not_modified:
+            # the size has been restored from the stored page
+            return
         if self.headers and "Content-Length" in self.headers and \
            "Transfer-Encoding" not in self.headers:
             # Note that content-encoding causes size differences since
@@ -142,26 +136,69 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport):
             self.set_result(_("syntax OK"))
             self.do_check_content = False
             return
+        self.cached_page = self.get_cached_page()
         # check the http connection
-        request = self.build_request()
+        request = self.build_request(self.get_request_method())
         self.send_request(request)
         self._add_response_info()
         self.follow_redirections(request)
+        if request.method == 'HEAD' and self.needs_get_request():
+            head_status = self.url_connection.status_code
+            self.close_connection()
+            request = self.build_request('GET')
+            self.send_request(request)
+            self._add_response_info()
+            self.follow_redirections(request)
+            if head_status >= 400 and self.url_connection.status_code < 400:
+                # use GET for all further requests to this host
+                self.aggregate.nohead_hosts.add(self.urlparts[1])
+        if self.url_connection.status_code == 304 and self.cached_page:
+            self.set_cached_page_result()
+            return
         self.check_response()
         if self.allows_simple_recursion():
             self.parse_header_links()
 
-    def build_request(self):
+    def content_needed (self):
+        """Check if the content of this URL might be parsed for
+        recursion or checked by content plugins."""
+        return (self.allows_simple_recursion() or
+                bool(self.aggregate.plugin_manager.content_plugins))
+
+    def get_request_method (self):
+        """Return HEAD if the content of this URL is not needed and the
+        server is not known to mishandle HEAD requests, else GET."""
+        if not self.aggregate.config["headrequests"] or \
+           self.urlparts[1] in self.aggregate.nohead_hosts or \
+           self.content_needed():
+            return 'GET'
+        return 'HEAD'
+
+    def needs_get_request (self):
+        """Check if the response to a HEAD request must be confirmed with
+        a GET request. This is the case for error responses, since some
+        servers do not implement HEAD correctly, and for redirections to
+        URLs whose content is needed."""
+        if self.url_connection.status_code >= 400:
+            return True
+        return self.content_needed()
+
+    def build_request(self, method='GET'):
         """Build a prepared request object."""
         clientheaders = {}
         if (self.parent_url and
             self.parent_url.lower().startswith(HTTP_SCHEMAS)):
             clientheaders["Referer"] = self.parent_url
         kwargs = dict(
-            method='GET',
+            method=method,
             url=self.url,
             headers=clientheaders,
         )
+        if self.cached_page is not None:
+            if self.cached_page.etag:
+                clientheaders["If-None-Match"] = self.cached_page.etag
+            if self.cached_page.modified:
+                clientheaders["If-Modified-Since"] = self.cached_page.modified
         if self.auth:
             kwargs['auth'] = self.auth
         log.debug(LOG_CHECK, "Prepare request with %s", kwargs)
@@ -177,7 +214,7 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport):
         self._send_request(request, **kwargs)
 
     def _send_request(self, request, **kwargs):
-        """Send GET request."""
+        """Send GET or HEAD request."""
         log.debug(LOG_CHECK, "Send request %s with %s", request, kwargs)
         log.debug(LOG_CHECK, "Request headers %s", request.headers)
         self.url_connection = self.session.send(request, **kwargs)
@@ -226,6 +263,9 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport):
 
     def set_content_type (self):
         """Return content MIME type or empty string."""
+        if self.not_modified:
+            # the content type has been restored from the stored page
+            return
         self.content_type = httputil.get_content_type(self.headers)
 
     def is_redirect(self):
@@ -305,17 +345,142 @@ class HttpUrl (internpaturl.InternPatternUrl, proxysupport.ProxySupport):
             else:
                 self.set_result(_("OK"))
 
+    def get_cached_page (self):
+        """Get the page stored by a previous run if it can be used to
+        revalidate this URL, else None. Also starts recording the links
+        of this URL for the next run."""
+        persistent_cache = self.aggregate.persistent_cache
+        if persistent_cache is None:
+            return None
+        self.child_links = []
+        page = persistent_cache.get_page(self.cache_url)
+        if page is None:
+            return None
+        if page.links is None and self.allows_simple_recursion():
+            # the stored page lacks the links needed for recursion
+            return None
+        if page.anchors is None and self.anchor and \
+           self.aggregate.plugin_manager.needs_anchors:
+            # the stored page lacks the anchors needed to check the anchor
+            return None
+        return page
+
+    def set_cached_page_result (self):
+        """Restore the result of the unchanged stored page."""
+        self.not_modified = True
+        result = self.cached_page.result
+        self.content_type = result.content_type
+        self.size = result.size
+        self.title = result.title
+        self.modified = result.modified
+        for tag, msg in result.warnings:
+            self.add_warning(msg, tag=tag)
+        self.add_info(_("Content not modified since the last check."))
+        self.set_result(result.result, valid=result.valid)
+
+    def check_content (self):
+        """Check content of URL. The stored links of unchanged pages
+        are added again instead of downloading and parsing the content,
+        and content plugins check the stored page instead.
+        @return: True if content can be parsed, else False
+        """
+        if self.not_modified:
+            if self.do_check_content and self.valid:
+                self.aggregate.plugin_manager.run_unchanged_plugins(self,
+                    self.cached_page)
+            if self.cached_page.links and self.allows_simple_recursion():
+                self.add_cached_page_links()
+            return False
+        do_parse = super(HttpUrl, self).check_content()
+        if do_parse and self.cached_page is not None and \
+           self.cached_page.links is not None and \
+           self.cached_page.content_hash == self.get_content_hash():
+            # the server did not revalidate, but the content is unchanged
+            self.add_cached_page_links()
+            return False
+        return do_parse
+
+    def add_cached_page_links (self):
+        """Add the links of the stored page to the URL queue."""
+        for url, line, column, page, name, base in self.cached_page.links:
+            self.add_url(url, line=line, column=column, page=page,
+                         name=name, base=base)
+
+    def get_content_hash (self):
+        """Return SHA-1 hex digest of downloaded content or None if
+        no content has been downloaded."""
+        if self.data is None:
+            return self.content_hash
+        return hashlib.sha1(self.data).hexdigest()
+
+    def add_to_persistent_cache (self):
+        """Store validators, result and links of this URL for
+        revalidation in a later run. Redirected URLs are not stored."""
+        persistent_cache = self.aggregate.persistent_cache
+        if persistent_cache is None or self.url_connection is None or \
+           self.aliases:
+            return
+        etag = self.getheader("ETag")
+        modified = self.getheader("Last-Modified")
+        content_hash = self.get_content_hash()
+        if self.not_modified:
+            etag = etag or self.cached_page.etag
+            modified = modified or self.cached_page.modified
+            content_hash = self.cached_page.content_hash
+        if self.allows_simple_recursion():
+            links = self.child_links
+        else:
+            links = None
+        if self.not_modified:
+            anchors = self.cached_page.anchors
+        elif self.html_content is not None and \
+             self.html_content.anchors is not None:
+            anchors = sorted(set(x[0] for x in self.html_content.anchors))
+        else:
+            anchors = None
+        page = persistent.Page(etag, modified, content_hash, self.to_wire(),
+            links, anchors)
+        persistent_cache.add_page(self.cache_url, page)
+
     def read_content(self):
         """Return data and data size for this URL.
         Can be overridden in subclasses."""
-        maxbytes = self.aggregate.config["maxfilesizedownload"]
         buf = StringIO()
-        for data in self.url_connection.iter_content(chunk_size=self.ReadChunkBytes):
-            if buf.tell() + len(data) > maxbytes:
-                raise LinkCheckerError(_("File size too large"))
+        for data in self.iter_content():
             buf.write(data)
         return buf.getvalue()
 
+    def iter_content (self):
+        """Yield the content in chunks while it is downloaded.
+        @raise LinkCheckerError: if the content is too large
+        """
+        maxbytes = self.aggregate.config["maxfilesizedownload"]
+        size = 0
+        for data in self.url_connection.iter_content(chunk_size=self.ReadChunkBytes):
+            size += len(data)
+            if size > maxbytes:
+                raise LinkCheckerError(_("File size too large"))
+            yield data
+
+    def get_html_content (self):
+        """Parse the HTML content while it is downloaded unless the
+        content has already been read, eg. by a content plugin.
+        The downloaded content is not kept in memory."""
+        if self.html_content is None and self.data is None:
+            log.debug(LOG_CHECK, "Parse content of %r", self.url)
+            t = time.time()
+            analyzer = self.get_html_analyzer()
+            content_hash = hashlib.sha1()
+            size = 0
+            for data in self.iter_content():
+                analyzer.feed(data)
+                content_hash.update(data)
+                size += len(data)
+            self.content_hash = content_hash.hexdigest()
+            self.set_content_size(size, time.time() - t)
+            self.set_html_content(analyzer.finish())
+        return super(HttpUrl, self).get_html_content()
+
     def parse_header_links(self):
         """Parse URLs in HTTP headers Link:."""
         for linktype, linkinfo in self.url_connection.links.items():
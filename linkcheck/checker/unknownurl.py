@@ -25,6 +25,9 @@ from . import urlbase
 class UnknownUrl (urlbase.UrlBase):
     """Handle unknown or just plain broken URLs."""
 
+    # the result is known when the URL object is constructed
+    QueuePending = False
+
     def build_url (self):
         """Only logs that this URL is unknown."""
         super(UnknownUrl, self).build_url()
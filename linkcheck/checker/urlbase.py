@@ -40,10 +40,11 @@ except ImportError:
     # Python 3
     from io import StringIO
 
-from . import absolute_url, get_url_from
+from . import absolute_url, get_url_from, get_urlclass
 from .. import (log, LOG_CHECK,
   strformat, LinkCheckerError, url as urlutil, trace, get_link_pat)
 from ..network import iputil
+from ..cache.strings import result_strings
 from .const import (WARN_URL_EFFECTIVE_URL,
     WARN_URL_ERROR_GETTING_CONTENT, WARN_URL_OBFUSCATED_IP,
     WARN_URL_CONTENT_SIZE_ZERO, WARN_URL_CONTENT_SIZE_TOO_LARGE,
@@ -67,6 +68,35 @@ def urljoin (parent, url):
     return urlparse.urljoin(parent, url)
 
 
+def get_seen_key (url, base):
+    """Get the key to detect already seen HTTP URLs before constructing
+    a new URL object.
+    @return: the URL joined with its base, or None if the URL is not
+      an absolute HTTP(S) URL
+    @rtype: unicode or None
+    """
+    if url is None:
+        return None
+    key = get_joined_url(url, base)
+    if key is None or not key.lower().startswith((u"http://", u"https://")):
+        return None
+    return key
+
+
+def get_joined_url (url, base):
+    """Join an URL with its base without norming it. A missing URL
+    refers to its base.
+    @return: the joined URL, or None if there is no base
+    @rtype: unicode or None
+    """
+    if not base:
+        return None
+    if url is None:
+        url = u""
+    return urljoin(strformat.unicode_safe(base),
+                   strformat.unicode_safe(url).strip())
+
+
 def url_norm (url, encoding=None):
     """Wrapper for url.url_norm() to convert UnicodeError in
     LinkCheckerError."""
@@ -106,6 +136,10 @@ class UrlBase (object):
     # Read in 16kb chunks
     ReadChunkBytes = 1024*16
 
+    # Found URLs of this class are queued as pending records and only
+    # constructed when they are dequeued.
+    QueuePending = True
+
     def __init__ (self, base_url, recursion_level, aggregate,
                   parent_url=None, base_ref=None, line=-1, column=-1, page=-1,
                   name=u"", url_encoding=None, extern=None):
@@ -222,6 +256,10 @@ class UrlBase (object):
         self.content_type = u""
         # URLs seen through redirections
         self.aliases = []
+        # list of add_url() arguments, None if links are not recorded
+        self.child_links = None
+        # HTML content found by parsing the content once
+        self.html_content = None
 
     def set_result (self, msg, valid=True, overwrite=False):
         """
@@ -587,21 +625,19 @@ class UrlBase (object):
         if not url:
             self.extern = (1, 1)
             return
-        for entry in self.aggregate.config["externlinks"]:
-            match = entry['pattern'].search(url)
-            if (entry['negate'] and not match) or \
-               (match and not entry['negate']):
-                log.debug(LOG_CHECK, "Extern URL %r", url)
-                self.extern = (1, entry['strict'])
-                return
-        for entry in self.aggregate.config["internlinks"]:
-            match = entry['pattern'].search(url)
-            if (entry['negate'] and not match) or \
-               (match and not entry['negate']):
-                log.debug(LOG_CHECK, "Intern URL %r", url)
-                self.extern = (0, 0)
-                return
-        if self.aggregate.config['checkextern']:
+        config = self.aggregate.config
+        strict = self.aggregate.extern_matcher.search(url,
+            config["externlinks"])
+        if strict is not None:
+            log.debug(LOG_CHECK, "Extern URL %r", url)
+            self.extern = (1, strict)
+            return
+        if self.aggregate.intern_matcher.search(url,
+            config["internlinks"]) is not None:
+            log.debug(LOG_CHECK, "Intern URL %r", url)
+            self.extern = (0, 0)
+            return
+        if config['checkextern']:
             self.extern = (1, 0)
         else:
             self.extern = (1, 1)
@@ -621,15 +657,45 @@ class UrlBase (object):
             log.debug(LOG_CHECK, "Get content of %r", self.url)
             t = time.time()
             self.data = self.read_content()
-            self.size = len(self.data)
-            self.dltime = time.time() - t
-            if self.size == 0:
-                self.add_warning(_("Content size is zero."),
-                             tag=WARN_URL_CONTENT_SIZE_ZERO)
-            else:
-                self.aggregate.add_downloaded_bytes(self.size)
+            self.set_content_size(len(self.data), time.time() - t)
         return self.data
 
+    def set_content_size (self, size, dltime):
+        """Store size and download time of the read content."""
+        self.size = size
+        self.dltime = dltime
+        if self.size == 0:
+            self.add_warning(_("Content size is zero."),
+                         tag=WARN_URL_CONTENT_SIZE_ZERO)
+        else:
+            self.aggregate.add_downloaded_bytes(self.size)
+
+    def get_html_content (self):
+        """Parse the HTML content once for all consumers, ie. the link
+        parser, the anchor check and the meta robots check. Links are
+        searched if recursion is allowed, and anchors if a content plugin
+        needs them.
+        @return: the found content
+        @rtype: parser.HtmlContent
+        """
+        if self.html_content is None:
+            analyzer = self.get_html_analyzer()
+            analyzer.feed(self.get_content())
+            self.set_html_content(analyzer.finish())
+        return self.html_content
+
+    def get_html_analyzer (self):
+        """Get incremental parser of the HTML content.
+        @rtype: parser.HtmlAnalyzer
+        """
+        from ..parser import HtmlAnalyzer
+        return HtmlAnalyzer(self, links=self.allows_simple_recursion(),
+            anchors=self.aggregate.plugin_manager.needs_anchors)
+
+    def set_html_content (self, html_content):
+        """Store the parsed HTML content."""
+        self.html_content = html_content
+
     def read_content(self):
         """Return data for this URL. Can be overridden in subclasses."""
         buf = StringIO()
@@ -655,15 +721,47 @@ class UrlBase (object):
         return self.aggregate.config.get_user_password(self.url)
 
     def add_url (self, url, line=0, column=0, page=0, name=u"", base=None):
-        """Add new URL to queue."""
+        """Add new URL to queue. URLs are queued as lightweight pending
+        records; the full URL object is constructed when the record is
+        dequeued. Records of URLs that have already been checked
+        reference the cache key of the first URL. Unknown and ignored
+        URLs get their result without checking and are queued as URL
+        objects."""
+        if self.child_links is not None:
+            self.child_links.append((url, line, column, page, name, base))
         if base:
-            base_ref = urlutil.url_norm(base)[0]
+            base_ref = result_strings.intern(urlutil.url_norm(base)[0])
         else:
             base_ref = None
-        url_data = get_url_from(url, self.recursion_level+1, self.aggregate,
-            parent_url=self.url, base_ref=base_ref, line=line, column=column,
-            page=page, name=name, parent_content_type=self.content_type)
-        self.aggregate.urlqueue.put(url_data)
+        urlqueue = self.aggregate.urlqueue
+        parent_content_type = result_strings.intern(self.content_type)
+        klass = get_urlclass(url, self.recursion_level+1, self.aggregate,
+            parent_url=self.url, base_ref=base_ref,
+            parent_content_type=parent_content_type)
+        if not klass.QueuePending:
+            urlqueue.put(get_url_from(url, self.recursion_level+1,
+                self.aggregate, parent_url=self.url, base_ref=base_ref,
+                line=line, column=column, page=page, name=name,
+                parent_content_type=parent_content_type))
+            return
+        seen_key = get_seen_key(url, base_ref or self.url)
+        cache_url = urlqueue.get_seen(seen_key)
+        if cache_url is None:
+            # a normed URL that has been checked is its own cache key,
+            # for example a link of a page to itself
+            joined_url = get_joined_url(url, base_ref or self.url)
+            if joined_url is not None and \
+               self.aggregate.result_cache.has_result(joined_url):
+                cache_url = joined_url
+        urlqueue.put(PendingUrl(url, self.recursion_level+1, self.aggregate,
+            parent_url=self.url, base_ref=base_ref, line=line,
+            column=column, page=page, name=name,
+            parent_content_type=parent_content_type, cache_url=cache_url))
+
+    def add_to_persistent_cache (self):
+        """Store data needed to revalidate this URL in a later run.
+        Does nothing by default; overridden in subclasses."""
+        pass
 
     def serialized (self, sep=os.linesep):
         """
@@ -832,11 +930,142 @@ urlDataAttr = [
     'level',
 ]
 
+# string attributes shared between results with equal values; strings
+# that mostly differ between results, like the link name, are not shared
+urlDataStringAttr = frozenset([
+    'parent_url',
+    'base_ref',
+    'base_url',
+    'url',
+    'domain',
+    'cache_url',
+    'content_type',
+])
+
 class CompactUrlData (object):
-    """Store selected UrlData attributes in slots to minimize memory usage."""
+    """Store selected UrlData attributes in slots to minimize memory usage.
+    Equal strings of different results are stored once."""
     __slots__ = urlDataAttr
 
     def __init__(self, wired_url_data):
         '''Set all attributes according to the dictionnary wired_url_data'''
         for attr in urlDataAttr:
-            setattr(self, attr, wired_url_data[attr])
+            self._set(attr, wired_url_data[attr])
+
+    def _set (self, attr, value):
+        """Set attribute value, using shared strings."""
+        if attr in urlDataStringAttr:
+            value = result_strings.intern(value)
+        setattr(self, attr, value)
+
+    def __getstate__ (self):
+        """Return attribute values for pickling."""
+        return tuple(getattr(self, attr) for attr in urlDataAttr)
+
+    def __setstate__ (self, state):
+        """Set attribute values after unpickling. Also reads the
+        (None, slots) state of the default pickle format."""
+        if len(state) == 2 and state[0] is None:
+            values = state[1]
+            for attr in urlDataAttr:
+                self._set(attr, values.get(attr))
+        else:
+            for attr, value in zip(urlDataAttr, state):
+                self._set(attr, value)
+
+
+class PendingUrl (object):
+    """A queued URL found in the content of a checked page. It stores
+    only its get_url_from() arguments, with the parent URL shared by all
+    links of the page, and the cache key of the URL if it is already
+    known. If the result is not cached when the record gets checked,
+    materialize() constructs the full URL object, which also checks the
+    URL syntax and the extern filters."""
+    __slots__ = (
+        'base_url',
+        'recursion_level',
+        'aggregate',
+        'parent_url',
+        'base_ref',
+        'line',
+        'column',
+        'page',
+        'name',
+        'parent_content_type',
+        'cache_url',
+    )
+
+    # pending URLs never have a result of their own
+    has_result = False
+
+    def __init__ (self, base_url, recursion_level, aggregate,
+                  parent_url=None, base_ref=None, line=0, column=0, page=0,
+                  name=u"", parent_content_type=None, cache_url=None):
+        """Store given URL information."""
+        self.base_url = base_url
+        self.recursion_level = recursion_level
+        self.aggregate = aggregate
+        self.parent_url = parent_url
+        self.base_ref = base_ref
+        self.line = line
+        self.column = column
+        self.page = page
+        self.name = unicode_safe(name)
+        self.parent_content_type = parent_content_type
+        self.cache_url = cache_url
+
+    @property
+    def seen_key (self):
+        """Return the key to detect already seen HTTP URLs, see
+        get_seen_key()."""
+        return get_seen_key(self.base_url, self.base_ref or self.parent_url)
+
+    @property
+    def url (self):
+        """Return the cache key, or the URL joined with its base if the
+        cache key is not known yet."""
+        return self.cache_url or self.seen_key or self.base_url
+
+    @property
+    def urlparts (self):
+        """Return the splitted URL. If the cache key is not known yet,
+        the host name of HTTP URLs is lowercased and the default port is
+        removed like in the normed URL."""
+        if self.cache_url is not None:
+            return strformat.url_unicode_split(self.cache_url)
+        seen_key = self.seen_key
+        if seen_key is None:
+            return None
+        urlparts = strformat.url_unicode_split(seen_key)
+        scheme = urlparts[0] = urlparts[0].lower()
+        netloc = urlparts[1].lower()
+        if netloc.endswith(u":%d" % urlutil.default_ports.get(scheme, 0)):
+            netloc = netloc.rsplit(u":", 1)[0]
+        urlparts[1] = netloc
+        return urlparts
+
+    @property
+    def anchor (self):
+        """Return the anchor of the URL."""
+        if u"#" not in self.base_url:
+            return u""
+        return urlparse.urlsplit(urlutil.url_norm(self.base_url)[0])[4]
+
+    def is_http (self):
+        """Return True for http:// or https:// URLs."""
+        if self.cache_url is None:
+            # only HTTP URLs have a seen key
+            return self.seen_key is not None
+        return self.cache_url.startswith((u"http:", u"https:"))
+
+    def materialize (self):
+        """Construct the full URL object."""
+        return get_url_from(self.base_url, self.recursion_level,
+            self.aggregate, parent_url=self.parent_url,
+            base_ref=self.base_ref, line=self.line, column=self.column,
+            page=self.page, name=self.name,
+            parent_content_type=self.parent_content_type)
+
+    def __repr__ (self):
+        """Return URL info."""
+        return u"<PendingUrl %s>" % self.url
@@ -166,15 +166,28 @@ class Configuration (dict):
         self["debugmemory"] = False
         self["localwebroot"] = None
         self["maxfilesizeparse"] = 1*1024*1024
+        self["htmlparser"] = "htmlsax"
         self["maxfilesizedownload"] = 5*1024*1024
         self["maxnumurls"] = None
         self["maxrunseconds"] = None
         self["maxrequestspersecond"] = 10
+        self["maxconnectionsperhost"] = 0
+        self["maxcachedurls"] = 100000
+        self["maxcachememory"] = 0
+        self["cachetodisk"] = False
+        self["persistentcache"] = None
+        self["checkpoint"] = None
+        self["resume"] = False
+        self["headrequests"] = True
         self["maxhttpredirects"] = 10
         self["nntpserver"] = os.environ.get("NNTP_SERVER", None)
         self["proxy"] = urllib.getproxies()
         self["sslverify"] = True
         self["threads"] = 10
+        self["processes"] = 0
+        self["workqueue"] = None
+        self["workqueuekey"] = None
+        self["worker"] = False
         self["timeout"] = 60
         self["aborttimeout"] = 300
         self["recursionlevel"] = -1
@@ -202,6 +215,8 @@ class Configuration (dict):
         self['output'] = 'text'
         self["status"] = False
         self["status_wait_seconds"] = 5
+        self["flushinterval"] = 1
+        self["flushsize"] = 0x10000
         self['logger'] = None
         self.loggers = {}
         from ..logger import LoggerClasses
@@ -218,7 +233,11 @@ class Configuration (dict):
         """Instantiate new logger and return it."""
         args = self[loggername]
         args.update(kwargs)
-        return self.loggers[loggername](**args)
+        # the logger section can override the output options
+        kwargs = dict(flushinterval=self["flushinterval"],
+                      flushsize=self["flushsize"])
+        kwargs.update(args)
+        return self.loggers[loggername](**kwargs)
 
     def logger_add (self, loggerclass):
         """Add a new logger type to the known loggers."""
@@ -288,6 +307,14 @@ class Configuration (dict):
         self.sanitize_proxies()
         self.sanitize_plugins()
         self.sanitize_ssl()
+        if self['processes'] > 1 and os.name != 'posix':
+            log.warn(LOG_CHECK,
+              _("checking with several processes is only supported on POSIX systems"))
+            self['processes'] = 0
+        if self['checkpoint'] and (self['processes'] > 1 or self['workqueue']):
+            log.warn(LOG_CHECK,
+              _("checkpoints are not supported when checking with several processes"))
+            self['checkpoint'] = None
         # set default socket timeout
         socket.setdefaulttimeout(self['timeout'])
 
@@ -115,6 +115,8 @@ class LCConfigParser (ConfigParser.RawConfigParser, object):
             parts = [f.strip().lower() for f in val.split(',')]
             logconf.set_debug(parts)
         self.read_boolean_option(section, "status")
+        self.read_int_option(section, "flushinterval", min=0)
+        self.read_int_option(section, "flushsize", min=0)
         if self.has_option(section, "log"):
             val = self.get(section, "log").strip().lower()
             self.config['output'] = val
@@ -135,15 +137,32 @@ class LCConfigParser (ConfigParser.RawConfigParser, object):
         section = "checking"
         self.read_int_option(section, "threads", min=-1)
         self.config['threads'] = max(0, self.config['threads'])
+        self.read_int_option(section, "processes", min=0)
+        self.read_string_option(section, "workqueue")
+        self.read_string_option(section, "workqueuekey")
         self.read_int_option(section, "timeout", min=1)
         self.read_int_option(section, "aborttimeout", min=1)
         self.read_int_option(section, "recursionlevel", min=-1)
         self.read_string_option(section, "nntpserver")
         self.read_string_option(section, "useragent")
         self.read_int_option(section, "maxrequestspersecond", min=1)
+        self.read_int_option(section, "maxconnectionsperhost", min=0)
+        self.read_int_option(section, "maxcachedurls", min=1)
+        self.read_int_option(section, "maxcachememory", min=0)
+        self.read_boolean_option(section, "cachetodisk")
+        self.read_string_option(section, "persistentcache")
+        self.read_string_option(section, "checkpoint")
+        self.read_boolean_option(section, "headrequests")
         self.read_int_option(section, "maxnumurls", min=0)
         self.read_int_option(section, "maxfilesizeparse", min=1)
         self.read_int_option(section, "maxfilesizedownload", min=1)
+        if self.has_option(section, "htmlparser"):
+            from ..parser import HtmlParsers
+            value = self.get(section, "htmlparser").strip().lower()
+            if value not in HtmlParsers:
+                raise LinkCheckerError(_("invalid value for %s: %s") %
+                    ("htmlparser", value))
+            self.config["htmlparser"] = value
         if self.has_option(section, "allowedschemes"):
             self.config['allowedschemes'] = [x.strip().lower() for x in \
                  self.get(section, 'allowedschemes').split(',')]
@@ -41,6 +41,8 @@ import signal
 import os
 import sys
 import time
+import threading
+from collections import OrderedDict
 
 
 def update_func_meta (fake_func, real_func):
@@ -165,6 +167,46 @@ class memoized (object):
         return self.func.__doc__
 
 
+class lru_memoized (object):
+    """Decorator that caches the return values of a function for the
+    most recently used arguments. The cache is thread-safe and holds
+    at most max_size values. The types of the arguments are part of the
+    cache key, so that equal str and unicode arguments do not share
+    return values. Raised exceptions are not cached."""
+
+    def __init__ (self, max_size):
+        """Store maximum cache size."""
+        self.max_size = max_size
+
+    def __call__ (self, func):
+        """Return function caching the return values of func."""
+        cache = OrderedDict()
+        lock = threading.Lock()
+        max_size = self.max_size
+        def newfunc (*args):
+            """Lookup and return cached result if found. Else call
+            the function with given arguments."""
+            key = args + tuple(type(arg) for arg in args)
+            with lock:
+                try:
+                    value = cache.pop(key)
+                except KeyError:
+                    pass
+                else:
+                    # mark as most recently used
+                    cache[key] = value
+                    return value
+            value = func(*args)
+            with lock:
+                cache[key] = value
+                while len(cache) > max_size:
+                    cache.popitem(last=False)
+            return value
+        newfunc.func = func
+        newfunc.cache = cache
+        return update_func_meta(newfunc, func)
+
+
 class curried (object):
     """Decorator that returns a function that keeps returning functions
     until all arguments are supplied; then the original function is
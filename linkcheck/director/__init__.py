@@ -21,8 +21,8 @@ import os
 import thread
 import time
 from .. import log, LOG_CHECK, LinkCheckerInterrupt, plugins
-from ..cache import urlqueue, robots_txt, results
-from . import aggregator, console
+from ..cache import urlqueue, robots_txt, results, hosts, persistent
+from . import aggregator, console, shards, distributed, checkpoint
 
 
 def check_urls (aggregate):
@@ -30,6 +30,11 @@ def check_urls (aggregate):
     with Ctrl-C.
     @return: None
     """
+    work_queue = None
+    if aggregate.config["workqueue"]:
+        work_queue = distributed.get_work_queue(aggregate.config)
+        if aggregate.config["worker"]:
+            distributed.init_worker(aggregate, work_queue)
     try:
         aggregate.visit_loginurl()
     except Exception as msg:
@@ -42,10 +47,18 @@ def check_urls (aggregate):
         log.error(LOG_CHECK, _("Error starting log output: %(msg)s.") % \
             dict(msg=msg))
         raise
+    if aggregate.journal is not None:
+        # the start URLs added their intern patterns to the config
+        aggregate.journal.set_internlinks(aggregate.config["internlinks"])
     try:
-        if not aggregate.urlqueue.empty():
-            aggregate.start_threads()
-        check_url(aggregate)
+        if work_queue is not None and not aggregate.config["worker"]:
+            distributed.check_urls(aggregate, work_queue)
+        elif aggregate.config["processes"] > 1:
+            shards.check_urls(aggregate)
+        else:
+            if not aggregate.urlqueue.empty():
+                aggregate.start_threads()
+            check_url(aggregate)
         aggregate.finish()
         aggregate.end_log_output()
     except LinkCheckerInterrupt:
@@ -125,11 +138,53 @@ def abort_now ():
         os._exit(3)
 
 
-def get_aggregate (config):
-    """Get an aggregator instance with given configuration."""
-    _urlqueue = urlqueue.UrlQueue(max_allowed_urls=config["maxnumurls"])
+def get_aggregate (config, queue_factory=urlqueue.UrlQueue):
+    """Get an aggregator instance with given configuration.
+    If config["resume"] is set, the state of the checkpoint journal
+    is restored. config["resume"] is reset if there is no journal.
+    @param queue_factory: called with keyword arguments to construct
+      the URL queue
+    """
+    journal = restored = None
+    if config["checkpoint"]:
+        filename = os.path.expanduser(config["checkpoint"])
+        if config["resume"]:
+            if os.path.isfile(filename):
+                restored = checkpoint.read_journal(filename)
+            else:
+                log.warn(LOG_CHECK, _("checkpoint file %(filename)s not"
+                    " found, starting a new check") % dict(filename=filename))
+                config["resume"] = False
+        journal = checkpoint.Journal(filename)
+    host_scheduler = hosts.HostScheduler(config["maxrequestspersecond"])
+    if config["threads"] > 0:
+        # let threads pick URLs of other hosts while one host is busy
+        _urlqueue = queue_factory(max_allowed_urls=config["maxnumurls"],
+            host_scheduler=host_scheduler,
+            max_host_connections=config["maxconnectionsperhost"],
+            journal=journal, max_seen_urls=config["maxcachedurls"])
+    else:
+        # check URLs in the order they are found
+        _urlqueue = queue_factory(max_allowed_urls=config["maxnumurls"],
+            journal=journal, max_seen_urls=config["maxcachedurls"])
     _robots_txt = robots_txt.RobotsTxt(config["useragent"])
     plugin_manager = plugins.PluginManager(config)
-    result_cache = results.ResultCache()
-    return aggregator.Aggregate(config, _urlqueue, _robots_txt, plugin_manager,
-        result_cache)
+    result_cache = results.ResultCache(max_size=config["maxcachedurls"],
+        max_bytes=config["maxcachememory"], use_disk=config["cachetodisk"])
+    # move queued URLs to the front once their result is known
+    result_cache.add_listener(_urlqueue.move_cached)
+    if journal is not None:
+        journal.watch_results(result_cache)
+    if config["persistentcache"]:
+        persistent_cache = persistent.PersistentCache(
+            os.path.expanduser(config["persistentcache"]))
+    else:
+        persistent_cache = None
+    aggregate = aggregator.Aggregate(config, _urlqueue, _robots_txt,
+        plugin_manager, result_cache, host_scheduler,
+        persistent_cache=persistent_cache, journal=journal)
+    if restored is not None:
+        checkpoint.restore(aggregate, restored)
+    if journal is not None:
+        journal.commit()
+    return aggregate
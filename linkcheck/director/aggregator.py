@@ -26,21 +26,23 @@ try:
 except ImportError:
     # Python 3
     from urllib import parse as urlparse
-import random
-from .. import log, LOG_CHECK, strformat, LinkCheckerError
+from .. import log, LOG_CHECK, strformat, linkmatch, LinkCheckerError
 from ..decorators import synchronized
-from ..cache import urlqueue
+from ..cache import urlqueue, connections
 from ..htmlutil import formsearch
 from . import logger, status, checker, interrupt
 
 
 _threads_lock = threading.RLock()
-_hosts_lock = threading.RLock()
 _downloadedbytes_lock = threading.RLock()
 
-def new_request_session(config, cookies):
-    """Create a new request session."""
+def new_request_session(config, cookies, adapter=None):
+    """Create a new request session. If an adapter is given, its
+    connection pools are used for HTTP and HTTPS requests."""
     session = requests.Session()
+    if adapter is not None:
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
     if cookies:
         session.cookies = cookies
     session.max_redirects = config["maxhttpredirects"]
@@ -57,7 +59,8 @@ class Aggregate (object):
     """Store thread-safe data collections for checker threads."""
 
     def __init__ (self, config, urlqueue, robots_txt, plugin_manager,
-                  result_cache):
+                  result_cache, host_scheduler, persistent_cache=None,
+                  journal=None):
         """Store given link checking objects."""
         self.config = config
         self.urlqueue = urlqueue
@@ -67,12 +70,20 @@ class Aggregate (object):
         self.robots_txt = robots_txt
         self.plugin_manager = plugin_manager
         self.result_cache = result_cache
-        self.times = {}
+        self.host_scheduler = host_scheduler
+        self.persistent_cache = persistent_cache
+        self.journal = journal
+        # hosts that do not answer HEAD requests correctly
+        self.nohead_hosts = set()
+        # matchers of the extern and intern link patterns
+        self.extern_matcher = linkmatch.LinkMatcher()
+        self.intern_matcher = linkmatch.LinkMatcher()
         self.cookies = None
-        requests_per_second = config["maxrequestspersecond"]
-        self.wait_time_min = 1.0 / requests_per_second
-        self.wait_time_max = max(self.wait_time_min + 0.5, 0.5)
         self.downloaded_bytes = 0
+        # connection pools shared by the request sessions of all threads
+        self.http_adapter = connections.SharedHTTPAdapter(
+            *connections.get_pool_sizes(config["threads"],
+                                        config["maxconnectionsperhost"]))
 
     def visit_loginurl(self):
         """Check for a login URL and visit it."""
@@ -116,13 +127,14 @@ class Aggregate (object):
                 self.threads.append(t)
                 t.start()
         else:
-            self.request_sessions[thread.get_ident()] = new_request_session(self.config, self.cookies)
+            self.add_request_session()
             checker.check_urls(self.urlqueue, self.logger)
 
     @synchronized(_threads_lock)
     def add_request_session(self):
         """Add a request session for current thread."""
-        session = new_request_session(self.config, self.cookies)
+        session = new_request_session(self.config, self.cookies,
+            self.http_adapter)
         self.request_sessions[thread.get_ident()] = session
 
     @synchronized(_threads_lock)
@@ -130,18 +142,12 @@ class Aggregate (object):
         """Get the request session for current thread."""
         return self.request_sessions[thread.get_ident()]
 
-    @synchronized(_hosts_lock)
     def wait_for_host(self, host):
-        """Throttle requests to one host."""
-        t = time.time()
-        if host in self.times:
-            due_time = self.times[host]
-            if due_time > t:
-                wait = due_time - t
-                time.sleep(wait)
-                t = time.time()
-        wait_time = random.uniform(self.wait_time_min, self.wait_time_max)
-        self.times[host] = t + wait_time
+        """Throttle requests to one host. Only the calling thread waits
+        for the reserved time slot; other threads keep checking."""
+        wait = self.host_scheduler.reserve(host)
+        if wait > 0:
+            time.sleep(wait)
 
     @synchronized(_threads_lock)
     def print_active_threads (self):
@@ -210,8 +216,23 @@ class Aggregate (object):
 
     def end_log_output(self, **kwargs):
         """Print ending output to log."""
+        stats = self.http_adapter.stats
         kwargs.update(dict(
             downloaded_bytes=self.downloaded_bytes,
             num_urls = len(self.result_cache),
+            connections_opened=stats.opened,
+            connections_reused=stats.get_reused(),
         ))
+        if self.config["workqueue"] and not self.config["worker"]:
+            # the workers open the connections of a distributed check
+            kwargs["connections_opened"] = None
+            kwargs["connections_reused"] = None
         self.logger.end_log_output(**kwargs)
+        self.http_adapter.close()
+        self.result_cache.close()
+        if self.persistent_cache is not None:
+            self.persistent_cache.close()
+        if self.journal is not None:
+            # keep the journal of canceled checks for resuming
+            finished = not (kwargs.get("interrupt") or self.urlqueue.shutdown)
+            self.journal.close(remove=finished)
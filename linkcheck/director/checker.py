@@ -22,6 +22,7 @@ import time
 from . import task
 from ..cache import urlqueue
 from .. import parser
+from ..checker.urlbase import PendingUrl
 
 # Interval in which each check thread looks if it's stopped.
 QUEUE_POLL_INTERVALL_SECS = 1.0
@@ -44,7 +45,18 @@ def check_url(url_data, logger):
     else:
         cache = url_data.aggregate.result_cache
         key = url_data.cache_url
-        result = cache.get_result(key)
+        result = None if key is None else cache.get_result(key)
+        if result is None and isinstance(url_data, PendingUrl):
+            # the result is not cached: construct the URL to check it
+            seen_key = url_data.seen_key
+            url_data = url_data.materialize()
+            if url_data.has_result:
+                logger.log_url(url_data.to_wire())
+                return
+            key = url_data.cache_url
+            if seen_key is not None and url_data.is_http():
+                url_data.aggregate.urlqueue.add_seen(seen_key, key)
+            result = cache.get_result(key)
         if result is None:
             # check
             check_start = time.time()
@@ -62,22 +74,30 @@ def check_url(url_data, logger):
                 # XXX this could add new warnings which should be cached.
                 if do_parse:
                     parser.parse_url(url_data)
+                url_data.add_to_persistent_cache()
             finally:
                 # close/release possible open connection
                 url_data.close_connection()
         else:
-            # copy data from cache and adjust it
-            result = copy.copy(result)
-            result.parent_url = url_data.parent_url
-            result.base_ref = url_data.base_ref or u""
-            result.base_url = url_data.base_url or u""
-            result.line = url_data.line
-            result.column = url_data.column
-            result.level = url_data.recursion_level
-            result.name = url_data.name
+            result = get_cached_result(url_data, result)
+            url_data.aggregate.plugin_manager.run_cached_result_plugins(
+                url_data, result)
         logger.log_url(result)
 
 
+def get_cached_result (url_data, result):
+    """Copy data from cached result and adjust it to url_data."""
+    result = copy.copy(result)
+    result.parent_url = url_data.parent_url
+    result.base_ref = url_data.base_ref or u""
+    result.base_url = url_data.base_url or u""
+    result.line = url_data.line
+    result.column = url_data.column
+    result.level = url_data.recursion_level
+    result.name = url_data.name
+    return result
+
+
 class Checker(task.LoggedCheckedTask):
     """URL check thread."""
 
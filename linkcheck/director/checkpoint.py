@@ -0,0 +1,219 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Checkpoint the state of a check in a journal file so that an
+interrupted or crashed check can be resumed.
+
+The journal is a sequence of pickled records:
+ - ("url", number, args, cache_url): URL with get_url_from() args queued
+ - ("done", number): the URL with given number is finished
+ - ("result", key, result): the UrlData.to_wire() result for a cache key
+ - ("seen", seen): mapping {seen key -> cache key} of a resumed check
+ - ("internlinks", patterns): the intern link patterns of the start URLs
+Queued URLs that are not finished, including URLs that were in
+progress, are checked again when resuming.
+
+A new journal is written to a temporary file, which replaces the old
+journal file once the restored state of a resumed check is written.
+"""
+import os
+import time
+import threading
+import cPickle as pickle
+from collections import namedtuple, OrderedDict
+from .. import log, LOG_CHECK
+from ..checker.urlbase import get_seen_key
+from .shards import get_url_args, get_url_from_args
+
+# interval in seconds after which written records are synced to disk
+SYNC_INTERVAL_SECS = 10
+
+# restored state of a check
+# - urls: list of get_url_from() args of unfinished URLs
+# - results: mapping {cache key -> result}
+# - seen: mapping {seen key -> cache key}
+# - internlinks: list of intern link patterns or None
+Checkpoint = namedtuple("Checkpoint", "urls results seen internlinks")
+
+
+class Journal (object):
+    """Thread-safe writer of journal records."""
+
+    def __init__ (self, filename):
+        """Create a new journal in a temporary file. An existing
+        journal file is kept until commit() is called."""
+        self.filename = filename
+        # name of the written file until it replaces the journal file
+        self.tmpname = filename + ".tmp"
+        self.fd = open(self.tmpname, "wb")
+        self.lock = threading.Lock()
+        # mapping {id(url_data) -> number} of queued URLs
+        self.numbers = {}
+        self.num_urls = 0
+        self.last_sync = time.time()
+
+    def add_url (self, url_data):
+        """Record a queued URL."""
+        with self.lock:
+            number = self.num_urls
+            self.num_urls += 1
+            self.numbers[id(url_data)] = number
+            self._write(("url", number, get_url_args(url_data),
+                url_data.cache_url))
+
+    def url_done (self, url_data):
+        """Record a finished URL."""
+        with self.lock:
+            number = self.numbers.pop(id(url_data), None)
+            if number is not None:
+                self._write(("done", number))
+
+    def add_result (self, key, result):
+        """Record a check result."""
+        with self.lock:
+            self._write(("result", key, result))
+
+    def set_seen (self, seen):
+        """Record the seen URLs of a resumed check."""
+        with self.lock:
+            self._write(("seen", seen))
+
+    def set_internlinks (self, internlinks):
+        """Record the intern link patterns."""
+        with self.lock:
+            self._write(("internlinks", internlinks))
+
+    def watch_results (self, result_cache):
+        """Record all results added to the given result cache."""
+        def add_result (key):
+            """Record the cached result for key."""
+            result = result_cache.get_result(key)
+            if result is not None:
+                self.add_result(key, result)
+        result_cache.add_listener(add_result)
+
+    def _write (self, record):
+        """Write record and sync the journal periodically. Records
+        written after closing the journal are ignored.
+        Not thread-safe!"""
+        if self.fd is None:
+            return
+        pickle.dump(record, self.fd, pickle.HIGHEST_PROTOCOL)
+        if time.time() - self.last_sync >= SYNC_INTERVAL_SECS:
+            self._sync()
+
+    def _sync (self):
+        """Write buffered records to disk. Not thread-safe!"""
+        self.fd.flush()
+        os.fsync(self.fd.fileno())
+        self.last_sync = time.time()
+
+    def commit (self):
+        """Sync the written records and replace the journal file with
+        the new journal."""
+        with self.lock:
+            if self.fd is not None and self.tmpname is not None:
+                self._commit()
+
+    def _commit (self):
+        """Replace the journal file with the synced temporary file.
+        The file is reopened since open files cannot be renamed on
+        all platforms. Not thread-safe!"""
+        self._sync()
+        self.fd.close()
+        if os.name == 'nt' and os.path.exists(self.filename):
+            os.remove(self.filename)
+        os.rename(self.tmpname, self.filename)
+        self.tmpname = None
+        self.fd = open(self.filename, "ab")
+
+    def close (self, remove=False):
+        """Sync and close the journal.
+        @param remove: remove the journal file
+        @ptype remove: bool
+        """
+        with self.lock:
+            if self.fd is None:
+                return
+            if self.tmpname is not None:
+                self._commit()
+            self._sync()
+            self.fd.close()
+            self.fd = None
+            if remove:
+                os.remove(self.filename)
+
+
+def read_journal (filename):
+    """Read the state of a check from a journal file. Reading stops
+    at a damaged record, as written by a crash.
+    @return: the restored state
+    @rtype: Checkpoint
+    """
+    # mapping {number -> args} of unfinished URLs in queue order
+    urls = OrderedDict()
+    results = OrderedDict()
+    seen = {}
+    internlinks = None
+    with open(filename, "rb") as fd:
+        while True:
+            try:
+                record = pickle.load(fd)
+            except EOFError:
+                break
+            except (pickle.UnpicklingError, ValueError, TypeError,
+                    AttributeError, IndexError, ImportError) as msg:
+                log.warn(LOG_CHECK, _("ignoring damaged record in checkpoint"
+                    " file %(filename)s: %(msg)s") %
+                    dict(filename=filename, msg=msg))
+                break
+            if record[0] == "url":
+                number, args, cache_url = record[1:]
+                urls[number] = args
+                if cache_url is not None and \
+                   cache_url.startswith((u"http:", u"https:")):
+                    base_url, parent_url, base_ref = args[0], args[2], args[3]
+                    seen_key = get_seen_key(base_url, base_ref or parent_url)
+                    if seen_key is not None:
+                        seen[seen_key] = cache_url
+            elif record[0] == "done":
+                urls.pop(record[1], None)
+            elif record[0] == "result":
+                results[record[1]] = record[2]
+            elif record[0] == "seen":
+                seen.update(record[1])
+            elif record[0] == "internlinks":
+                internlinks = record[1]
+    return Checkpoint(urls.values(), results, seen, internlinks)
+
+
+def restore (aggregate, checkpoint):
+    """Restore the cached results, seen URLs and queued URLs of
+    a checkpoint. The restored state is recorded in the journal of
+    the aggregate, which makes it a compacted copy of the old journal."""
+    for key, result in checkpoint.results.iteritems():
+        aggregate.result_cache.add_result(key, result)
+    urlqueue = aggregate.urlqueue
+    for seen_key, cache_url in checkpoint.seen.iteritems():
+        urlqueue.add_seen(seen_key, cache_url)
+    if aggregate.journal is not None:
+        aggregate.journal.set_seen(checkpoint.seen)
+    for args in checkpoint.urls:
+        urlqueue.put(get_url_from_args(args, aggregate))
+    if checkpoint.internlinks is not None:
+        # replaces the patterns added again by restored start URLs
+        aggregate.config["internlinks"] = checkpoint.internlinks
@@ -0,0 +1,260 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Check URLs with workers on several machines sharing a work queue.
+
+The coordinator adds the start URLs to the work queue and logs the
+results added by the workers. Workers take URLs from the work queue,
+check them with their checker threads, and add found URLs and check
+results to the work queue.
+
+The work queue is either a SQLite database file given as
+"sqlite:FILENAME", or a queue in the coordinator memory served over
+TCP at an address given as "HOST:PORT".
+"""
+import threading
+import time
+import urlparse
+from .. import LinkCheckerError, url as urlutil
+from ..cache import workqueue
+from ..cache.urlqueue import Empty, Timeout
+from ..checker.urlbase import PendingUrl, get_joined_url
+from .checker import get_cached_result
+from .shards import get_url_args, get_url_from_args
+
+# timeout in seconds when waiting for results of the workers
+RESULT_WAIT_SECS = 1
+
+
+def get_task_key (url_data):
+    """Return work queue key for given URL. Links with the same key
+    are checked once, and the coordinator logs the result for each
+    link. The key is the cache URL, or the normed URL joined with its
+    base if the cache URL is not known yet. The anchor is part of the
+    key since the anchors of a page are only known to the worker that
+    checked it.
+    URLs that already have a result, for example because of a syntax
+    error, are keyed by the link position so that each of them is
+    logged by a worker."""
+    if url_data.has_result:
+        return u"\n".join((url_data.base_url or u"",
+            url_data.parent_url or u"", u"%s" % url_data.line,
+            u"%s" % url_data.column, u"%s" % url_data.page))
+    key = url_data.cache_url
+    if key is None:
+        key = get_joined_url(url_data.base_url,
+            url_data.base_ref or url_data.parent_url) or \
+            url_data.base_url or u""
+        try:
+            key = urlutil.url_norm(key)[0]
+        except UnicodeError:
+            pass
+        key = urlparse.urldefrag(key)[0]
+    if url_data.anchor:
+        key += u"#" + url_data.anchor
+    return key
+
+
+def get_link_result (args, result, aggregate):
+    """Return a copy of the result of a finished task, adjusted to the
+    link with given get_url_args() arguments."""
+    (base_url, recursion_level, parent_url, base_ref, line, column, page,
+     name, parent_content_type, extern) = args
+    url_data = PendingUrl(base_url, recursion_level, aggregate,
+        parent_url=parent_url, base_ref=base_ref, line=line, column=column,
+        page=page, name=name, parent_content_type=parent_content_type)
+    return get_cached_result(url_data, result)
+
+
+def get_address (spec):
+    """Parse HOST:PORT work queue address."""
+    host, port = spec.rsplit(":", 1)
+    try:
+        return (host, int(port))
+    except ValueError:
+        raise LinkCheckerError(_("invalid work queue address %r") % spec)
+
+
+def get_work_queue (config):
+    """Get the configured work queue. The coordinator serves a
+    memory queue for TCP addresses, workers connect to it. The
+    coordinator clears a SQLite queue left finished by a previous
+    check."""
+    spec = config["workqueue"]
+    if spec.startswith("sqlite:"):
+        work_queue = workqueue.SqliteWorkQueue(spec[7:])
+        if not config["worker"] and work_queue.is_finished():
+            work_queue.clear()
+        return work_queue
+    authkey = config["workqueuekey"]
+    if not authkey:
+        raise LinkCheckerError(_("workqueuekey must be set for TCP work queues"))
+    address = get_address(spec)
+    if config["worker"]:
+        return workqueue.connect_work_queue(address, authkey)
+    work_queue = workqueue.MemoryWorkQueue()
+    workqueue.serve_work_queue(work_queue, address, authkey)
+    return work_queue
+
+
+class WorkerUrlQueue (object):
+    """URL queue of worker aggregates, storing URLs in a shared work
+    queue. It provides the UrlQueue methods used by the checker threads
+    and the aggregate."""
+
+    def __init__ (self, work_queue, aggregate=None):
+        """Store work queue. The aggregate used to construct URLs
+        must be set before the first get() call."""
+        self.work_queue = work_queue
+        self.aggregate = aggregate
+        self.mutex = threading.Lock()
+        # mapping {id(url_data) -> task key} of URLs in progress
+        self.keys = {}
+        self.finished_tasks = 0
+        self.shutdown = False
+        # flag if the config of the coordinator has been applied
+        self.has_config = False
+
+    def put (self, url_data):
+        """Add URL to the work queue."""
+        if not self.shutdown:
+            key = get_task_key(url_data)
+            self.work_queue.put(key, get_url_args(url_data))
+
+    def get (self, timeout=None):
+        """Take next URL from the work queue."""
+        if self.shutdown:
+            raise Empty()
+        key, args = self.work_queue.get(timeout=timeout)
+        if not self.has_config:
+            # the coordinator shares its config before adding URLs
+            internlinks = self.work_queue.get_info("internlinks")
+            self.aggregate.config["internlinks"] = internlinks
+            self.has_config = True
+        url_data = get_url_from_args(args, self.aggregate)
+        with self.mutex:
+            self.keys[id(url_data)] = key
+        return url_data
+
+    def task_done (self, url_data):
+        """Mark URL as finished in the work queue. The check result is
+        stored with the task for the other links to the URL."""
+        with self.mutex:
+            key = self.keys.pop(id(url_data))
+            self.finished_tasks += 1
+        if url_data.has_result:
+            result = url_data.to_wire()
+        else:
+            result = self.aggregate.result_cache.get_result(
+                url_data.cache_url)
+        self.work_queue.task_done(key, result)
+
+    def empty (self):
+        """Return True if the coordinator has added URLs and all URLs
+        of the work queue are finished."""
+        if self.shutdown:
+            return True
+        return bool(self.work_queue.get_info("started")) and \
+            self.work_queue.is_finished()
+
+    def qsize (self):
+        """Return the number of URLs in progress in this worker."""
+        return len(self.keys)
+
+    def status (self):
+        """Get tuple (finished tasks, in progress, queue size)."""
+        return (self.finished_tasks, len(self.keys), 0)
+
+    def join (self, timeout=None):
+        """Wait until all URLs of the work queue are finished."""
+        if timeout is not None:
+            endtime = time.time() + timeout
+        while not self.empty():
+            if timeout is not None and time.time() >= endtime:
+                raise Timeout()
+            time.sleep(RESULT_WAIT_SECS)
+
+    def do_shutdown (self):
+        """Stop taking URLs from the work queue."""
+        self.shutdown = True
+
+    def get_seen (self, key):
+        """The work queue removes duplicate URLs."""
+        return None
+
+    def add_seen (self, key, cache_url):
+        """The work queue removes duplicate URLs."""
+        pass
+
+    def move_cached (self, key):
+        """The work queue has no URLs waiting for a result."""
+        pass
+
+
+class WorkerLogger (object):
+    """Add log entries of a worker to the work queue."""
+
+    def __init__ (self, work_queue):
+        """Store work queue."""
+        self.work_queue = work_queue
+
+    def start_log_output (self):
+        """Nothing to do; the coordinator starts the log output."""
+        pass
+
+    def end_log_output (self, **kwargs):
+        """Nothing to do; the coordinator ends the log output."""
+        pass
+
+    def log_url (self, url_data):
+        """Add result to the work queue."""
+        self.work_queue.add_result(url_data)
+
+    def log_internal_error (self):
+        """Internal errors are logged by the worker only."""
+        pass
+
+
+def init_worker (aggregate, work_queue):
+    """Make the aggregate check URLs of the work queue."""
+    aggregate.config["threads"] = max(1, aggregate.config["threads"])
+    aggregate.urlqueue = WorkerUrlQueue(work_queue, aggregate=aggregate)
+    aggregate.logger = WorkerLogger(work_queue)
+
+
+def check_urls (aggregate, work_queue):
+    """Add the queued URLs of the aggregate to the work queue and log
+    the results of the workers until all URLs are checked. The result
+    of an URL is logged again for each other link to the URL."""
+    # the start URLs added their intern patterns to the config
+    work_queue.set_info("internlinks", aggregate.config["internlinks"])
+    while not aggregate.urlqueue.empty():
+        url_data = aggregate.urlqueue.get(timeout=0)
+        aggregate.urlqueue.task_done(url_data)
+        work_queue.put(get_task_key(url_data), get_url_args(url_data))
+    # workers stop when the queue is finished after this point
+    work_queue.set_info("started", True)
+    while True:
+        finished = work_queue.is_finished()
+        for result in work_queue.get_results(timeout=RESULT_WAIT_SECS):
+            aggregate.logger.log_url(result)
+            aggregate.result_cache.num_results += 1
+        for args, result in work_queue.get_links():
+            aggregate.logger.log_url(get_link_result(args, result, aggregate))
+            aggregate.result_cache.num_results += 1
+        if finished:
+            break
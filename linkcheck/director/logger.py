@@ -17,12 +17,23 @@
 """Logger for aggregator instances"""
 import threading
 import thread
+try:
+    import Queue
+except ImportError:
+    # Python 3
+    import queue as Queue
 from ..decorators import synchronized
+from . import task, console
 _lock = threading.Lock()
 
+# maximum number of log entries waiting for the writer thread
+LOG_QUEUE_SIZE = 10000
+
 
 class Logger (object):
-    """Thread safe multi-logger class used by aggregator instances."""
+    """Thread safe multi-logger class used by aggregator instances.
+    Log entries are queued and written by a writer thread so that
+    checker threads do not wait for output."""
 
     def __init__ (self, config):
         """Initialize basic logging variables."""
@@ -30,21 +41,45 @@ class Logger (object):
         self.loggers.extend(config['fileoutput'])
         self.verbose = config["verbose"]
         self.warnings = config["warnings"]
+        self.flush_interval = config["flushinterval"]
+        self.queue = Queue.Queue(LOG_QUEUE_SIZE)
+        self.writer = None
 
     def start_log_output (self):
         """
-        Start output of all configured loggers.
+        Start output of all configured loggers and the writer thread.
         """
         for logger in self.loggers:
             logger.start_output()
+        self.writer = LogWriter(self)
+        self.writer.start()
 
     def end_log_output (self, **kwargs):
         """
-        End output of all configured loggers.
+        Write queued log entries and end output of all configured loggers.
         """
+        self.stop_writer()
         for logger in self.loggers:
             logger.end_output(**kwargs)
 
+    def stop_writer (self):
+        """Wait until the writer thread has written all queued log
+        entries."""
+        writer, self.writer = self.writer, None
+        if writer is None:
+            return
+        if writer.is_alive():
+            self.queue.put(None)
+            writer.join()
+        # write entries the writer thread left, eg. when interrupted
+        while True:
+            try:
+                entry = self.queue.get_nowait()
+            except Queue.Empty:
+                break
+            if entry is not None:
+                self.write_synchronized(entry)
+
     def do_print (self, url_data):
         """Determine if URL entry should be logged or not."""
         if self.verbose:
@@ -53,21 +88,58 @@ class Logger (object):
             return True
         return not url_data.valid
 
-    @synchronized(_lock)
     def log_url (self, url_data):
         """Send new url to all configured loggers."""
-        self.check_active_loggers()
-        do_print = self.do_print(url_data)
-        # Only send a transport object to the loggers, not the complete
-        # object instance.
-        for log in self.loggers:
-            log.log_filter_url(url_data, do_print)
+        self.log_entry(("url", url_data, self.do_print(url_data)))
 
-    @synchronized(_lock)
     def log_internal_error (self):
         """Document that an internal error occurred."""
-        for logger in self.loggers:
-            logger.log_internal_error()
+        self.log_entry(("internal_error",))
+
+    def log_entry (self, entry):
+        """Queue log entry for the writer thread, or write it when no
+        writer thread runs."""
+        if self.writer is not None:
+            self.queue.put(entry)
+        else:
+            self.write_synchronized(entry)
+
+    @synchronized(_lock)
+    def write_synchronized (self, entry):
+        """Write log entry without the writer thread."""
+        self.write_entry(entry)
+
+    def write_queued (self):
+        """Write queued log entries until the end marker is queued.
+        Buffered output is flushed when no entries are queued."""
+        timeout = self.flush_interval or None
+        while True:
+            try:
+                entry = self.queue.get(timeout=timeout)
+            except Queue.Empty:
+                for logger in self.loggers:
+                    logger.check_flush()
+                continue
+            if entry is None:
+                break
+            self.write_entry(entry)
+
+    def write_entry (self, entry):
+        """Send log entry to all configured loggers."""
+        try:
+            if entry[0] == "url":
+                self.check_active_loggers()
+                # Only send a transport object to the loggers, not the
+                # complete object instance.
+                for log in self.loggers:
+                    log.log_filter_url(entry[1], entry[2])
+            else:
+                for logger in self.loggers:
+                    logger.log_internal_error()
+        except Exception:
+            console.internal_error()
+            for logger in self.loggers:
+                logger.log_internal_error()
 
     def check_active_loggers(self):
         """Check if all loggers are deactivated due to I/O errors."""
@@ -76,3 +148,25 @@ class Logger (object):
                 break
         else:
             thread.interrupt_main()
+
+
+class LogWriter (task.CheckedTask):
+    """Thread writing the queued log entries of a logger."""
+
+    def __init__ (self, logger):
+        """Store logger.
+        @param logger: the logger with the queued entries
+        @ptype logger: Logger
+        """
+        super(LogWriter, self).__init__()
+        self.logger = logger
+        self.setDaemon(True)
+
+    def run_checked (self):
+        """Write queued log entries."""
+        self.setName("LogWriter")
+        self.logger.write_queued()
+
+    def internal_error (self):
+        """Print internal error on console."""
+        console.internal_error()
@@ -0,0 +1,309 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Check URLs with several worker processes.
+
+Each worker process owns the HTTP hosts whose name hashes to its shard
+number and checks them with its own aggregate and checker threads.
+The coordinating main process routes found URLs to the owning worker
+and logs the check results sent back by the workers.
+
+Messages from the workers to the coordinator:
+ - ("url", shard, args): check URL with get_url_from() args in shard
+ - ("queued",): a worker queued a URL it owns
+ - ("done",): a worker finished or dropped a queued URL
+ - ("result", url_data): log the UrlData.to_wire() result
+ - ("internal_error",): log an internal error
+ - ("stats", num_urls, downloaded_bytes, opened, requests): sent when
+   a worker stops, with the number of opened HTTP connections and
+   sent HTTP requests
+Messages from the coordinator to the workers are get_url_from() args,
+or None to stop the worker.
+
+The maximum number of URLs is shared among the workers. The
+coordinator enforces the maximum run time and logs status messages.
+"""
+import signal
+import time
+import zlib
+import functools
+import multiprocessing
+import Queue
+from .. import log, LOG_CHECK, strformat
+from ..cache.hosts import get_host_key
+from ..cache.urlqueue import UrlQueue
+from ..checker import get_url_from
+from . import console
+
+# timeout in seconds when waiting for messages of the workers
+MESSAGE_WAIT_SECS = 1
+
+
+def get_shard (url_data, num_shards):
+    """Get number of the shard owning given URL, or None if the URL
+    can be checked by any shard."""
+    host = get_host_key(url_data)
+    if host is None:
+        return None
+    return zlib.crc32(host.encode("utf-8", "replace")) % num_shards
+
+
+def get_url_args (url_data):
+    """Get get_url_from() arguments reconstructing the given URL."""
+    if url_data.recursion_level == 0:
+        extern = url_data.extern
+    else:
+        extern = None
+    return (url_data.base_url, url_data.recursion_level,
+        url_data.parent_url, url_data.base_ref, url_data.line,
+        url_data.column, url_data.page, url_data.name,
+        getattr(url_data, "parent_content_type", None), extern)
+
+
+def get_url_from_args (args, aggregate):
+    """Reconstruct URL from get_url_args() arguments."""
+    (base_url, recursion_level, parent_url, base_ref, line, column, page,
+     name, parent_content_type, extern) = args
+    return get_url_from(base_url, recursion_level, aggregate,
+        parent_url=parent_url, base_ref=base_ref, line=line, column=column,
+        page=page, name=name, parent_content_type=parent_content_type,
+        extern=extern)
+
+
+class ShardUrlQueue (UrlQueue):
+    """URL queue of a worker process. URLs owned by other shards are
+    sent to the coordinator, and the coordinator is informed about
+    all queued and finished URLs."""
+
+    def __init__ (self, shard, num_shards, outbox, **kwargs):
+        """Store shard number and coordinator message queue."""
+        super(ShardUrlQueue, self).__init__(**kwargs)
+        self.shard = shard
+        self.num_shards = num_shards
+        self.outbox = outbox
+
+    def put (self, item):
+        """Queue URL if owned by this shard, else send it to the
+        coordinator."""
+        shard = get_shard(item, self.num_shards)
+        if shard is None or shard == self.shard:
+            self.outbox.put(("queued",))
+            self.put_local(item)
+        else:
+            self.outbox.put(("url", shard, get_url_args(item)))
+
+    def put_local (self, item):
+        """Queue URL in this shard."""
+        super(ShardUrlQueue, self).put(item)
+
+    def _put (self, url_data):
+        """Put URL in queue and report URLs that are not queued
+        as finished."""
+        queued = super(ShardUrlQueue, self)._put(url_data)
+        if not queued:
+            self.outbox.put(("done",))
+        return queued
+
+    def task_done (self, url_data):
+        """Report finished URL to the coordinator."""
+        super(ShardUrlQueue, self).task_done(url_data)
+        self.outbox.put(("done",))
+
+
+class ShardLogger (object):
+    """Send log entries of a worker process to the coordinator."""
+
+    def __init__ (self, outbox):
+        """Store coordinator message queue."""
+        self.outbox = outbox
+
+    def start_log_output (self):
+        """Nothing to do; the coordinator starts the log output."""
+        pass
+
+    def end_log_output (self, **kwargs):
+        """Nothing to do; the coordinator ends the log output."""
+        pass
+
+    def log_url (self, url_data):
+        """Send result to the coordinator."""
+        self.outbox.put(("result", url_data))
+
+    def log_internal_error (self):
+        """Send internal error to the coordinator."""
+        self.outbox.put(("internal_error",))
+
+
+def get_max_urls (max_urls, shard, num_shards):
+    """Return the share of the maximum number of URLs checked by the
+    given shard, or None if the number of URLs is not limited."""
+    if max_urls is None:
+        return None
+    share, remainder = divmod(max_urls, num_shards)
+    if shard < remainder:
+        share += 1
+    return share
+
+
+class ShardMonitor (object):
+    """Enforce the maximum run time and log status messages while the
+    coordinator waits for messages of the workers."""
+
+    def __init__ (self, aggregate, num_shards):
+        """Store aggregate and start time."""
+        self.aggregate = aggregate
+        self.max_active = num_shards * aggregate.config["threads"]
+        self.start_time = time.time()
+        # the first status should be after a second
+        self.status_time = self.start_time + 1
+        self.num_done = 0
+        self.num_results = 0
+
+    def check (self, pending):
+        """Raise KeyboardInterrupt if the maximum run time is exceeded,
+        and log a status message if it is due."""
+        config = self.aggregate.config
+        now = time.time()
+        duration = now - self.start_time
+        if config["maxrunseconds"] and duration > config["maxrunseconds"]:
+            log.warn(LOG_CHECK, "Interrupt after %s" %
+                strformat.strduration_long(duration))
+            raise KeyboardInterrupt()
+        if config["status"] and now >= self.status_time:
+            self.status_time = now + config["status_wait_seconds"]
+            # workers report no progress of single URLs
+            in_progress = min(pending, self.max_active)
+            config.status_logger.log_status(self.num_done, in_progress,
+                pending - in_progress, duration, self.num_results)
+
+
+def get_message (outbox, monitor, pending):
+    """Wait for the next message of the workers, checking the run
+    limits of the monitor meanwhile.
+    @return: the message, or None if there was none within
+      MESSAGE_WAIT_SECS seconds
+    """
+    try:
+        msg = outbox.get(timeout=MESSAGE_WAIT_SECS)
+    except Queue.Empty:
+        msg = None
+    monitor.check(pending)
+    return msg
+
+
+def run_worker (config, cookies, shard, num_shards, inbox, outbox):
+    """Check URLs received from the coordinator until None is received."""
+    from . import get_aggregate
+    # the coordinator handles interrupts and stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    config["status"] = False
+    config["maxrunseconds"] = None
+    config["maxnumurls"] = get_max_urls(config["maxnumurls"], shard,
+        num_shards)
+    config["threads"] = max(1, config["threads"])
+    if config["persistentcache"]:
+        # several processes cannot share one database file
+        config["persistentcache"] = "%s.%d" % (config["persistentcache"],
+            shard)
+    queue_factory = functools.partial(ShardUrlQueue, shard, num_shards,
+        outbox)
+    aggregate = get_aggregate(config, queue_factory=queue_factory)
+    aggregate.cookies = cookies
+    aggregate.logger = ShardLogger(outbox)
+    aggregate.start_threads()
+    while True:
+        args = inbox.get()
+        if args is None:
+            break
+        try:
+            aggregate.urlqueue.put_local(get_url_from_args(args, aggregate))
+        except Exception:
+            console.internal_error()
+            aggregate.logger.log_internal_error()
+            outbox.put(("done",))
+    aggregate.finish()
+    stats = aggregate.http_adapter.stats
+    outbox.put(("stats", len(aggregate.result_cache),
+        aggregate.downloaded_bytes, stats.opened, stats.requests))
+    aggregate.end_log_output()
+
+
+def check_urls (aggregate):
+    """Check the queued URLs of the aggregate with the configured
+    number of worker processes and log the results."""
+    num_shards = aggregate.config["processes"]
+    if aggregate.config["maxnumurls"] is not None:
+        # each worker checks at least one URL of the shared maximum
+        num_shards = max(1, min(num_shards, aggregate.config["maxnumurls"]))
+    inboxes = [multiprocessing.Queue() for dummy in range(num_shards)]
+    outbox = multiprocessing.Queue()
+    urls = []
+    while not aggregate.urlqueue.empty():
+        url_data = aggregate.urlqueue.get(timeout=0)
+        aggregate.urlqueue.task_done(url_data)
+        urls.append(url_data)
+    workers = []
+    for shard in range(num_shards):
+        args = (aggregate.config, aggregate.cookies, shard, num_shards,
+                inboxes[shard], outbox)
+        workers.append(multiprocessing.Process(target=run_worker, args=args))
+    monitor = ShardMonitor(aggregate, num_shards)
+    for worker in workers:
+        worker.start()
+    try:
+        # number of URLs routed or queued, but not finished
+        pending = 0
+        for url_data in urls:
+            shard = get_shard(url_data, num_shards) or 0
+            inboxes[shard].put(get_url_args(url_data))
+            pending += 1
+        while pending:
+            msg = get_message(outbox, monitor, pending)
+            if msg is None:
+                continue
+            if msg[0] == "url":
+                inboxes[msg[1]].put(msg[2])
+                pending += 1
+            elif msg[0] == "queued":
+                pending += 1
+            elif msg[0] == "done":
+                pending -= 1
+                monitor.num_done += 1
+            elif msg[0] == "result":
+                aggregate.logger.log_url(msg[1])
+                monitor.num_results += 1
+            elif msg[0] == "internal_error":
+                aggregate.logger.log_internal_error()
+        for inbox in inboxes:
+            inbox.put(None)
+        num_stopped = 0
+        while num_stopped < num_shards:
+            msg = get_message(outbox, monitor, 0)
+            if msg is None:
+                continue
+            if msg[0] == "stats":
+                num_stopped += 1
+                aggregate.result_cache.num_results += msg[1]
+                aggregate.add_downloaded_bytes(msg[2])
+                aggregate.http_adapter.stats.add(opened=msg[3],
+                    requests=msg[4])
+        for worker in workers:
+            worker.join()
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
@@ -141,6 +141,41 @@ class TagFinder (object):
         self.start_element(tag, attrs)
 
 
+class CompositeFinder (TagFinder):
+    """Dispatch the elements of one HTML parse to several finders.
+    A finder raising StopParse gets no further elements, and parsing
+    stops when all finders are finished."""
+
+    def __init__ (self, finders):
+        """Store finders."""
+        self.finders = list(finders)
+        super(CompositeFinder, self).__init__()
+
+    def get_parser (self):
+        """Return parser object."""
+        return self._parser
+
+    def set_parser (self, parser):
+        """Set parser object of this and all finders."""
+        self._parser = parser
+        for finder in self.finders:
+            finder.parser = parser
+
+    parser = property(get_parser, set_parser)
+
+    def start_element (self, tag, attrs):
+        """Pass start element to all unfinished finders."""
+        for finder in self.finders[:]:
+            try:
+                finder.start_element(tag, attrs)
+            except StopParse as msg:
+                log.debug(LOG_CHECK, "Stopped finder %s: %s",
+                    finder.__class__.__name__, msg)
+                self.finders.remove(finder)
+        if not self.finders:
+            raise StopParse("all finders stopped")
+
+
 class MetaRobotsFinder (TagFinder):
     """Class for finding robots.txt meta values in HTML."""
 
@@ -183,12 +218,43 @@ def is_form_get(attr, attrs):
     return res
 
 
+class PendingName (object):
+    """Name of a link that continues after the parsed data."""
+
+    def __init__ (self, data, title, encoding):
+        """Store the data following the link tag."""
+        self.data = data
+        self.title = title
+        self.encoding = encoding
+
+    def add_data (self, data):
+        """Add the next fed data up to MAX_NAMELEN bytes.
+        @return: True if the name is complete
+        @rtype: bool
+        """
+        self.data += data[:MAX_NAMELEN - len(self.data)]
+        return len(self.data) >= MAX_NAMELEN or \
+            linkname.a_end_search(self.data) is not None
+
+    def get_name (self):
+        """Return the link name found in the data."""
+        data = self.data.decode(self.encoding, "ignore")
+        name = linkname.href_name(data)
+        if not name:
+            name = self.title
+        return name
+
+
 class LinkFinder (TagFinder):
     """Find HTML links, and apply them to the callback function with the
     format (url, lineno, column, name, codebase)."""
 
-    def __init__ (self, callback, tags):
-        """Store content in buffer and initialize URL list."""
+    def __init__ (self, callback, tags, lookahead=False):
+        """Store content in buffer and initialize URL list.
+        @param lookahead: complete link names at the end of the parsed
+          data with the data passed to add_data()
+        @ptype lookahead: bool
+        """
         super(LinkFinder, self).__init__()
         self.callback = callback
         # set universal tag attributes using tagname None
@@ -199,11 +265,18 @@ class LinkFinder (TagFinder):
             # add universal tag attributes
             self.tags[tag].update(self.universal_attrs)
         self.base_ref = u''
+        self.lookahead = lookahead
+        # found links waiting for a pending name as
+        # [url, line, column, name, base] lists
+        self.waiting = []
+        # debug logging is checked once since this is called for each tag
+        self.debug = log.is_debug(LOG_CHECK)
 
     def start_element (self, tag, attrs):
         """Search for links and store found URLs in a list."""
-        log.debug(LOG_CHECK, "LinkFinder tag %s attrs %s", tag, attrs)
-        log.debug(LOG_CHECK, "line %d col %d old line %d old col %d", self.parser.lineno(), self.parser.column(), self.parser.last_lineno(), self.parser.last_column())
+        if self.debug:
+            log.debug(LOG_CHECK, "LinkFinder tag %s attrs %s", tag, attrs)
+            log.debug(LOG_CHECK, "line %d col %d old line %d old col %d", self.parser.lineno(), self.parser.column(), self.parser.last_lineno(), self.parser.last_column())
         if tag == "base" and not self.base_ref:
             self.base_ref = attrs.get_true("href", u'')
         tagattrs = self.tags.get(tag, self.universal_attrs)
@@ -229,17 +302,21 @@ class LinkFinder (TagFinder):
                 value = 'dns:' + value.rstrip('/')
             # parse tag for URLs
             self.parse_tag(tag, attr, value, name, base)
-        log.debug(LOG_CHECK, "LinkFinder finished tag %s", tag)
+        if self.debug:
+            log.debug(LOG_CHECK, "LinkFinder finished tag %s", tag)
 
     def get_link_name (self, tag, attrs, attr):
         """Parse attrs for link name. Return name of link."""
         if tag == 'a' and attr == 'href':
             # Look for name only up to MAX_NAMELEN characters
             data = self.parser.peek(MAX_NAMELEN)
-            data = data.decode(self.parser.encoding, "ignore")
-            name = linkname.href_name(data)
-            if not name:
-                name = attrs.get_true('title', u'')
+            name = PendingName(data, attrs.get_true('title', u''),
+                self.parser.encoding)
+            if self.lookahead and len(data) < MAX_NAMELEN and \
+               linkname.a_end_search(data) is None:
+                # the name continues in the next fed data
+                return name
+            name = name.get_name()
         elif tag == 'img':
             name = attrs.get_true('alt', u'')
             if not name:
@@ -252,7 +329,7 @@ class LinkFinder (TagFinder):
         """Add given url data to url list."""
         assert isinstance(tag, unicode), repr(tag)
         assert isinstance(attr, unicode), repr(attr)
-        assert isinstance(name, unicode), repr(name)
+        assert isinstance(name, (unicode, PendingName)), repr(name)
         assert isinstance(base, unicode), repr(base)
         assert isinstance(value, unicode) or value is None, repr(value)
         # look for meta refresh
@@ -279,5 +356,32 @@ class LinkFinder (TagFinder):
     def found_url(self, url, name, base):
         """Add newly found URL to queue."""
         assert isinstance(url, unicode) or url is None, repr(url)
-        self.callback(url, line=self.parser.last_lineno(),
-                      column=self.parser.last_column(), name=name, base=base)
+        line = self.parser.last_lineno()
+        column = self.parser.last_column()
+        if self.waiting or isinstance(name, PendingName):
+            # keep the order of the found links
+            self.waiting.append([url, line, column, name, base])
+        else:
+            self.callback(url, line=line, column=column, name=name, base=base)
+
+    def add_data (self, data):
+        """Complete pending link names with the data fed to the parser
+        after the data of the link tags."""
+        for link in self.waiting:
+            if isinstance(link[3], PendingName) and link[3].add_data(data):
+                link[3] = link[3].get_name()
+        self.flush_links(final=False)
+
+    def flush_links (self, final=True):
+        """Call the callback for waiting links with complete names.
+        @param final: complete pending names with the available data
+        @ptype final: bool
+        """
+        while self.waiting:
+            url, line, column, name, base = self.waiting[0]
+            if isinstance(name, PendingName):
+                if not final:
+                    break
+                name = name.get_name()
+            del self.waiting[0]
+            self.callback(url, line=line, column=column, name=name, base=base)
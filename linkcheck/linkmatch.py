@@ -0,0 +1,232 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Match URLs against lists of intern or extern link patterns.
+
+A list of link patterns (see get_link_pat()) is searched in order and
+the first matching entry decides. Consecutive patterns with the same
+outcome are combined into one regular expression so that a URL is not
+searched once for every pattern. Patterns that only look at the scheme
+and host of a URL have their results cached per host.
+"""
+import re
+import sre_parse
+import sre_constants
+from .lock import get_lock
+
+# maximum number of groups of a combined pattern, Python 2 supports
+# at most 100 groups in a regular expression
+MAX_GROUPS = 99
+# maximum number of patterns in a combined pattern, which limits the
+# work to recompile a group when patterns are added
+MAX_PATTERNS = 100
+# maximum number of cached results per host-only pattern group
+MAX_HOST_CACHE = 10000
+
+# patterns with group references or inline flags change their meaning
+# when they are combined with other patterns
+_uncombinable_re = re.compile(r"\\[1-9]|\(\?P=|\(\?\(|\(\?[iLmsux]")
+# patterns anchored at the start of the URL that match only scheme and
+# host characters, for example the intern patterns of start URLs
+# "^https?://(www\.|)example\.com/"
+_host_only_re = re.compile(r"""^\^[a-z]+(?:s\?)?(?::|\\:)(?:/|\\/){2}"""
+    r"""(?:[a-zA-Z0-9_:@-]|\\[.:@-]|\(www\\\.\|\))+(?:/|\\/)?$""")
+
+
+def is_host_only (regex):
+    """Check if given compiled pattern matches only the scheme and host
+    part of URLs, including an optional slash after the host.
+    @rtype: bool
+    """
+    return not (regex.flags & (re.MULTILINE | re.VERBOSE)) and \
+        _host_only_re.match(regex.pattern) is not None
+
+
+def is_anchored (regex):
+    """Check if given compiled pattern matches only at the start of
+    strings.
+    @rtype: bool
+    """
+    if regex.flags & re.MULTILINE:
+        return False
+    try:
+        parsed = sre_parse.parse(regex.pattern, regex.flags)
+    except (re.error, AssertionError, OverflowError):
+        return False
+    return len(parsed) > 0 and \
+        parsed[0] == (sre_constants.AT, sre_constants.AT_BEGINNING)
+
+
+def get_host_key (url):
+    """Get the URL part that host-only patterns can match, which is the
+    URL up to the end of the host and an optional following slash.
+    @rtype: string
+    """
+    i = url.find(u"://")
+    if i == -1:
+        return url
+    i += 3
+    n = len(url)
+    while i < n and url[i] not in u"/?#":
+        i += 1
+    if url[i:i+1] == u"/":
+        i += 1
+    return url[:i]
+
+
+class PatternGroup (object):
+    """Consecutive link patterns that are searched with one regular
+    expression. Groups with a negated pattern have only this pattern."""
+
+    def __init__ (self, entries):
+        """Initialize group with given link pattern entries which must
+        be combinable."""
+        entry = entries[0]
+        self.entries = entries
+        self.negate = entry['negate']
+        self.strict = entry['strict']
+        self.flags = entry['pattern'].flags
+        self.host_only = is_host_only(entry['pattern'])
+        self.groups = sum(e['pattern'].groups for e in entries)
+        if len(entries) == 1:
+            self.regex = entry['pattern']
+        else:
+            pattern = u"|".join(u"(?:%s)" % e['pattern'].pattern
+                                for e in entries)
+            if all(is_anchored(e['pattern']) for e in entries):
+                # let the regex engine stop searching after the start
+                pattern = u"^(?:%s)" % pattern
+            self.regex = re.compile(pattern, self.flags)
+        # mapping {host key -> match result}
+        self.cache = {}
+
+    def matches (self, url):
+        """Check if the group decides about given URL, ie. one of its
+        patterns matches, or the negated pattern does not match.
+        @rtype: bool
+        """
+        if self.host_only:
+            key = get_host_key(url)
+            cache = self.cache
+            try:
+                return cache[key]
+            except KeyError:
+                pass
+            result = self._matches(key)
+            if len(cache) >= MAX_HOST_CACHE:
+                cache = self.cache = {}
+            cache[key] = result
+            return result
+        return self._matches(url)
+
+    def _matches (self, url):
+        """Search URL with the group pattern."""
+        match = self.regex.search(url) is not None
+        return match != self.negate
+
+
+def combinable (entries, entry):
+    """Check if a link pattern entry can be combined with given
+    entries to one pattern group.
+    @rtype: bool
+    """
+    first = entries[0]
+    regex = entry['pattern']
+    if first['negate'] or entry['negate'] or \
+       len(entries) >= MAX_PATTERNS or \
+       entry['strict'] != first['strict'] or \
+       regex.flags != first['pattern'].flags or \
+       is_host_only(regex) != is_host_only(first['pattern']) or \
+       _uncombinable_re.search(regex.pattern) or \
+       _uncombinable_re.search(first['pattern'].pattern):
+        return False
+    groups = sum(e['pattern'].groups for e in entries)
+    return groups + regex.groups <= MAX_GROUPS
+
+
+def get_groups (entries):
+    """Get pattern groups of given link pattern entries."""
+    try:
+        return [PatternGroup(entries)]
+    except (re.error, AssertionError, OverflowError, UnicodeError):
+        # the patterns cannot be combined, for example because
+        # of duplicate group names
+        return [PatternGroup([entry]) for entry in entries]
+
+
+class LinkMatcher (object):
+    """Search URLs in a list of link patterns. The list can be replaced
+    or grow at any time; new patterns are compiled when searching.
+    Patterns must not be removed from or changed in a list."""
+
+    def __init__ (self):
+        """Initialize empty pattern groups."""
+        self.lock = get_lock("link_matcher")
+        # the searched pattern list and the number of its grouped patterns
+        self.patterns = None
+        self.num_patterns = 0
+        self.groups = []
+
+    def search (self, url, patterns):
+        """Search URL in given list of link patterns.
+        @param url: the URL
+        @ptype url: unicode
+        @param patterns: list of link pattern entries from get_link_pat()
+        @ptype patterns: list of dict
+        @return: strict flag of the first matching entry, or None if
+           no entry matches
+        @rtype: bool or None
+        """
+        if patterns is not self.patterns or \
+           len(patterns) != self.num_patterns:
+            self.update(patterns)
+        for group in self.groups:
+            if group.matches(url):
+                return group.strict
+        return None
+
+    def update (self, patterns):
+        """Group new patterns of the list. A different list or a list
+        with fewer patterns is grouped from scratch. New patterns that
+        can be combined with the last group replace this group."""
+        with self.lock:
+            if patterns is self.patterns and \
+               len(patterns) >= self.num_patterns:
+                groups = list(self.groups)
+                num = self.num_patterns
+            else:
+                groups = []
+                num = 0
+            # the list can grow while it is being grouped
+            entries = patterns[num:]
+            if not entries and patterns is self.patterns:
+                return
+            # lists of combinable entries
+            todo = []
+            if groups and entries and \
+               combinable(groups[-1].entries, entries[0]):
+                todo.append(list(groups.pop().entries))
+            for entry in entries:
+                if todo and combinable(todo[-1], entry):
+                    todo[-1].append(entry)
+                else:
+                    todo.append([entry])
+            for group_entries in todo:
+                groups.extend(get_groups(group_entries))
+            self.groups = groups
+            self.num_patterns = num + len(entries)
+            self.patterns = patterns
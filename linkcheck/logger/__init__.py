@@ -91,6 +91,9 @@ class LogStatistics (object):
         self.avg_number = 0
         # overall downloaded bytes
         self.downloaded_bytes = None
+        # number of opened and reused HTTP connections
+        self.connections_opened = None
+        self.connections_reused = None
 
     def log_url (self, url_data, do_print):
         """Log URL statistics."""
@@ -147,6 +150,9 @@ class _Logger (object):
         Log a checked URL. The url_data object is a transport form of
         the UrlData class. The do_print flag indicates if this URL
         should be logged or just used to update internal statistics.
+    * check_flush()
+        Flush buffered output when the flush interval passed or the
+        flush size was written since the last flush.
 
     Each subclassed logger must implement the following functions:
 
@@ -192,6 +198,12 @@ class _Logger (object):
         self.codec_errors = "replace"
         # Flag to see if logger is active. Can be deactivated on errors.
         self.is_active = True
+        # flush file output when this many seconds passed or characters
+        # were written since the last flush
+        self.flush_interval = int(args.get("flushinterval", 1))
+        self.flush_size = int(args.get("flushsize", 0x10000))
+        self.flush_time = time.time()
+        self.unflushed = 0
 
     def get_args(self, kwargs):
         """Construct log configuration from default and user args."""
@@ -318,6 +330,9 @@ class _Logger (object):
                 self.close_fileoutput()
                 self.fd = dummy.Dummy()
                 self.is_active = False
+            else:
+                self.unflushed += len(s)
+                self.check_flush()
 
     def writeln (self, s=u"", **args):
         """
@@ -426,12 +441,23 @@ class _Logger (object):
         Ignore flush I/O errors since we are not responsible for proper
         flushing of log output streams.
         """
+        self.flush_time = time.time()
+        self.unflushed = 0
         if hasattr(self, "fd"):
             try:
                 self.fd.flush()
             except (IOError, AttributeError):
                 pass
 
+    def check_flush (self):
+        """
+        Flush buffered output if the flush interval passed or the flush
+        size was written since the last flush.
+        """
+        if self.unflushed and (self.unflushed >= self.flush_size or
+           time.time() - self.flush_time >= self.flush_interval):
+            self.flush()
+
     def log_internal_error (self):
         """Indicate that an internal error occurred in the program."""
         log.warn(LOG_CHECK, "internal error occurred")
@@ -0,0 +1,305 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+A logger writing check results in a compact binary format, and
+functions reading the results back.
+
+The file starts with the magic string "LCBIN" and a format version
+byte. Each result is a record with a 32 bit length of the following
+record data. The data starts with the fixed size numeric columns
+(see NumericColumns) and the number of warnings and infos. The strings
+follow, which are the string columns (see StringColumns), the tags and
+messages of the warnings and the infos. First the 32 bit lengths of all
+strings are stored, where a length of 0xffffffff denotes None, then the
+UTF-8 encoded strings. All numbers are little endian.
+
+The numeric columns can be read without decoding the strings, which
+makes aggregating the results of large checks fast:
+
+    columns = read_columns("linkchecker-out.bin", ["valid", "dltime"])
+    errors = columns["valid"].count(0)
+    dltime = sum(x for x in columns["dltime"] if x > 0)
+"""
+import sys
+import struct
+import datetime
+from array import array
+from . import _Logger
+
+MAGIC = b"LCBIN"
+VERSION = 1
+Header = struct.Struct("<5sB")
+Length = struct.Struct("<I")
+# the fixed size part of each record, the numeric columns followed
+# by the number of warnings and infos
+Numbers = struct.Struct("<BBiiiiqdddII")
+NONE_LENGTH = 0xffffffff
+
+# numeric columns with their array type codes
+NumericColumns = (
+    ("valid", "b"),
+    ("extern", "b"),
+    ("level", "l"),
+    ("line", "l"),
+    ("column", "l"),
+    ("page", "l"),
+    ("size", "l"),
+    ("checktime", "d"),
+    ("dltime", "d"),
+    ("modified", "d"),
+)
+NumericColumnNames = [name for name, typecode in NumericColumns]
+
+StringColumns = (
+    "url",
+    "parent_url",
+    "base_ref",
+    "base_url",
+    "name",
+    "title",
+    "result",
+    "content_type",
+    "domain",
+    "cache_url",
+)
+
+EPOCH = datetime.datetime(1970, 1, 1)
+# stored modification date of results without one
+NO_DATE = float("nan")
+# size of the blocks read from result files
+READ_SIZE = 0x100000
+
+
+def intify (value):
+    """Store missing numbers as -1."""
+    return -1 if value is None else int(value)
+
+
+def pack_modified (modified):
+    """Get seconds since the epoch of a UTC modification date.
+    @rtype: float
+    """
+    if modified is None:
+        return NO_DATE
+    delta = modified - EPOCH
+    return delta.days * 86400.0 + delta.seconds + \
+        delta.microseconds / 1000000.0
+
+
+def unpack_modified (value):
+    """Get UTC modification date from seconds since the epoch.
+    @rtype: datetime or None
+    """
+    if value != value:
+        # NaN
+        return None
+    return EPOCH + datetime.timedelta(seconds=value)
+
+
+def get_lengths_format (count):
+    """Get struct format of given number of string lengths."""
+    return "<%dI" % count
+
+
+def pack_result (url_data):
+    """Get record data of a checked URL.
+    @rtype: bytes
+    """
+    strings = [getattr(url_data, name) for name in StringColumns]
+    for tag, message in url_data.warnings:
+        strings.append(tag)
+        strings.append(message)
+    strings.extend(url_data.info)
+    strings = [None if x is None else x.encode("utf-8") for x in strings]
+    lengths = [NONE_LENGTH if x is None else len(x) for x in strings]
+    return b"".join((Numbers.pack(
+        1 if url_data.valid else 0,
+        1 if url_data.extern else 0,
+        intify(url_data.level),
+        intify(url_data.line),
+        intify(url_data.column),
+        intify(url_data.page),
+        intify(url_data.size),
+        float(url_data.checktime),
+        float(url_data.dltime),
+        pack_modified(url_data.modified),
+        len(url_data.warnings),
+        len(url_data.info),
+    ), struct.pack(get_lengths_format(len(lengths)), *lengths),
+    b"".join(x for x in strings if x)))
+
+
+class Result (object):
+    """A check result read from a binary result file. It has the same
+    attributes as the results given to loggers, so it can be logged
+    with other loggers."""
+    __slots__ = NumericColumnNames + list(StringColumns) + \
+        ["warnings", "info"]
+
+
+def unpack_result (data):
+    """Decode record data of a checked URL.
+    @rtype: Result
+    """
+    result = Result()
+    values = Numbers.unpack_from(data)
+    for name, value in zip(NumericColumnNames, values):
+        setattr(result, name, value)
+    result.valid = bool(result.valid)
+    result.extern = bool(result.extern)
+    result.modified = unpack_modified(result.modified)
+    num_warnings, num_info = values[-2:]
+    count = len(StringColumns) + 2 * num_warnings + num_info
+    lengths = struct.unpack_from(get_lengths_format(count), data,
+        Numbers.size)
+    offset = Numbers.size + Length.size * count
+    strings = []
+    for length in lengths:
+        if length == NONE_LENGTH:
+            strings.append(None)
+        else:
+            strings.append(unicode(data[offset:offset+length], "utf-8"))
+            offset += length
+    for name, value in zip(StringColumns, strings):
+        setattr(result, name, value)
+    strings = strings[len(StringColumns):]
+    result.warnings = zip(strings[:2*num_warnings:2],
+                          strings[1:2*num_warnings:2])
+    result.info = strings[2*num_warnings:]
+    return result
+
+
+def iter_records (fd):
+    """Read the records of a binary result file.
+    @param fd: binary result file opened for reading
+    @ptype fd: file
+    @return: buffer with record data, offset and length of each record
+    @rtype: iterator of tuple (bytes, int, int)
+    @raises: ValueError if the file is no result file or is truncated
+    """
+    data = fd.read(Header.size)
+    if len(data) < Header.size:
+        raise ValueError("missing result file header")
+    magic, version = Header.unpack(data)
+    if magic != MAGIC:
+        raise ValueError("invalid result file header %r" % magic)
+    if version != VERSION:
+        raise ValueError("unsupported result file version %d" % version)
+    data = b""
+    offset = 0
+    while True:
+        if len(data) - offset < Length.size:
+            data = data[offset:] + fd.read(READ_SIZE)
+            offset = 0
+            if not data:
+                break
+            if len(data) < Length.size:
+                raise ValueError("truncated result file")
+        length = Length.unpack_from(data, offset)[0]
+        offset += Length.size
+        if len(data) - offset < length:
+            data = data[offset:] + fd.read(max(READ_SIZE, length))
+            offset = 0
+            if len(data) < length:
+                raise ValueError("truncated result file")
+        yield data, offset, length
+        offset += length
+
+
+def iter_results (filename):
+    """Read the results of a binary result file.
+    @param filename: name of the result file
+    @ptype filename: string
+    @rtype: iterator of Result
+    @raises: ValueError if the file is no result file or is truncated
+    """
+    with open(filename, "rb") as fd:
+        for data, offset, length in iter_records(fd):
+            yield unpack_result(data[offset:offset+length])
+
+
+def read_columns (filename, columns=None):
+    """Read numeric columns of a binary result file without decoding
+    the string data of the results.
+    @param filename: name of the result file
+    @ptype filename: string
+    @param columns: names of the read columns, default are all
+       numeric columns (see NumericColumns)
+    @ptype columns: list of string or None
+    @return: mapping {column name -> array of column values}. Missing
+       modification dates are NaN, the other missing numbers are -1.
+    @rtype: dict
+    @raises: ValueError if the file is no result file or is truncated,
+       or a column name is unknown
+    """
+    if columns is None:
+        columns = NumericColumnNames
+    indexes = []
+    arrays = {}
+    for name in columns:
+        if name not in NumericColumnNames:
+            raise ValueError("Invalid numeric column %r" % name)
+        index = NumericColumnNames.index(name)
+        arrays[name] = array(NumericColumns[index][1])
+        indexes.append((index, arrays[name].append))
+    unpack_from = Numbers.unpack_from
+    with open(filename, "rb") as fd:
+        for data, offset, length in iter_records(fd):
+            values = unpack_from(data, offset)
+            for index, append in indexes:
+                append(values[index])
+    return arrays
+
+
+class BinaryLogger (_Logger):
+    """
+    Write check results in a compact binary format which can be read
+    with iter_results() and read_columns().
+    """
+
+    LoggerName = 'binary'
+
+    LoggerArgs = {
+        "filename": "linkchecker-out.bin",
+    }
+
+    def __init__ (self, **kwargs):
+        """Initialize file output."""
+        args = self.get_args(kwargs)
+        super(BinaryLogger, self).__init__(**args)
+        self.init_fileoutput(args)
+
+    def create_fd (self):
+        """Create binary file descriptor."""
+        if self.filename is None:
+            return sys.stdout
+        return open(self.filename, "wb")
+
+    def start_output (self):
+        """Write the file header."""
+        super(BinaryLogger, self).start_output()
+        self.write(Header.pack(MAGIC, VERSION))
+        self.flush()
+
+    def log_url (self, url_data):
+        """Write one record with the url check info."""
+        data = pack_result(url_data)
+        self.write(Length.pack(len(data)) + data)
+
+    def end_output (self, **kwargs):
+        """Close the file output."""
+        self.close_fileoutput()
@@ -117,7 +117,6 @@ class CSVLogger (_Logger):
         if self.has_part("modified"):
             row.append(self.format_modified(url_data.modified))
         self.writerow(map(strformat.unicode_safe, row))
-        self.flush()
 
     def writerow (self, row):
         """Write one row in CSV format."""
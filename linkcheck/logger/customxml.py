@@ -93,7 +93,6 @@ class CustomXMLLogger (xmllog._XMLLogger):
                 attrs["result"] = url_data.result
             self.xml_tag(u"valid", u"%d" % (1 if url_data.valid else 0), attrs)
         self.xml_endtag(u'urldata')
-        self.flush()
 
     def end_output (self, **kwargs):
         """
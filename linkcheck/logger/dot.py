@@ -69,7 +69,7 @@ class DOTLogger (_GraphLogger):
 
     def write_edge (self, node):
         """Write edge from parent to node."""
-        source = dotquote(self.nodes[node["parent_url"]]["label"])
+        source = dotquote(self.get_label(node["parent_id"]))
         target = dotquote(node["label"])
         self.writeln(u'  "%s" -> "%s" [' % (source, target))
         self.writeln(u'    label="%s",' % dotquote(node["edge"]))
@@ -67,7 +67,7 @@ class GMLLogger (_GraphLogger):
         """Write one edge."""
         self.writeln(u"  edge [")
         self.writeln(u'    label  "%s"' % node["edge"])
-        self.writeln(u"    source %d" % self.nodes[node["parent_url"]]["id"])
+        self.writeln(u"    source %d" % node["parent_id"])
         self.writeln(u"    target %d" % node["id"])
         if self.has_part("result"):
             self.writeln(u"    valid  %d" % node["valid"])
@@ -16,10 +16,17 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 """
 Base class for graph loggers.
+
+Nodes are written when they are logged. Only an index of node ids by
+URL is kept in memory; node labels and edges are stored in temporary
+files and the edges are written at the end of output.
 """
 from . import _Logger
 from ..decorators import notimplemented
 import re
+import array
+import marshal
+import tempfile
 
 
 class _GraphLogger (_Logger):
@@ -30,8 +37,19 @@ class _GraphLogger (_Logger):
         args = self.get_args(kwargs)
         super(_GraphLogger, self).__init__(**args)
         self.init_fileoutput(args)
+        self.init_graph()
+
+    def init_graph (self):
+        """Initialize node index and temporary graph files."""
+        # mapping {URL -> node id}
         self.nodes = {}
         self.nodeid = 0
+        # temporary files with node labels and with edges to parent URLs,
+        # created when the first node is stored
+        self.labels = None
+        self.edges = None
+        # file offsets of the node labels, indexed by node id
+        self.label_offsets = array.array('L')
 
     def log_filter_url(self, url_data, do_print):
         """Update accounting data and log all valid URLs regardless the
@@ -60,19 +78,52 @@ class _GraphLogger (_Logger):
             "edge": quote(url_data.name),
             "valid": 1 if url_data.valid else 0,
         }
-        self.nodes[node["url"]] = node
+        self.nodes[node["url"]] = node["id"]
+        self.store_node(node)
         self.nodeid += 1
         return node
 
+    def store_node (self, node):
+        """Store node label and the edge from the parent URL."""
+        if self.labels is None:
+            self.labels = tempfile.TemporaryFile()
+            self.edges = tempfile.TemporaryFile()
+        self.label_offsets.append(self.labels.tell())
+        marshal.dump(node["label"], self.labels)
+        if node["parent_url"]:
+            marshal.dump((node["parent_url"], node["id"], node["label"],
+                node["edge"], node["valid"]), self.edges)
+
+    def get_label (self, nodeid):
+        """Return label of node with given id."""
+        self.labels.seek(self.label_offsets[nodeid])
+        return marshal.load(self.labels)
+
     def write_edges (self):
         """
-        Write all edges we can find in the graph in a brute-force manner.
+        Write the stored edges whose parent URL is also a node.
         """
-        for node in self.nodes.values():
-            if node["parent_url"] in self.nodes:
-                self.write_edge(node)
+        if self.edges is not None:
+            self.edges.seek(0)
+            while True:
+                try:
+                    parent_url, nodeid, label, edge, valid = \
+                        marshal.load(self.edges)
+                except EOFError:
+                    break
+                parent_id = self.nodes.get(parent_url)
+                if parent_id is not None:
+                    self.write_edge(dict(parent_id=parent_id, id=nodeid,
+                        label=label, edge=edge, valid=valid))
         self.flush()
 
+    def close_graph (self):
+        """Remove temporary graph files and the node index."""
+        for fd in (self.labels, self.edges):
+            if fd is not None:
+                fd.close()
+        self.init_graph()
+
     @notimplemented
     def write_edge (self, node):
         """Write edge data for one node and its parent."""
@@ -86,6 +137,7 @@ class _GraphLogger (_Logger):
     def end_output (self, **kwargs):
         """Write edges and end of checking info as gml comment."""
         self.write_edges()
+        self.close_graph()
         self.end_graph()
         if self.has_part("outro"):
             self.write_outro()
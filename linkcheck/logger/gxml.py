@@ -32,13 +32,6 @@ class GraphXMLLogger (_XMLLogger, _GraphLogger):
         "filename": "linkchecker-out.gxml",
     }
 
-    def __init__ (self, **kwargs):
-        """Initialize graph node list and internal id counter."""
-        args = self.get_args(kwargs)
-        super(GraphXMLLogger, self).__init__(**args)
-        self.nodes = {}
-        self.nodeid = 0
-
     def start_output (self):
         """Write start of checking info as xml comment."""
         super(GraphXMLLogger, self).start_output()
@@ -70,7 +63,7 @@ class GraphXMLLogger (_XMLLogger, _GraphLogger):
     def write_edge (self, node):
         """Write one edge."""
         attrs = {
-            u"source": u"%d" % self.nodes[node["parent_url"]]["id"],
+            u"source": u"%d" % node["parent_id"],
             u"target": u"%d" % node["id"],
         }
         self.xml_starttag(u"edge", attrs=attrs)
@@ -84,6 +77,8 @@ class GraphXMLLogger (_XMLLogger, _GraphLogger):
     def end_output (self, **kwargs):
         """Finish graph output, and print end of checking info as xml
         comment."""
+        self.write_edges()
+        self.close_graph()
         self.xml_endtag(u"graph")
         self.xml_endtag(u"GraphXML")
         self.xml_end_output()
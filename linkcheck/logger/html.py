@@ -152,7 +152,6 @@ class HtmlLogger (_Logger):
         if self.has_part("result"):
             self.write_result(url_data)
         self.write_table_end()
-        self.flush()
 
     def write_table_start (self):
         """Start html table."""
@@ -16,7 +16,23 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 """
 A sitemap XML logger.
+
+Sitemap files are limited to 50000 URLs and 50MB. When a limit is
+reached, the file output is continued in a new part file and a sitemap
+index listing the part files is written to the output file at the end.
+
+With the compress option all sitemap files are gzip compressed and get
+".gz" appended to their names. This includes an unsplit sitemap, which
+is written to the output file name with ".gz" appended.
 """
+import os
+import gzip
+import codecs
+try:
+    import urlparse
+except ImportError:
+    # Python 3
+    from urllib import parse as urlparse
 from . import xmllog
 from .. import log, LOG_CHECK
 
@@ -33,6 +49,13 @@ ChangeFreqs = (
 HTTP_SCHEMES = (u'http:', u'https:')
 HTML_TYPES = ('text/html', "application/xhtml+xml")
 
+SITEMAP_XMLNS = u"http://www.sitemaps.org/schemas/sitemap/0.9"
+# limits of one sitemap file
+MAX_URLS = 50000
+MAX_SIZE = 50*1024*1024
+# space reserved in a sitemap file for one URL entry and the end tag
+MAX_ENTRY_SIZE = 0x2000
+
 class SitemapXmlLogger (xmllog._XMLLogger):
     """Sitemap XML output according to http://www.sitemaps.org/protocol.html
     """
@@ -42,6 +65,9 @@ class SitemapXmlLogger (xmllog._XMLLogger):
     LoggerArgs = {
         "filename": "linkchecker-out.sitemap.xml",
         "encoding": "utf-8",
+        "maxurls": MAX_URLS,
+        "maxsize": MAX_SIZE,
+        "compress": 0,
     }
 
     def __init__ (self, **kwargs):
@@ -63,15 +89,75 @@ class SitemapXmlLogger (xmllog._XMLLogger):
         self.priority = None
         if 'priority' in args:
             self.priority = float(args['priority'])
+        self.max_urls = max(1, min(int(args['maxurls']), MAX_URLS))
+        self.max_size = min(int(args['maxsize']), MAX_SIZE)
+        self.compress = str(args['compress']).lower() in \
+            ("1", "yes", "true", "on")
+        # URL of the directory with the part files, default is the
+        # directory of the first URL
+        self.baseurl = args.get('baseurl')
+        # output file name, only file output is split into parts
+        self.sitemap_filename = self.filename
+        if self.compress and self.filename is not None:
+            # the first part is written compressed to the output file
+            self.filename += ".gz"
+        # file names of the finished parts
+        self.parts = []
+        # number of URLs and bytes in the current part
+        self.part_urls = self.part_size = 0
+        # set while writing the sitemap index
+        self.write_index = False
 
     def start_output (self):
         """Write start of checking info as xml comment."""
         super(SitemapXmlLogger, self).start_output()
-        self.xml_start_output()
-        attrs = {u"xmlns": u"http://www.sitemaps.org/schemas/sitemap/0.9"}
-        self.xml_starttag(u'urlset', attrs)
+        self.start_urlset()
         self.flush()
 
+    def start_urlset (self):
+        """Write XML start of a sitemap file."""
+        self.part_urls = self.part_size = 0
+        self.xml_start_output()
+        self.xml_starttag(u'urlset', {u"xmlns": SITEMAP_XMLNS})
+
+    def create_fd (self):
+        """Create gzip compressed sitemap files if configured."""
+        if self.filename is not None and self.compress and \
+           not self.write_index:
+            writer = codecs.getwriter(self.output_encoding)
+            return writer(gzip.GzipFile(self.filename, "wb"),
+                          self.codec_errors)
+        return super(SitemapXmlLogger, self).create_fd()
+
+    def write (self, s, **args):
+        """Write string and count the written bytes."""
+        super(SitemapXmlLogger, self).write(s, **args)
+        if isinstance(s, unicode):
+            s = s.encode(self.output_encoding, self.codec_errors)
+        self.part_size += len(s)
+
+    def get_part_filename (self, num):
+        """Get file name of sitemap part with given number."""
+        base, ext = os.path.splitext(self.sitemap_filename)
+        filename = "%s%d%s" % (base, num, ext)
+        if self.compress:
+            filename += ".gz"
+        return filename
+
+    def rotate (self):
+        """Finish the current sitemap file and continue in a new part."""
+        self.xml_endtag(u"urlset")
+        self.close_fileoutput()
+        if not self.parts:
+            # the first part was written to the output file
+            filename = self.get_part_filename(1)
+            os.rename(self.sitemap_filename + (".gz" if self.compress
+                                               else ""), filename)
+            self.parts.append(filename)
+        self.filename = self.get_part_filename(len(self.parts) + 1)
+        self.parts.append(self.filename)
+        self.start_urlset()
+
     def log_filter_url(self, url_data, do_print):
         """Update accounting data and determine if URL should be included
         in the sitemap.
@@ -104,6 +190,11 @@ class SitemapXmlLogger (xmllog._XMLLogger):
 
     def log_url (self, url_data, priority=None):
         """Log URL data in sitemap format."""
+        if self.sitemap_filename is not None and \
+           (self.part_urls >= self.max_urls or
+            self.part_size + MAX_ENTRY_SIZE > self.max_size):
+            self.rotate()
+        self.part_urls += 1
         self.xml_starttag(u'url')
         self.xml_tag(u'loc', url_data.url)
         if url_data.modified:
@@ -111,10 +202,27 @@ class SitemapXmlLogger (xmllog._XMLLogger):
         self.xml_tag(u'changefreq', self.frequency)
         self.xml_tag(u'priority', "%.2f" % priority)
         self.xml_endtag(u'url')
-        self.flush()
 
     def end_output (self, **kwargs):
-        """Write XML end tag."""
+        """Write XML end tag, and the sitemap index if the sitemap was
+        split into parts."""
         self.xml_endtag(u"urlset")
         self.xml_end_output()
         self.close_fileoutput()
+        if self.parts:
+            self.write_sitemap_index()
+
+    def write_sitemap_index (self):
+        """Write sitemap index with the part files to the output file."""
+        self.filename = self.sitemap_filename
+        self.write_index = True
+        baseurl = self.baseurl or self.prefix
+        self.xml_start_output()
+        self.xml_starttag(u'sitemapindex', {u"xmlns": SITEMAP_XMLNS})
+        for filename in self.parts:
+            self.xml_starttag(u'sitemap')
+            self.xml_tag(u'loc', urlparse.urljoin(baseurl,
+                os.path.basename(filename)))
+            self.xml_endtag(u'sitemap')
+        self.xml_endtag(u'sitemapindex')
+        self.close_fileoutput()
@@ -129,7 +129,6 @@ class SQLLogger (_Logger):
                "level": url_data.level,
                "modified": sqlify(self.format_modified(url_data.modified)),
               })
-        self.flush()
 
     def end_output (self, **kwargs):
         """
@@ -0,0 +1,220 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+A logger storing check results directly in a SQLite database.
+"""
+import os
+import sys
+import time
+import sqlite3
+from . import _Logger
+from .sql import intify
+from .. import log, LOG_CHECK, url as urlutil
+
+# table columns of the SQL logger, see config/create.sql
+Columns = (
+    ("urlname", "varchar(256) not null"),
+    ("parentname", "varchar(256)"),
+    ("baseref", "varchar(256)"),
+    ("valid", "int"),
+    ("result", "varchar(256)"),
+    ("warning", "varchar(512)"),
+    ("info", "varchar(512)"),
+    ("url", "varchar(256)"),
+    ("line", "int"),
+    ("col", "int"),
+    ("name", "varchar(256)"),
+    ("checktime", "int"),
+    ("dltime", "int"),
+    ("size", "int"),
+    ("cached", "int"),
+    ("level", "int not null"),
+    ("modified", "varchar(256)"),
+)
+ColumnNames = [name for name, coltype in Columns]
+
+
+def quote_name (name):
+    """Quote SQL identifier."""
+    return u'"%s"' % name.replace(u'"', u'""')
+
+
+def nullify (s):
+    """Store empty strings as NULL like the SQL logger."""
+    return s or None
+
+
+class SqliteLogger (_Logger):
+    """
+    Insert check results into a table of a SQLite database. The rows
+    are inserted in batches, each in one transaction, so that the
+    database can be queried while URLs are checked.
+    """
+
+    LoggerName = 'sqlite'
+
+    LoggerArgs = {
+        "filename": "linkchecker-out.sqlite",
+        'dbname': 'linksdb',
+        'batchsize': 500,
+        'indexes': '',
+        'replace': 0,
+    }
+
+    def __init__ (self, **kwargs):
+        """Initialize database access data."""
+        args = self.get_args(kwargs)
+        super(SqliteLogger, self).__init__(**args)
+        self.filename = os.path.expanduser(args['filename'])
+        self.dbname = args['dbname']
+        self.batch_size = int(args['batchsize'])
+        self.indexes = [x.strip() for x in args['indexes'].split(',')
+                        if x.strip()]
+        for column in self.indexes:
+            if column not in ColumnNames:
+                raise ValueError("Invalid index column %r" % column)
+        self.replace = str(args['replace']).lower() in \
+            ("1", "yes", "true", "on")
+        self.conn = None
+        # rows waiting for insertion
+        self.rows = []
+        table = quote_name(self.dbname)
+        self.insert_sql = u"insert into %s(%s) values (%s)" % (table,
+            u",".join(ColumnNames), u",".join(u"?" for x in Columns))
+
+    def start_output (self):
+        """
+        Create the database table. An existing table is only replaced
+        with the replace option, else the log output is disabled.
+        """
+        super(SqliteLogger, self).start_output()
+        path = os.path.dirname(self.filename)
+        table = quote_name(self.dbname)
+        try:
+            if path and not os.path.isdir(path):
+                os.makedirs(path)
+            self.conn = sqlite3.connect(self.filename,
+                check_same_thread=False)
+            # readers do not block inserting rows
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            if not self.replace and self.has_table():
+                log.warn(LOG_CHECK,
+                    "Table %r exists in database %r; set replace=1 to "
+                    "replace it\nDisabling log output of %s", self.dbname,
+                    self.filename, self)
+                self.close_database()
+                self.is_active = False
+                return
+            with self.conn:
+                self.conn.execute(u"drop table if exists %s" % table)
+                self.conn.execute(u"create table %s (%s)" % (table,
+                    u", ".join(u"%s %s" % column for column in Columns)))
+        except (IOError, OSError, sqlite3.Error):
+            msg = sys.exc_info()[1]
+            log.warn(LOG_CHECK,
+                "Could not open database %r for writing: %s\n"
+                "Disabling log output of %s", self.filename, msg, self)
+            self.close_database()
+            self.is_active = False
+
+    def has_table (self):
+        """Check if the table exists in the database."""
+        row = self.conn.execute("select 1 from sqlite_master "
+            "where type='table' and name=?", (self.dbname,)).fetchone()
+        return row is not None
+
+    def log_url (self, url_data):
+        """
+        Queue row with url check info for insertion into the database.
+        """
+        self.rows.append((
+            nullify(url_data.base_url),
+            nullify(url_data.parent_url),
+            nullify(url_data.base_ref),
+            intify(url_data.valid),
+            nullify(url_data.result),
+            nullify(os.linesep.join(x[1] for x in url_data.warnings)),
+            nullify(os.linesep.join(url_data.info)),
+            nullify(urlutil.url_quote(url_data.url)),
+            url_data.line,
+            url_data.column,
+            nullify(url_data.name),
+            int(url_data.checktime),
+            int(url_data.dltime),
+            int(url_data.size),
+            0,
+            url_data.level,
+            nullify(self.format_modified(url_data.modified)),
+        ))
+        self.check_flush()
+
+    def check_flush (self):
+        """
+        Insert queued rows if the batch size is reached or the flush
+        interval passed.
+        """
+        if self.rows and (len(self.rows) >= self.batch_size or
+           time.time() - self.flush_time >= self.flush_interval):
+            self.flush()
+
+    def flush (self):
+        """
+        Insert queued rows in one transaction.
+        """
+        self.flush_time = time.time()
+        rows, self.rows = self.rows, []
+        if not rows or self.conn is None:
+            return
+        try:
+            with self.conn:
+                self.conn.executemany(self.insert_sql, rows)
+        except sqlite3.Error:
+            msg = sys.exc_info()[1]
+            log.warn(LOG_CHECK,
+                "Could not write to database %r: %s\n"
+                "Disabling log output of %s", self.filename, msg, self)
+            self.close_database()
+            self.is_active = False
+
+    def end_output (self, **kwargs):
+        """
+        Insert remaining rows, create indexes and close the database.
+        """
+        self.flush()
+        if self.conn is not None and self.indexes:
+            table = quote_name(self.dbname)
+            try:
+                with self.conn:
+                    for column in self.indexes:
+                        index = quote_name(u"%s_%s" % (self.dbname, column))
+                        self.conn.execute(u"create index %s on %s(%s)" %
+                            (index, table, column))
+            except sqlite3.Error:
+                msg = sys.exc_info()[1]
+                log.warn(LOG_CHECK, "Could not create indexes in database "
+                    "%r: %s", self.filename, msg)
+        self.close_database()
+
+    def close_database (self):
+        """Close the database connection."""
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except sqlite3.Error:
+                # ignore close errors
+                pass
+            self.conn = None
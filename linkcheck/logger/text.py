@@ -133,7 +133,6 @@ class TextLogger (_Logger):
             self.write_warning(url_data)
         if self.has_part('result'):
             self.write_result(url_data)
-        self.flush()
 
     def write_id (self):
         """Write unique ID of url_data."""
@@ -272,6 +271,11 @@ class TextLogger (_Logger):
         self.writeln(_("Statistics:"))
         if self.stats.downloaded_bytes is not None:
             self.writeln(_("Downloaded: %s.") % strformat.strsize(self.stats.downloaded_bytes))
+        if self.stats.connections_opened is not None:
+            self.writeln(_("HTTP connections: %(opened)d opened, "
+                "%(reused)d reused.") %
+                dict(opened=self.stats.connections_opened,
+                     reused=self.stats.connections_reused))
         if self.stats.number > 0:
             self.writeln(_(
               "Content types: %(image)d image, %(text)d text, %(video)d video, "
@@ -288,6 +292,8 @@ class TextLogger (_Logger):
         """Write end of output info, and flush all output buffers."""
         self.stats.downloaded_bytes = kwargs.get("downloaded_bytes")
         self.stats.num_urls = kwargs.get("num_urls")
+        self.stats.connections_opened = kwargs.get("connections_opened")
+        self.stats.connections_reused = kwargs.get("connections_reused")
         if self.has_part('stats'):
             self.write_stats()
         if self.has_part('outro'):
@@ -19,9 +19,15 @@ Main functions for link parsing
 """
 from .. import log, LOG_CHECK, strformat, url as urlutil
 from ..htmlutil import linkparse
-from ..HtmlParser import htmlsax
+from ..HtmlParser import htmlsax, htmlscan
 from ..bookmarks import firefox
 
+# HTML parser backends with the htmlsax parser interface
+HtmlParsers = {
+    "htmlsax": htmlsax.parser,
+    "regex": htmlscan.parser,
+}
+
 
 def parse_url(url_data):
     """Parse a URL."""
@@ -47,7 +53,12 @@ def parse_html (url_data):
     """Parse into HTML content and search for URLs to check.
     Found URLs are added to the URL queue.
     """
-    find_links(url_data, url_data.add_url, linkparse.LinkTags)
+    links = url_data.get_html_content().links
+    if links is None:
+        find_links(url_data, url_data.add_url, linkparse.LinkTags)
+        return
+    for url, line, column, name, base in links:
+        url_data.add_url(url, line=line, column=column, name=name, base=base)
 
 
 def parse_opera (url_data):
@@ -113,16 +124,129 @@ def parse_wml (url_data):
     find_links(url_data, url_data.add_url, linkparse.WmlTags)
 
 
+class HtmlContent (object):
+    """Links, anchors and meta robots flags found by parsing HTML
+    content."""
+
+    def __init__ (self):
+        """Initialize empty content."""
+        # list of (url, line, column, name, base) tuples of found links,
+        # None if links have not been searched
+        self.links = None
+        # list of (url, line, column, name, base) tuples of found anchors,
+        # None if anchors have not been searched
+        self.anchors = None
+        # meta robots flags
+        self.follow = self.index = True
+
+
+class HtmlAnalyzer (object):
+    """Parse HTML content incrementally for all interested consumers."""
+
+    def __init__ (self, url_data, links=True, anchors=True):
+        """Construct parser for the content of given URL.
+        @param links: search links
+        @ptype links: bool
+        @param anchors: search anchors
+        @ptype anchors: bool
+        """
+        self.content = HtmlContent()
+        self.robots_finder = linkparse.MetaRobotsFinder()
+        # link names may continue in the next fed content part
+        self.link_finders = []
+        if anchors:
+            self.content.anchors = []
+            self.link_finders.append(linkparse.LinkFinder(
+                get_collector(self.content.anchors), linkparse.AnchorTags,
+                lookahead=True))
+        if links:
+            self.content.links = []
+            self.link_finders.append(linkparse.LinkFinder(
+                get_collector(self.content.links), linkparse.LinkTags,
+                lookahead=True))
+        finders = [self.robots_finder] + self.link_finders
+        self.handler = linkparse.CompositeFinder(finders)
+        self.parser = get_html_parser(url_data, self.handler)
+        self.stopped = False
+
+    def feed (self, data):
+        """Parse the next part of the content."""
+        if self.stopped:
+            return
+        for finder in self.link_finders:
+            finder.add_data(data)
+        try:
+            self.parser.feed(data)
+        except linkparse.StopParse as msg:
+            log.debug(LOG_CHECK, "Stopped parsing: %s", msg)
+            self.stopped = True
+
+    def finish (self):
+        """Parse the remaining content.
+        @return: the found content
+        @rtype: HtmlContent
+        """
+        if not self.stopped:
+            try:
+                self.parser.flush()
+            except linkparse.StopParse as msg:
+                log.debug(LOG_CHECK, "Stopped parsing: %s", msg)
+        for finder in self.link_finders:
+            finder.flush_links()
+        # break cyclic dependencies
+        self.handler.parser = None
+        self.parser.handler = None
+        self.content.follow = self.robots_finder.follow
+        self.content.index = self.robots_finder.index
+        return self.content
+
+
+def analyze_html (url_data, links=True, anchors=True):
+    """Parse HTML content once for all interested consumers.
+    @param links: search links
+    @ptype links: bool
+    @param anchors: search anchors
+    @ptype anchors: bool
+    @return: the found content
+    @rtype: HtmlContent
+    """
+    analyzer = HtmlAnalyzer(url_data, links=links, anchors=anchors)
+    analyzer.feed(url_data.get_content())
+    return analyzer.finish()
+
+
+def get_collector (found):
+    """Get LinkFinder callback appending to the given list."""
+    def add_link (url, line=0, column=0, name=u"", base=None):
+        """Store found link."""
+        found.append((url, line, column, name, base))
+    return add_link
+
+
 def find_links (url_data, callback, tags):
     """Parse into content and search for URLs to check.
     Found URLs are added to the URL queue.
     """
-    # construct parser object
-    handler = linkparse.LinkFinder(callback, tags)
-    parser = htmlsax.parser(handler)
+    parse_content(url_data, linkparse.LinkFinder(callback, tags))
+
+
+def get_html_parser (url_data, handler):
+    """Construct a HTML parser for the content of the URL with the
+    backend configured in the htmlparser option. The handler and the
+    parser are connected with each other.
+    @return: the parser object
+    """
+    parser = HtmlParsers[url_data.aggregate.config["htmlparser"]](handler)
     if url_data.charset:
         parser.encoding = url_data.charset
     handler.parser = parser
+    return parser
+
+
+def parse_content (url_data, handler):
+    """Feed the content of the URL to a HTML parser with the given
+    handler."""
+    parser = get_html_parser(url_data, handler)
     # parse
     try:
         parser.feed(url_data.get_content())
@@ -52,7 +52,23 @@ class _ConnectionPlugin(_PluginBase):
 
 class _ContentPlugin(_PluginBase):
     """Plugins run for valid URLs with content."""
-    pass
+
+    # flag if the HTML parser must search anchors for this plugin
+    needs_anchors = False
+
+    def check_cached_result(self, url_data, result):
+        """Adjust a cached result copied for url_data. Per default
+        the result is not changed."""
+        pass
+
+    def check_unchanged(self, url_data, page):
+        """Check url_data whose content did not change since it was
+        stored by a previous run, without downloading the content.
+        Per default nothing is checked.
+        @param page: the stored page
+        @ptype page: persistent.Page
+        """
+        pass
 
 
 class _ParserPlugin(_PluginBase):
@@ -87,6 +103,8 @@ class PluginManager(object):
         folders = config["pluginfolders"]
         modules = get_plugin_modules(folders)
         self.load_modules(modules, config)
+        self.needs_anchors = any(plugin.needs_anchors
+                                 for plugin in self.content_plugins)
 
     def load_modules(self, modules, config):
         """Load plugin modules."""
@@ -113,6 +131,17 @@ class PluginManager(object):
         """Run all content plugins."""
         run_plugins(self.content_plugins, url_data)
 
+    def run_cached_result_plugins(self, url_data, result):
+        """Run all content plugins on a cached result copied for
+        url_data."""
+        for plugin in self.content_plugins:
+            plugin.check_cached_result(url_data, result)
+
+    def run_unchanged_plugins(self, url_data, page):
+        """Run all content plugins on an unchanged stored page."""
+        for plugin in self.content_plugins:
+            plugin.check_unchanged(url_data, page)
+
     def run_parser_plugins(self, url_data, pagetype):
         """Run parser plugins for given pagetype."""
         run_plugins(self.parser_plugins, url_data, stop_after_match=True, pagetype=pagetype)
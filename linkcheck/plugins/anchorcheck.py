@@ -19,43 +19,91 @@ Check HTML anchors
 """
 from . import _ContentPlugin
 from .. import log, LOG_PLUGIN, url as urlutil
-from ..htmlutil import linkparse
-from ..parser import find_links
+from ..cache.anchors import AnchorCache, Anchors
+from ..checker.const import WARN_URL_ANCHOR_NOT_FOUND
 
 
 class AnchorCheck(_ContentPlugin):
     """Checks validity of HTML anchors."""
 
+    # the anchors are searched by the HTML parser of the page
+    needs_anchors = True
+
+    def __init__(self, config):
+        """Initialize the anchor cache."""
+        super(AnchorCheck, self).__init__(config)
+        # anchors of checked pages, to check other anchors of the
+        # same page in cached results
+        self.anchor_cache = AnchorCache()
+
     def applies_to(self, url_data):
-        """Check for HTML anchor existence."""
-        return url_data.is_html() and url_data.anchor
+        """Check for HTML anchor existence. The anchors of parsed pages
+        are cached as well."""
+        return url_data.is_html() and \
+            (url_data.anchor or url_data.allows_simple_recursion())
 
     def check(self, url_data):
         """Check content for invalid anchors."""
         log.debug(LOG_PLUGIN, "checking content for invalid anchors")
-        # list of parsed anchors
-        self.anchors = []
-        find_links(url_data, self.add_anchor, linkparse.AnchorTags)
-        self.check_anchor(url_data)
-
-    def add_anchor (self, url, line, column, name, base):
-        """Add anchor URL."""
-        self.anchors.append((url, line, column, name, base))
-
-    def check_anchor(self, url_data):
-        """If URL is valid, parseable and has an anchor, check it.
-        A warning is logged and True is returned if the anchor is not found.
-        """
-        log.debug(LOG_PLUGIN, "checking anchor %r in %s", url_data.anchor, self.anchors)
+        # the anchors are found in the same parse as links and meta robots
+        found = url_data.get_html_content().anchors
+        self.check_anchors(url_data, [x[0] for x in found])
+
+    def check_unchanged(self, url_data, page):
+        """Check the anchor of url_data against the stored anchors of
+        the page, replacing the anchor warning of the stored result."""
+        if page.anchors is None or not self.applies_to(url_data):
+            return
+        url_data.warnings = [x for x in url_data.warnings
+                             if x[0] != WARN_URL_ANCHOR_NOT_FOUND]
+        self.check_anchors(url_data, page.anchors)
+
+    def check_anchors(self, url_data, names):
+        """Cache the given anchor names of the page and check the
+        anchor of url_data."""
         enc = lambda anchor: urlutil.url_quote_part(anchor, encoding=url_data.encoding)
-        if any(x for x in self.anchors if enc(x[0]) == url_data.anchor):
+        anchors = Anchors(sorted(set(names)), frozenset(enc(x) for x in names))
+        self.anchor_cache.add_anchors(url_data.cache_url, anchors)
+        if url_data.anchor:
+            msg = self.check_anchor(url_data.anchor, anchors)
+            if msg:
+                url_data.add_warning(msg, tag=WARN_URL_ANCHOR_NOT_FOUND)
+
+    def check_cached_result(self, url_data, result):
+        """Check the anchor of url_data against the cached anchors of
+        the page, replacing the anchor warning of the cached result.
+        If the anchors are no longer cached, the cached warning is kept."""
+        anchor = url_data.anchor
+        if anchor:
+            anchors = self.anchor_cache.get_anchors(url_data.cache_url)
+            if anchors is None:
+                log.debug(LOG_PLUGIN, "no cached anchors for %s", url_data.cache_url)
+                return
+        if any(tag == WARN_URL_ANCHOR_NOT_FOUND for tag, msg in result.warnings):
+            result.warnings = [x for x in result.warnings
+                               if x[0] != WARN_URL_ANCHOR_NOT_FOUND]
+        if not anchor:
             return
-        if self.anchors:
-            anchornames = sorted(set(u"`%s'" % x[0] for x in self.anchors))
-            anchors = u", ".join(anchornames)
+        msg = self.check_anchor(anchor, anchors)
+        if msg and WARN_URL_ANCHOR_NOT_FOUND not in \
+           url_data.aggregate.config["ignorewarnings"]:
+            result.warnings = result.warnings + [(WARN_URL_ANCHOR_NOT_FOUND, msg)]
+
+    def check_anchor(self, anchor, anchors):
+        """Check if the anchor is found in the page anchors.
+        @param anchor: the URL-quoted anchor
+        @param anchors: the anchors of the page
+        @ptype anchors: Anchors
+        @return: warning message if the anchor is not found, else None
+        """
+        log.debug(LOG_PLUGIN, "checking anchor %r in %s", anchor, anchors.names)
+        if anchor in anchors.quoted:
+            return None
+        if anchors.names:
+            anchornames = [u"`%s'" % x for x in anchors.names]
+            anchornames = u", ".join(anchornames)
         else:
-            anchors = u"-"
-        args = {"name": url_data.anchor, "anchors": anchors}
-        msg = u"%s %s" % (_("Anchor `%(name)s' not found.") % args,
-                          _("Available anchors: %(anchors)s.") % args)
-        url_data.add_warning(msg)
+            anchornames = u"-"
+        args = {"name": anchor, "anchors": anchornames}
+        return u"%s %s" % (_("Anchor `%(name)s' not found.") % args,
+                           _("Available anchors: %(anchors)s.") % args)
@@ -28,6 +28,7 @@ except ImportError:
 import urllib
 import requests
 from . import log, LOG_CHECK
+from .decorators import lru_memoized
 
 for scheme in ('ldap', 'irc'):
     if scheme not in urlparse.uses_netloc:
@@ -41,6 +42,9 @@ for scheme in ('ldap', 'irc'):
 # http://code.google.com/p/browsersec/wiki/Part1#Unicode_in_URLs
 url_encoding = "utf-8"
 
+# number of cached url_norm() results
+URL_NORM_CACHE_SIZE = 10000
+
 
 # constants defining url part indexes
 SCHEME = 0
@@ -288,10 +292,18 @@ def urlunsplit (urlparts):
 def url_norm (url, encoding=None):
     """Normalize the given URL which must be quoted. Supports unicode
     hostnames (IDNA encoding) according to RFC 3490.
+    Results for recently normed URLs are cached since pages of one site
+    usually share many links.
 
     @return: (normed url, idna flag)
     @rtype: tuple of length two
     """
+    return _url_norm(url, encoding)
+
+
+@lru_memoized(URL_NORM_CACHE_SIZE)
+def _url_norm (url, encoding):
+    """Normalize the given URL, see url_norm()."""
     if isinstance(url, unicode):
         # try to decode the URL to ascii since urllib.unquote()
         # handles non-unicode strings differently
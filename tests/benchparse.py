@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Benchmark the HTML parser backends used to find links.
+
+Usage: python tests/benchparse.py [--size=MB] [FILE...]
+
+The HTML files given as parameters, or the HTML test files and
+a generated page, are parsed with each backend until the given amount
+of data (default 10 MB) has been parsed. Reports the throughput in
+MB/s and links/s and whether the found links equal the links of the
+htmlsax backend.
+"""
+import sys
+import os
+import glob
+import time
+import getopt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from linkcheck.parser import HtmlParsers
+from tests.test_parser_backends import datadir, find_links
+
+
+def make_page (paragraphs=200):
+    """Generate a HTML page with text, links, images, scripts
+    and comments."""
+    parts = ['<!DOCTYPE html>\n<html><head><title>Generated page</title>\n'
+        '<meta http-equiv="content-type" content="text/html; charset=utf-8">\n'
+        '<link rel="stylesheet" href="/style.css">\n'
+        '<style>p { margin: 0 } a > img { border: none }</style>\n'
+        '<script type="text/javascript">var s = "<a href=\'x\'>";</script>\n'
+        '</head><body>\n']
+    for i in range(paragraphs):
+        parts.append('<div class="entry" id="entry%d">\n<h2>Entry %d</h2>\n'
+            '<p>Lorem ipsum dolor sit amet, consectetur adipisici elit, sed '
+            'eiusmod tempor incidunt ut labore et dolore magna aliqua. '
+            '<a href="/page%d.html" title="Page %d">Page %d</a> and '
+            '<a href=\'http://www.example.com/%d?a=1&amp;b=2\'>example</a>.'
+            '<br/>\n<img src="/img/%d.png" alt="Image %d" width=10 height=10>'
+            '</p>\n<!-- entry %d -->\n<p style="background: url(/bg%d.png)">'
+            'Ut enim ad minim veniam, quis nostrud exercitation ullamco '
+            'laboris nisi ut aliquid ex ea commodi consequat.</p>\n</div>\n'
+            % ((i,) * 10))
+    parts.append('</body></html>\n')
+    return "".join(parts)
+
+
+def get_corpus (filenames):
+    """Return list of (filename, content) tuples."""
+    corpus = []
+    if not filenames:
+        filenames = sorted(glob.glob(os.path.join(datadir, "*.html")))
+        corpus.append(("generated", make_page()))
+    for filename in filenames:
+        with open(filename, "rb") as fd:
+            corpus.append((filename, fd.read()))
+    return corpus
+
+
+def bench (backend, corpus, size):
+    """Parse the corpus repeatedly until size bytes are parsed.
+    @return: tuple (parsed bytes, found links, seconds)
+    """
+    numbytes = numlinks = 0
+    start = time.time()
+    while numbytes < size:
+        for filename, data in corpus:
+            numlinks += len(find_links(backend, data))
+            numbytes += len(data)
+    return numbytes, numlinks, time.time() - start
+
+
+def main (args):
+    """Run the benchmark."""
+    opts, args = getopt.getopt(args, "", ["size="])
+    size = 10
+    for opt, arg in opts:
+        if opt == "--size":
+            size = float(arg)
+    corpus = get_corpus(args)
+    expected = [find_links("htmlsax", data) for filename, data in corpus]
+    print "%-10s %10s %12s  %s" % ("backend", "MB/s", "links/s", "equal")
+    for backend in sorted(HtmlParsers):
+        differ = [filename for (filename, data), links in
+                  zip(corpus, expected) if find_links(backend, data) != links]
+        numbytes, numlinks, secs = bench(backend, corpus, size*1024*1024)
+        secs = max(secs, 1e-6)
+        print "%-10s %10.2f %12.0f  %s" % (backend,
+            numbytes / secs / 1024 / 1024, numlinks / secs,
+            "yes" if not differ else "no")
+        for filename in differ:
+            print "  links differ in", filename
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Benchmark URL normalization with and without the result cache.
+
+Usage: python tests/benchurl.py [--pages=NUMBER]
+
+The links of generated pages of one site are normed. Each page has
+links of the shared page template and links of its own.
+"""
+import sys
+import os
+import time
+import getopt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from linkcheck import url as urlutil
+
+
+def get_links (pages):
+    """Return the links of the given number of pages."""
+    template = [u"http://www.example.org/%s/index.html?lang=en" % name
+                for name in (u"news", u"about", u"contact", u"blog",
+                             u"products", u"support", u"legal", u"jobs")]
+    template.extend(u"http://www.example.org/static/img/icon%d.png" % i
+                    for i in range(20))
+    links = []
+    for page in range(pages):
+        links.extend(template)
+        links.extend(u"http://www.example.org/blog/%d/./entry%d.html#c%d" %
+                     (page, i, i) for i in range(5))
+    return links
+
+
+def bench (func, links):
+    """Norm all links with func.
+    @return: number of normed links per second
+    """
+    start = time.time()
+    for link in links:
+        func(link, None)
+    return len(links) / max(time.time() - start, 1e-6)
+
+
+def main (args):
+    """Run the benchmark."""
+    opts, args = getopt.getopt(args, "", ["pages="])
+    pages = 2000
+    for opt, arg in opts:
+        if opt == "--pages":
+            pages = int(arg)
+    links = get_links(pages)
+    urlutil._url_norm.cache.clear()
+    print "%-10s %12s" % ("url_norm", "links/s")
+    print "%-10s %12.0f" % ("uncached", bench(urlutil._url_norm.func, links))
+    print "%-10s %12.0f" % ("cached", bench(urlutil.url_norm, links))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
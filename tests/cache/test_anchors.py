@@ -0,0 +1,36 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test anchor cache routines.
+"""
+
+import unittest
+from linkcheck.cache.anchors import AnchorCache, Anchors
+
+
+class TestAnchorCache (unittest.TestCase):
+
+    def test_lru (self):
+        cache = AnchorCache(max_size=2)
+        for url in (u"a", u"b"):
+            cache.add_anchors(url, Anchors([url], frozenset([url])))
+        # mark a as recently used so that b gets evicted
+        self.assertEqual(cache.get_anchors(u"a").names, [u"a"])
+        cache.add_anchors(u"c", Anchors([], frozenset()))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get_anchors(u"b"), None)
+        self.assertTrue(u"a" in cache.get_anchors(u"a").quoted)
@@ -0,0 +1,93 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test HTTP connection pools shared by request sessions.
+"""
+
+import unittest
+import threading
+import BaseHTTPServer
+import SocketServer
+import requests
+from linkcheck.cache import connections
+
+
+class KeepAliveHttpRequestHandler (BaseHTTPServer.BaseHTTPRequestHandler):
+    """Answer GET requests with a small page over kept-alive
+    connections."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET (self):
+        """Send page."""
+        content = "testcontent"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message (self, format, *args):
+        """Logging is disabled."""
+        pass
+
+
+class ThreadingHttpServer (SocketServer.ThreadingMixIn,
+                           BaseHTTPServer.HTTPServer):
+    """HTTP server handling each connection in a thread."""
+
+    daemon_threads = True
+
+
+class TestConnections (unittest.TestCase):
+
+    def setUp (self):
+        self.server = ThreadingHttpServer(("localhost", 0),
+            KeepAliveHttpRequestHandler)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.url = "http://localhost:%d/" % self.server.server_address[1]
+
+    def tearDown (self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_shared_pool (self):
+        adapter = connections.SharedHTTPAdapter(10, 2)
+        sessions = []
+        for i in range(2):
+            session = requests.Session()
+            session.mount("http://", adapter)
+            sessions.append(session)
+        for session in sessions + sessions:
+            response = session.get(self.url)
+            self.assertEqual(response.content, "testcontent")
+        self.assertEqual(adapter.stats.opened, 1)
+        self.assertEqual(adapter.stats.requests, 4)
+        self.assertEqual(adapter.stats.get_reused(), 3)
+        # a response in progress needs a second connection
+        response = sessions[0].get(self.url, stream=True)
+        sessions[1].get(self.url)
+        response.close()
+        self.assertEqual(adapter.stats.opened, 2)
+        adapter.close()
+
+    def test_pool_sizes (self):
+        self.assertEqual(connections.get_pool_sizes(0), (10, 1))
+        self.assertEqual(connections.get_pool_sizes(10), (20, 10))
+        self.assertEqual(connections.get_pool_sizes(100, 4), (200, 4))
+        self.assertEqual(connections.get_pool_sizes(1000), (256, 1000))
@@ -0,0 +1,97 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test result cache routines.
+"""
+
+import os
+import unittest
+from linkcheck.cache.results import ResultCache, BloomFilter, \
+    get_result_size, get_key_digest
+from linkcheck.checker.urlbase import CompactUrlData, urlDataAttr
+
+
+def get_result (url):
+    """Return a compact result for the given URL."""
+    wire = dict((attr, None) for attr in urlDataAttr)
+    wire.update(url=url, cache_url=url, warnings=[], valid=True)
+    return CompactUrlData(wire)
+
+
+class TestResultCache (unittest.TestCase):
+
+    def test_lru (self):
+        cache = ResultCache(max_size=2)
+        for url in (u"a", u"b"):
+            cache.add_result(url, get_result(url))
+        # mark a as recently used so that b gets evicted
+        cache.get_result(u"a")
+        cache.add_result(u"c", get_result(u"c"))
+        self.assertTrue(cache.has_result(u"a"))
+        self.assertFalse(cache.has_result(u"b"))
+        self.assertTrue(cache.has_result(u"c"))
+        self.assertEqual(cache.get_result(u"b"), None)
+        self.assertEqual(len(cache), 3)
+        # adding a discarded result again does not count twice
+        cache.add_result(u"b", get_result(u"b"))
+        self.assertEqual(len(cache), 3)
+
+    def test_max_bytes (self):
+        size = get_result_size(u"a", get_result(u"a"))
+        cache = ResultCache(max_bytes=size * 2)
+        for url in (u"a", u"b", u"c"):
+            cache.add_result(url, get_result(url))
+        self.assertEqual(cache.cache.keys(), [u"b", u"c"])
+        self.assertTrue(cache.num_bytes <= size * 2)
+
+    def test_disk (self):
+        cache = ResultCache(max_size=1, use_disk=True)
+        keys = []
+        cache.add_listener(keys.append)
+        cache.add_result(u"a", get_result(u"a"))
+        cache.add_result(u"b", get_result(u"b"))
+        self.assertEqual(keys, [u"a", u"b"])
+        self.assertEqual(cache.cache.keys(), [u"b"])
+        self.assertTrue(cache.has_result(u"a"))
+        result = cache.get_result(u"a")
+        self.assertEqual(result.url, u"a")
+        self.assertEqual(result.warnings, [])
+        self.assertEqual(cache.cache.keys(), [u"a"])
+        # adding a spilled result again does not count twice
+        cache.add_result(u"b", get_result(u"b"))
+        self.assertEqual(len(cache), 2)
+        tmpdir = cache.disk.tmpdir
+        cache.close()
+        self.assertFalse(os.path.exists(tmpdir))
+
+
+class TestBloomFilter (unittest.TestCase):
+
+    def test_add (self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        digests = [get_key_digest(u"http://example.org/%d" % i)
+                   for i in range(1000)]
+        for digest in digests:
+            bloom.add(digest)
+        # no false negatives
+        for digest in digests:
+            self.assertTrue(digest in bloom)
+            self.assertFalse(bloom.add(digest))
+        others = [get_key_digest(u"http://example.com/%d" % i)
+                  for i in range(1000)]
+        false_positives = len([x for x in others if x in bloom])
+        self.assertTrue(false_positives < 50, false_positives)
@@ -0,0 +1,85 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test shared result strings.
+"""
+
+import unittest
+import cPickle as pickle
+from linkcheck.cache.strings import StringTable
+from linkcheck.checker.urlbase import CompactUrlData, urlDataAttr
+
+
+def get_result (url, parent_url):
+    """Return a compact result for the given URL."""
+    wire = dict((attr, None) for attr in urlDataAttr)
+    wire.update(url=url, cache_url=url, parent_url=parent_url,
+        warnings=[], valid=True)
+    return CompactUrlData(wire)
+
+
+class TestStringTable (unittest.TestCase):
+
+    def test_intern (self):
+        table = StringTable()
+        s = u"http://example.org/"
+        self.assertTrue(table.intern(s) is s)
+        self.assertTrue(table.intern(u"http://example.org" + u"/") is s)
+        self.assertEqual(table.intern(None), None)
+
+    def test_types (self):
+        # equal str and unicode strings are shared separately
+        table = StringTable()
+        s = u"http://example.org/"
+        table.intern(s)
+        b = "http://example.org/"
+        self.assertTrue(table.intern(b) is b)
+        self.assertTrue(type(table.intern("http://example.org/")) is str)
+        self.assertTrue(type(table.intern(u"http://example.org/")) is unicode)
+
+    def test_max_size (self):
+        table = StringTable(max_size=2)
+        for s in (u"a", u"b", u"c"):
+            table.intern(s)
+        self.assertEqual(len(table), 1)
+
+
+class TestResultStrings (unittest.TestCase):
+
+    def test_shared (self):
+        parent = get_result(u"http://example.org/", None)
+        child1 = get_result(u"http://example.org/a", u"http://example.org/")
+        child2 = get_result(u"http://example.org/b",
+            u"".join([u"http://example.org", u"/"]))
+        self.assertTrue(child1.parent_url is parent.url)
+        self.assertTrue(child2.parent_url is parent.url)
+
+    def test_pickle (self):
+        result = get_result(u"http://example.org/a", u"http://example.org/")
+        copy = pickle.loads(pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+        for attr in urlDataAttr:
+            self.assertEqual(getattr(copy, attr), getattr(result, attr))
+        self.assertTrue(copy.parent_url is result.parent_url)
+
+    def test_old_state (self):
+        result = get_result(u"http://example.org/a", u"http://example.org/")
+        state = (None, dict((attr, getattr(result, attr))
+                            for attr in urlDataAttr))
+        copy = CompactUrlData.__new__(CompactUrlData)
+        copy.__setstate__(state)
+        self.assertEqual(copy.url, result.url)
+        self.assertTrue(copy.cache_url is result.cache_url)
@@ -0,0 +1,203 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test URL queue routines.
+"""
+
+import unittest
+from linkcheck.cache.urlqueue import UrlQueue, Empty
+from linkcheck.cache.results import ResultCache
+from linkcheck.cache.hosts import HostScheduler
+
+
+class Aggregate (object):
+    """Provide the result cache needed by the URL queue."""
+
+    def __init__ (self):
+        self.result_cache = ResultCache()
+
+
+class UrlData (object):
+    """Minimal URL data as seen by the URL queue."""
+
+    def __init__ (self, url, aggregate, has_result=False):
+        self.url = url
+        self.cache_url = url
+        if "://" in url:
+            self.urlparts = [url.split(":", 1)[0], url.split("/")[2]]
+        else:
+            self.urlparts = None
+        self.aggregate = aggregate
+        self.has_result = has_result
+
+    def is_http (self):
+        return self.url.startswith(("http:", "https:"))
+
+
+class Journal (object):
+    """Record journal calls and check that the queue is not locked."""
+
+    def __init__ (self, urlqueue):
+        self.urlqueue = urlqueue
+        self.records = []
+
+    def add_url (self, url_data):
+        assert not self.urlqueue.mutex.locked()
+        self.records.append(("url", url_data.url))
+
+    def url_done (self, url_data):
+        assert not self.urlqueue.mutex.locked()
+        self.records.append(("done", url_data.url))
+
+
+class TestUrlQueue (unittest.TestCase):
+
+    def setUp (self):
+        self.aggregate = Aggregate()
+        self.scheduler = HostScheduler(1)
+        self.urlqueue = UrlQueue(host_scheduler=self.scheduler)
+        self.aggregate.result_cache.add_listener(self.urlqueue.move_cached)
+
+    def put (self, url, **kwargs):
+        url_data = UrlData(url, self.aggregate, **kwargs)
+        self.urlqueue.put(url_data)
+        return url_data
+
+    def get (self):
+        url_data = self.urlqueue.get(timeout=0.1)
+        self.urlqueue.task_done(url_data)
+        return url_data.url
+
+    def test_fifo (self):
+        self.put("http://example.org/a")
+        self.put("http://example.com/b")
+        self.assertEqual(self.get(), "http://example.org/a")
+        self.assertEqual(self.get(), "http://example.com/b")
+        self.assertTrue(self.urlqueue.empty())
+
+    def test_skip_busy_host (self):
+        self.scheduler.reserve("example.org")
+        self.put("http://example.org/a")
+        self.put("http://example.com/b")
+        self.put("mailto:calvin@example.org")
+        self.assertEqual(self.get(), "http://example.com/b")
+        self.assertEqual(self.get(), "mailto:calvin@example.org")
+        self.assertEqual(self.urlqueue.qsize(), 1)
+
+    def test_many_busy_hosts (self):
+        # a ready host is found behind any number of busy hosts
+        for i in range(150):
+            host = "example%d.org" % i
+            self.scheduler.reserve(host)
+            self.put("http://%s/" % host)
+        self.put("http://example.com/b")
+        self.assertEqual(self.get(), "http://example.com/b")
+
+    def test_wait_for_busy_host (self):
+        self.scheduler.reserve("example.org")
+        self.put("http://example.org/a")
+        self.assertRaises(Empty, self.urlqueue.get, timeout=0)
+        self.scheduler.times["example.org"] = 0
+        self.assertEqual(self.get(), "http://example.org/a")
+
+    def test_round_robin (self):
+        self.put("http://example.org/a")
+        self.put("http://example.org/b")
+        self.put("http://example.com/c")
+        self.assertEqual(self.get(), "http://example.org/a")
+        self.assertEqual(self.get(), "http://example.com/c")
+        self.scheduler.times.clear()
+        self.assertEqual(self.get(), "http://example.org/b")
+
+    def test_max_host_connections (self):
+        self.urlqueue.max_host_connections = 1
+        self.put("http://example.org/a")
+        self.put("http://example.org/b")
+        url_data = self.urlqueue.get(timeout=0)
+        self.scheduler.times.clear()
+        self.assertRaises(Empty, self.urlqueue.get, timeout=0)
+        self.urlqueue.task_done(url_data)
+        self.assertEqual(self.get(), "http://example.org/b")
+        self.assertEqual(self.urlqueue.host_in_progress, {})
+
+    def test_cached_first (self):
+        self.put("http://example.org/a")
+        self.put("http://example.org/b", has_result=True)
+        self.assertEqual(self.get(), "http://example.org/b")
+        self.assertEqual(self.urlqueue.status(), (1, 0, 1))
+
+    def test_move_cached (self):
+        self.scheduler.reserve("example.org")
+        self.put("http://example.org/a")
+        self.put("http://example.org/b")
+        self.put("http://example.org/a")
+        self.assertRaises(Empty, self.urlqueue.get, timeout=0)
+        self.aggregate.result_cache.add_result(u"http://example.org/a", None)
+        self.assertEqual(self.get(), "http://example.org/a")
+        self.assertEqual(self.get(), "http://example.org/a")
+        self.assertEqual(self.urlqueue.qsize(), 1)
+        self.assertEqual(self.urlqueue.waiting.keys(), ["http://example.org/b"])
+
+    def test_waiting (self):
+        self.put("http://example.org/a")
+        self.put("http://example.org/a")
+        self.get()
+        self.assertEqual(self.urlqueue.waiting.keys(), ["http://example.org/a"])
+        self.scheduler.times.clear()
+        # the URLs get no cached result
+        self.get()
+        self.assertEqual(self.urlqueue.waiting, {})
+
+    def test_seen (self):
+        self.urlqueue.max_seen_urls = 2
+        for url in (u"http://example.org/a", u"http://example.org/b"):
+            self.urlqueue.add_seen(url, url)
+        self.assertEqual(self.urlqueue.get_seen(u"http://example.org/a"),
+            u"http://example.org/a")
+        self.urlqueue.add_seen(u"http://example.org/c", u"http://example.org/c")
+        # the oldest seen URL is forgotten
+        self.assertEqual(self.urlqueue.get_seen(u"http://example.org/a"), None)
+        self.assertEqual(self.urlqueue.get_seen(u"http://example.org/b"),
+            u"http://example.org/b")
+        self.assertEqual(len(self.urlqueue.seen), 2)
+
+    def test_journal (self):
+        self.urlqueue.journal = Journal(self.urlqueue)
+        self.urlqueue.max_allowed_urls = 1
+        self.put("http://example.org/a")
+        # not queued URLs are recorded as finished
+        self.put("http://example.org/b")
+        self.get()
+        self.assertEqual(self.urlqueue.journal.records, [
+            ("url", "http://example.org/a"),
+            ("url", "http://example.org/b"),
+            ("done", "http://example.org/b"),
+            ("done", "http://example.org/a"),
+        ])
+
+
+class TestHostScheduler (unittest.TestCase):
+
+    def test_reserve (self):
+        scheduler = HostScheduler(1)
+        self.assertTrue(scheduler.is_due("example.org"))
+        self.assertEqual(scheduler.reserve("example.org"), 0)
+        self.assertFalse(scheduler.is_due("example.org"))
+        self.assertTrue(scheduler.is_due("example.com"))
+        # a second request to the same host gets a later slot
+        self.assertTrue(scheduler.reserve("example.org") > 0)
+        self.assertEqual(len(scheduler), 1)
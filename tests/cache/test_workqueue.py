@@ -0,0 +1,132 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test work queue routines.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from linkcheck.cache import workqueue
+from linkcheck.cache.urlqueue import Empty
+
+
+class WorkQueueTest (object):
+    """Tests for all work queue implementations."""
+
+    def test_put_get (self):
+        # an empty queue is finished
+        self.assertTrue(self.work_queue.is_finished())
+        self.assertTrue(self.work_queue.put(u"http://example.org/", (1, 2)))
+        self.assertFalse(self.work_queue.put(u"http://example.org/", (3,)))
+        self.assertTrue(self.work_queue.put(u"http://example.com/", (4,)))
+        key, args = self.work_queue.get(timeout=0)
+        self.assertEqual(key, u"http://example.org/")
+        self.assertEqual(args, (1, 2))
+        self.work_queue.task_done(key)
+        self.assertFalse(self.work_queue.is_finished())
+        key, args = self.work_queue.get(timeout=0)
+        self.assertRaises(Empty, self.work_queue.get, timeout=0)
+        self.assertFalse(self.work_queue.is_finished())
+        self.work_queue.task_done(key)
+        self.assertTrue(self.work_queue.is_finished())
+        # finished tasks are not added again
+        self.assertFalse(self.work_queue.put(u"http://example.com/", (4,)))
+
+    def test_links (self):
+        self.work_queue.put(u"http://example.org/", (1,))
+        self.work_queue.put(u"http://example.org/", (2,))
+        self.work_queue.put(u"http://example.com/", (3,))
+        key, args = self.work_queue.get(timeout=0)
+        self.assertEqual(self.work_queue.get_links(), [])
+        self.work_queue.task_done(key, u"result")
+        self.assertEqual(self.work_queue.get_links(), [((2,), u"result")])
+        self.assertEqual(self.work_queue.get_links(), [])
+        # links added after the task is finished
+        self.work_queue.put(u"http://example.org/", (4,))
+        self.assertEqual(self.work_queue.get_links(), [((4,), u"result")])
+        # links of tasks without result are dropped
+        self.work_queue.put(u"http://example.com/", (5,))
+        key, args = self.work_queue.get(timeout=0)
+        self.work_queue.task_done(key)
+        self.assertEqual(self.work_queue.get_links(), [])
+        self.assertTrue(self.work_queue.is_finished())
+
+    def test_lease (self):
+        self.work_queue.put(u"http://example.org/", (1,))
+        lease_secs = workqueue.TASK_LEASE_SECS
+        workqueue.TASK_LEASE_SECS = -1
+        try:
+            key, args = self.work_queue.get(timeout=0)
+        finally:
+            workqueue.TASK_LEASE_SECS = lease_secs
+        self.assertFalse(self.work_queue.is_finished())
+        # the task of a crashed worker is pending again
+        self.assertEqual(self.work_queue.get(timeout=0), (key, args))
+        self.assertRaises(Empty, self.work_queue.get, timeout=0)
+        self.work_queue.task_done(key, u"result")
+        self.assertTrue(self.work_queue.is_finished())
+
+    def test_results (self):
+        self.assertEqual(self.work_queue.get_results(timeout=0), [])
+        self.work_queue.add_result(u"a")
+        self.work_queue.add_result(u"b")
+        self.assertEqual(self.work_queue.get_results(timeout=0), [u"a", u"b"])
+        self.assertEqual(self.work_queue.get_results(timeout=0), [])
+
+    def test_info (self):
+        self.assertEqual(self.work_queue.get_info("internlinks"), None)
+        self.work_queue.set_info("internlinks", [u"example"])
+        self.assertEqual(self.work_queue.get_info("internlinks"), [u"example"])
+
+
+class TestMemoryWorkQueue (WorkQueueTest, unittest.TestCase):
+
+    def setUp (self):
+        self.work_queue = workqueue.MemoryWorkQueue()
+
+
+class TestSqliteWorkQueue (WorkQueueTest, unittest.TestCase):
+
+    def setUp (self):
+        self.tmpdir = tempfile.mkdtemp()
+        filename = os.path.join(self.tmpdir, "queue.sqlite")
+        self.work_queue = workqueue.SqliteWorkQueue(filename)
+
+    def tearDown (self):
+        self.work_queue.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_clear (self):
+        self.work_queue.put(u"a", (u"a",))
+        self.work_queue.get(timeout=0)
+        self.work_queue.task_done(u"a")
+        self.work_queue.set_info("internlinks", [])
+        self.assertTrue(self.work_queue.is_finished())
+        self.work_queue.clear()
+        self.assertEqual(self.work_queue.get_info("internlinks"), None)
+        self.assertTrue(self.work_queue.put(u"a", (u"a",)))
+
+
+class TestTcpWorkQueue (WorkQueueTest, unittest.TestCase):
+
+    def setUp (self):
+        server = workqueue.serve_work_queue(workqueue.MemoryWorkQueue(),
+            ("localhost", 0), "secret")
+        self.work_queue = workqueue.connect_work_queue(server.address,
+            "secret")
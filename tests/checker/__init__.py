@@ -113,7 +113,8 @@ def add_fileoutput_config (config):
     else:
         return
     for ftype in linkcheck.logger.LoggerNames:
-        if ftype in ('test', 'blacklist'):
+        # a SQLite database cannot be opened on the null device
+        if ftype in ('test', 'blacklist', 'sqlite'):
             continue
         logger = config.logger_new(ftype, fileoutput=1, filename=devnull)
         config['fileoutput'].append(logger)
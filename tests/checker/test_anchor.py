@@ -17,7 +17,9 @@
 """
 Test html anchor parsing and checking.
 """
-from . import LinkCheckTest
+from linkcheck.checker import get_url_from
+from linkcheck.checker.const import WARN_URL_ANCHOR_NOT_FOUND
+from . import LinkCheckTest, get_test_aggregate
 
 
 class TestAnchor (LinkCheckTest):
@@ -40,3 +42,41 @@ class TestAnchor (LinkCheckTest):
         ]
         self.direct(urlanchor, resultlines, confargs=confargs)
 
+    def test_cached_anchor (self):
+        confargs = {"enabledplugins": ["AnchorCheck"]}
+        url = u"file://%(curdir)s/%(datadir)s/anchor_links.html" % self.get_attrs()
+        nurl = self.norm(url)
+        anchorurl = self.norm(u"file://%(curdir)s/%(datadir)s/anchor.html" %
+                              self.get_attrs())
+        resultlines = [
+            u"url %s" % url,
+            u"cache key %s" % nurl,
+            u"real url %s" % nurl,
+            u"valid",
+            u"url anchor.html#myid%3A",
+            u"cache key %s" % anchorurl,
+            u"real url %s" % anchorurl,
+            u"name ok",
+            u"valid",
+            # checked with the cached anchors of the page
+            u"url anchor.html#broken",
+            u"cache key %s" % anchorurl,
+            u"real url %s" % anchorurl,
+            u"name broken",
+            u"warning Anchor `broken' not found. Available anchors: `myid:'.",
+            u"valid",
+        ]
+        self.direct(url, resultlines, recursionlevel=1, confargs=confargs)
+
+    def test_evicted_anchors (self):
+        # the cached warning is kept if the page anchors are not cached
+        confargs = {"enabledplugins": ["AnchorCheck"]}
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        url = u"file://%(curdir)s/%(datadir)s/anchor.html#broken" % \
+            self.get_attrs()
+        url_data = get_url_from(url, 0, aggregate)
+        result = url_data.to_wire()
+        warning = (WARN_URL_ANCHOR_NOT_FOUND, u"Anchor `broken' not found.")
+        result.warnings = [warning]
+        aggregate.plugin_manager.run_cached_result_plugins(url_data, result)
+        self.assertEqual(result.warnings, [warning])
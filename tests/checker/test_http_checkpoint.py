@@ -0,0 +1,107 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test resuming an interrupted check from a checkpoint journal.
+"""
+import os
+import shutil
+import tempfile
+import linkcheck.director
+from linkcheck.checker import get_url_from
+from linkcheck.director.checker import check_url
+from linkcheck.director.checkpoint import read_journal, Journal
+from . import get_test_aggregate
+from .httpserver import HttpServerTest
+
+
+class TestHttpCheckpoint (HttpServerTest):
+    """Test resuming HTTP link checking."""
+
+    def setUp (self):
+        super(TestHttpCheckpoint, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "checkpoint")
+
+    def tearDown (self):
+        shutil.rmtree(self.tmpdir)
+        super(TestHttpCheckpoint, self).tearDown()
+
+    def get_urls (self, aggregate):
+        """Get the logged real URLs."""
+        result = aggregate.config['logger'].result
+        return sorted(line for line in result if line.startswith(u"real url "))
+
+    def test_resume (self):
+        url = self.get_url(u"http_head.html")
+        confargs = {"checkpoint": self.filename}
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        aggregate.urlqueue.put(get_url_from(url, 0, aggregate, extern=(0, 0)))
+        aggregate.journal.set_internlinks(aggregate.config["internlinks"])
+        # check the start URL, then crash
+        aggregate.logger.start_log_output()
+        aggregate.add_request_session()
+        url_data = aggregate.urlqueue.get(timeout=0)
+        check_url(url_data, aggregate.logger)
+        aggregate.urlqueue.task_done(url_data)
+        aggregate.journal.close()
+        checkpoint = read_journal(self.filename)
+        self.assertEqual(len(checkpoint.urls), 2)
+        self.assertEqual(checkpoint.results.keys(), [url])
+        confargs["resume"] = True
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        self.assertTrue(aggregate.config["resume"])
+        self.assertEqual(aggregate.urlqueue.qsize(), 2)
+        linkcheck.director.check_urls(aggregate)
+        self.assertEqual(self.get_urls(aggregate), [
+            u"real url %s" % self.get_url(u"anchor.html"),
+            u"real url %s" % self.get_url(u"newurl.html"),
+        ])
+        self.assertEqual(len(aggregate.result_cache), 3)
+        self.assertFalse(os.path.exists(self.filename))
+
+    def test_damaged_journal (self):
+        url = self.get_url(u"http_head.html")
+        confargs = {"checkpoint": self.filename}
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        aggregate.urlqueue.put(get_url_from(url, 0, aggregate, extern=(0, 0)))
+        aggregate.journal.close()
+        with open(self.filename, "ab") as fd:
+            fd.write("\x80\x02(U")
+        checkpoint = read_journal(self.filename)
+        self.assertEqual(len(checkpoint.urls), 1)
+
+    def test_replace_journal (self):
+        journal = Journal(self.filename)
+        journal.set_internlinks([u"old"])
+        journal.close()
+        journal = Journal(self.filename)
+        journal.set_internlinks([u"new"])
+        journal._sync()
+        # the old journal is kept until the new one is committed
+        self.assertEqual(read_journal(self.filename).internlinks, [u"old"])
+        journal.commit()
+        self.assertFalse(os.path.exists(self.filename + ".tmp"))
+        self.assertEqual(read_journal(self.filename).internlinks, [u"new"])
+        journal.set_internlinks([u"newer"])
+        journal.close()
+        self.assertEqual(read_journal(self.filename).internlinks, [u"newer"])
+
+    def test_resume_without_journal (self):
+        confargs = {"checkpoint": self.filename, "resume": True}
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        self.assertFalse(aggregate.config["resume"])
+        self.assertTrue(aggregate.urlqueue.empty())
@@ -0,0 +1,97 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2004-2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test HEAD requests for HTTP URLs whose content is not needed.
+"""
+from .httpserver import HttpServerTest, NoQueryHttpRequestHandler
+
+
+class MethodHttpRequestHandler (NoQueryHttpRequestHandler):
+    """Handler remembering the request methods and optionally
+    refusing HEAD requests."""
+
+    # list of (method, path) tuples, not counting robots.txt
+    requests = []
+    # send 405 Method Not Allowed for HEAD requests
+    refuse_head = False
+
+    def add_request (self, method):
+        if not self.path.endswith("/robots.txt"):
+            self.requests.append((method, self.path.rsplit("/", 1)[1]))
+
+    def do_GET (self):
+        self.add_request("GET")
+        super(MethodHttpRequestHandler, self).do_GET()
+
+    def do_HEAD (self):
+        self.add_request("HEAD")
+        if self.refuse_head:
+            self.send_error(405)
+        else:
+            super(MethodHttpRequestHandler, self).do_HEAD()
+
+
+class TestHttpHead (HttpServerTest):
+    """Test request methods of HTTP link checking."""
+
+    def __init__ (self, methodName='runTest'):
+        super(TestHttpHead, self).__init__(methodName=methodName)
+        self.handler = MethodHttpRequestHandler
+
+    def setUp (self):
+        super(TestHttpHead, self).setUp()
+        MethodHttpRequestHandler.requests = []
+        MethodHttpRequestHandler.refuse_head = False
+
+    def get_resultlines (self, url):
+        resultlines = [
+            u"url %s" % url,
+            u"cache key %s" % url,
+            u"real url %s" % url,
+            u"valid",
+        ]
+        for name in (u"anchor", u"newurl"):
+            child = self.get_url(u"%s.html" % name)
+            resultlines.extend([
+                u"url %s.html" % name,
+                u"cache key %s" % child,
+                u"real url %s" % child,
+                u"name %s" % name,
+                u"valid",
+            ])
+        return resultlines
+
+    def test_head (self):
+        url = self.get_url(u"http_head.html")
+        self.direct(url, self.get_resultlines(url), recursionlevel=1)
+        self.assertEqual(MethodHttpRequestHandler.requests, [
+            ("GET", "http_head.html"),
+            ("HEAD", "anchor.html"),
+            ("HEAD", "newurl.html"),
+        ])
+
+    def test_head_refused (self):
+        MethodHttpRequestHandler.refuse_head = True
+        url = self.get_url(u"http_head.html")
+        self.direct(url, self.get_resultlines(url), recursionlevel=1)
+        # after the first refused HEAD request only GET is used
+        self.assertEqual(MethodHttpRequestHandler.requests, [
+            ("GET", "http_head.html"),
+            ("HEAD", "anchor.html"),
+            ("GET", "anchor.html"),
+            ("GET", "newurl.html"),
+        ])
@@ -0,0 +1,70 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2004-2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test checking with several processes.
+"""
+import linkcheck.director
+from linkcheck.director import shards
+from linkcheck.checker import get_url_from
+from . import get_test_aggregate
+from .httpserver import HttpServerTest
+
+
+class TestHttpProcesses (HttpServerTest):
+    """Test HTTP link checking with several processes."""
+
+    def test_processes (self):
+        url = self.get_url(u"http_head.html")
+        confargs = {"processes": 2, "recursionlevel": 1}
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        url_data = get_url_from(url, 0, aggregate, extern=(0, 0))
+        aggregate.urlqueue.put(url_data)
+        linkcheck.director.check_urls(aggregate)
+        result = aggregate.config['logger'].result
+        urls = [line for line in result if line.startswith(u"real url ")]
+        self.assertEqual(sorted(urls), [
+            u"real url %s" % self.get_url(u"anchor.html"),
+            u"real url %s" % url,
+            u"real url %s" % self.get_url(u"newurl.html"),
+        ])
+        self.assertEqual(result.count(u"valid"), 3)
+        self.assertEqual(len(aggregate.result_cache), 3)
+
+    def test_max_urls (self):
+        url = self.get_url(u"http_head.html")
+        confargs = {"processes": 2, "recursionlevel": 1, "maxnumurls": 2}
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        url_data = get_url_from(url, 0, aggregate, extern=(0, 0))
+        aggregate.urlqueue.put(url_data)
+        linkcheck.director.check_urls(aggregate)
+        result = aggregate.config['logger'].result
+        urls = [line for line in result if line.startswith(u"real url ")]
+        self.assertTrue(1 <= len(urls) <= 2, urls)
+        self.assertTrue(len(aggregate.result_cache) <= 2)
+
+    def test_get_max_urls (self):
+        self.assertEqual(shards.get_max_urls(None, 0, 2), None)
+        self.assertEqual([shards.get_max_urls(5, shard, 2)
+                          for shard in range(2)], [3, 2])
+
+    def test_max_run_seconds (self):
+        confargs = {"processes": 2, "maxrunseconds": 1}
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        monitor = shards.ShardMonitor(aggregate, 2)
+        monitor.check(1)
+        monitor.start_time -= 2
+        self.assertRaises(KeyboardInterrupt, monitor.check, 1)
@@ -0,0 +1,129 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2004-2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test revalidation of HTTP pages stored by a previous run.
+"""
+import os
+import shutil
+import tempfile
+from .httpserver import HttpServerTest, NoQueryHttpRequestHandler
+
+ETAG = '"linkchecker-test"'
+
+
+class ETagHttpRequestHandler (NoQueryHttpRequestHandler):
+    """Handler sending an ETag header and answering matching
+    conditional requests with 304 Not Modified."""
+
+    # number of sent page contents, not counting robots.txt
+    num_contents = 0
+
+    def do_GET (self):
+        """Send 304 if the ETag matches, else the file."""
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+        else:
+            if not self.path.endswith("/robots.txt"):
+                ETagHttpRequestHandler.num_contents += 1
+            super(ETagHttpRequestHandler, self).do_GET()
+
+    def end_headers (self):
+        """Add ETag header."""
+        self.send_header("ETag", ETAG)
+        super(ETagHttpRequestHandler, self).end_headers()
+
+
+class TestHttpRevalidate (HttpServerTest):
+    """Test checking with a persistent result cache."""
+
+    def __init__ (self, methodName='runTest'):
+        super(TestHttpRevalidate, self).__init__(methodName=methodName)
+        self.handler = ETagHttpRequestHandler
+
+    def setUp (self):
+        super(TestHttpRevalidate, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown (self):
+        shutil.rmtree(self.tmpdir)
+        super(TestHttpRevalidate, self).tearDown()
+
+    def get_resultlines (self, url, child, info=None):
+        page = [
+            u"url %s" % url,
+            u"cache key %s" % url,
+            u"real url %s" % url,
+        ]
+        if info:
+            page.append(u"info %s" % info)
+        page.append(u"valid")
+        link = [
+            u"url anchor.html",
+            u"cache key %s" % child,
+            u"real url %s" % child,
+            u"name anchor",
+        ]
+        if info:
+            link.append(u"info %s" % info)
+        link.append(u"valid")
+        return page + link
+
+    def test_revalidate (self):
+        url = self.get_url(u"http_revalidate.html")
+        child = self.get_url(u"anchor.html")
+        confargs = {
+            "persistentcache": os.path.join(self.tmpdir, "results.sqlite"),
+            # check all URLs with conditional GET requests
+            "headrequests": False,
+        }
+        ETagHttpRequestHandler.num_contents = 0
+        resultlines = self.get_resultlines(url, child)
+        self.direct(url, resultlines, recursionlevel=1, confargs=confargs)
+        self.assertEqual(ETagHttpRequestHandler.num_contents, 2)
+        info = u"Content not modified since the last check."
+        resultlines = self.get_resultlines(url, child, info=info)
+        self.direct(url, resultlines, recursionlevel=1, confargs=confargs)
+        self.assertEqual(ETagHttpRequestHandler.num_contents, 2)
+
+    def test_revalidate_anchor (self):
+        # the anchor of an unchanged page is checked with the stored anchors
+        url = self.get_url(u"anchor.html")
+        confargs = {
+            "persistentcache": os.path.join(self.tmpdir, "results.sqlite"),
+            "headrequests": False,
+            "enabledplugins": ["AnchorCheck"],
+        }
+        ETagHttpRequestHandler.num_contents = 0
+        resultlines = [
+            u"url %s#myid%%3A" % url,
+            u"cache key %s" % url,
+            u"real url %s#myid%%3A" % url,
+            u"valid",
+        ]
+        self.direct(url + u"#myid%3A", resultlines, confargs=confargs)
+        self.assertEqual(ETagHttpRequestHandler.num_contents, 1)
+        resultlines = [
+            u"url %s#broken" % url,
+            u"cache key %s" % url,
+            u"real url %s#broken" % url,
+            u"info Content not modified since the last check.",
+            u"warning Anchor `broken' not found. Available anchors: `myid:'.",
+            u"valid",
+        ]
+        self.direct(url + u"#broken", resultlines, confargs=confargs)
+        self.assertEqual(ETagHttpRequestHandler.num_contents, 1)
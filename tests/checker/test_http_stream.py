@@ -0,0 +1,45 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test parsing HTML content while it is downloaded.
+"""
+import hashlib
+from linkcheck.checker import get_url_from
+from . import get_test_aggregate
+from .httpserver import HttpServerTest
+
+
+class TestHttpStream (HttpServerTest):
+    """Test streaming HTML parsing."""
+
+    def test_stream (self):
+        aggregate = get_test_aggregate({}, {"expected": []})
+        aggregate.add_request_session()
+        url = self.get_url(u"http_head.html")
+        url_data = get_url_from(url, 0, aggregate, extern=(0, 0))
+        url_data.check()
+        self.assertTrue(url_data.check_content())
+        # the content has been parsed without keeping it in memory
+        self.assertEqual(url_data.data, None)
+        with open("tests/checker/data/http_head.html", "rb") as fd:
+            data = fd.read()
+        self.assertEqual(url_data.size, len(data))
+        self.assertEqual(url_data.get_content_hash(),
+            hashlib.sha1(data).hexdigest())
+        links = [link[0] for link in url_data.get_html_content().links]
+        self.assertEqual(links, [u"anchor.html", u"newurl.html"])
+        url_data.close_connection()
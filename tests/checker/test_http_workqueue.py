@@ -0,0 +1,107 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2004-2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test checking with workers sharing a work queue.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import linkcheck.director
+from linkcheck.director import distributed
+from linkcheck.checker import get_url_from
+from . import get_test_aggregate
+from .httpserver import HttpServerTest
+
+
+class TestHttpWorkQueue (HttpServerTest):
+    """Test HTTP link checking with a worker."""
+
+    def setUp (self):
+        super(TestHttpWorkQueue, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown (self):
+        shutil.rmtree(self.tmpdir)
+        super(TestHttpWorkQueue, self).tearDown()
+
+    def check_with_worker (self, url):
+        """Check given URL with one worker and return the coordinator
+        log lines."""
+        queue = "sqlite:%s" % os.path.join(self.tmpdir, "queue.sqlite")
+        confargs = {"workqueue": queue, "worker": True}
+        worker = get_test_aggregate(confargs, {"expected": []})
+        t = threading.Thread(target=linkcheck.director.check_urls,
+            args=(worker,))
+        t.start()
+        confargs = {"workqueue": queue}
+        aggregate = get_test_aggregate(confargs, {"expected": []})
+        url_data = get_url_from(url, 0, aggregate, extern=(0, 0))
+        aggregate.urlqueue.put(url_data)
+        linkcheck.director.check_urls(aggregate)
+        t.join()
+        self.assertEqual(worker.config['logger'].result, [])
+        self.queue = queue
+        return aggregate.config['logger'].result
+
+    def test_workqueue (self):
+        url = self.get_url(u"http_head.html")
+        result = self.check_with_worker(url)
+        urls = [line for line in result if line.startswith(u"real url ")]
+        self.assertEqual(sorted(urls), [
+            u"real url %s" % self.get_url(u"anchor.html"),
+            u"real url %s" % url,
+            u"real url %s" % self.get_url(u"newurl.html"),
+        ])
+        self.assertEqual(result.count(u"valid"), 3)
+
+    def test_reuse_finished_queue (self):
+        self.check_with_worker(self.get_url(u"http_head.html"))
+        aggregate = get_test_aggregate({"workqueue": self.queue},
+            {"expected": []})
+        work_queue = distributed.get_work_queue(aggregate.config)
+        self.assertEqual(work_queue.get_info("started"), None)
+        self.assertEqual(work_queue.get_results(timeout=0), [])
+        work_queue.close()
+
+    def test_duplicate_links (self):
+        # each link to the same URL is logged, but the URL is checked once
+        url = self.get_url(u"http_duplicates.html")
+        result = self.check_with_worker(url)
+        urls = [line for line in result if line.startswith(u"real url ")]
+        self.assertEqual(sorted(urls), [
+            u"real url %s" % self.get_url(u"anchor.html"),
+            u"real url %s" % self.get_url(u"anchor.html"),
+            u"real url %s" % url,
+        ])
+        self.assertEqual(result.count(u"valid"), 3)
+        names = [line for line in result if line.startswith(u"name ")]
+        self.assertEqual(sorted(names), [u"name again", u"name anchor"])
+        conn = sqlite3.connect(self.queue[7:])
+        try:
+            num_tasks = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(num_tasks, 2)
+
+    def test_empty (self):
+        # a coordinator without URLs does not wait for workers
+        queue = "sqlite:%s" % os.path.join(self.tmpdir, "queue.sqlite")
+        aggregate = get_test_aggregate({"workqueue": queue}, {"expected": []})
+        linkcheck.director.check_urls(aggregate)
+        self.assertEqual(aggregate.config['logger'].result, [])
@@ -56,6 +56,10 @@ class TestConfig (unittest.TestCase):
         self.assertEqual(config["maxrunseconds"], 1)
         self.assertEqual(config["maxfilesizeparse"], 100)
         self.assertEqual(config["maxfilesizedownload"], 100)
+        self.assertEqual(config["maxcachedurls"], 50)
+        self.assertEqual(config["maxcachememory"], 4096)
+        self.assertTrue(config["cachetodisk"])
+        self.assertEqual(config["htmlparser"], "regex")
         # filtering section
         patterns = [x["pattern"].pattern for x in config["externlinks"]]
         for prefix in ("ignore_", "nofollow_"):
@@ -14,3 +14,35 @@
 # You should have received a copy of the GNU General Public License along
 # with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Support classes for logger tests.
+"""
+
+
+class UrlData (object):
+    """Transport object of a checked URL with the attributes used by
+    the loggers. Keyword arguments replace the default values."""
+
+    def __init__ (self, url, **kwargs):
+        self.url = self.base_url = self.cache_url = url
+        self.parent_url = u"http://example.org/"
+        self.base_ref = u""
+        self.domain = u"example.org"
+        self.valid = True
+        self.extern = False
+        self.result = u"200 OK"
+        self.warnings = [(u"http-empty-content", u"Empty content")]
+        self.info = []
+        self.line = 1
+        self.column = 2
+        self.page = None
+        self.name = u"a'b"
+        self.title = None
+        self.checktime = 0.5
+        self.dltime = 1.25
+        self.size = 42
+        self.level = 1
+        self.modified = None
+        self.content_type = u"text/html"
+        for name, value in kwargs.items():
+            setattr(self, name, value)
@@ -0,0 +1,96 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the binary logger and result reader.
+"""
+import unittest
+import os
+import shutil
+import datetime
+import tempfile
+from linkcheck.logger import binlog
+from . import UrlData
+
+
+class TestBinaryLogger (unittest.TestCase):
+
+    def setUp (self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "links.bin")
+
+    def tearDown (self):
+        shutil.rmtree(self.tmpdir)
+
+    def write_results (self, urls):
+        logger = binlog.BinaryLogger(filename=self.filename,
+            fileoutput=1)
+        logger.start_output()
+        for url_data in urls:
+            logger.log_filter_url(url_data, True)
+        logger.end_output()
+
+    def test_results (self):
+        url_data = UrlData(u"http://example.org/\u20ac", info=[u"\xe4 info"])
+        url_data.modified = datetime.datetime(2014, 3, 1, 12, 30, 5, 123456)
+        self.write_results([url_data, UrlData(u"http://example.org/a",
+            valid=False)])
+        results = list(binlog.iter_results(self.filename))
+        self.assertEqual(len(results), 2)
+        result = results[0]
+        for name in ("url", "parent_url", "base_ref", "base_url", "domain",
+                     "cache_url", "valid", "extern", "result", "warnings",
+                     "info", "line", "column", "name", "title", "checktime",
+                     "dltime", "size", "level", "modified", "content_type"):
+            self.assertEqual(getattr(result, name), getattr(url_data, name),
+                name)
+        self.assertEqual(result.page, -1)
+        self.assertFalse(results[1].valid)
+        self.assertEqual(results[1].modified, None)
+
+    def test_columns (self):
+        self.write_results([UrlData(u"http://example.org/%d" % i,
+            valid=i % 3, size=i) for i in range(1000)])
+        columns = binlog.read_columns(self.filename, ["valid", "size"])
+        self.assertEqual(sorted(columns.keys()), ["size", "valid"])
+        self.assertEqual(columns["valid"].count(0), 334)
+        self.assertEqual(sum(columns["size"]), 499500)
+        columns = binlog.read_columns(self.filename)
+        self.assertEqual(len(columns), len(binlog.NumericColumns))
+        self.assertEqual(list(columns["dltime"][:2]), [1.25, 1.25])
+
+    def test_record_blocks (self):
+        url_data = UrlData(u"http://example.org/" + u"x" * 1000)
+        self.write_results([url_data] * 5)
+        read_size = binlog.READ_SIZE
+        binlog.READ_SIZE = 100
+        try:
+            results = list(binlog.iter_results(self.filename))
+        finally:
+            binlog.READ_SIZE = read_size
+        self.assertEqual([x.url for x in results], [url_data.url] * 5)
+
+    def test_invalid (self):
+        self.assertRaises(ValueError, binlog.read_columns, self.filename,
+            ["url"])
+        with open(self.filename, "wb") as fd:
+            fd.write(b"LCBIN\x01\xff\x00\x00\x00")
+        self.assertRaises(ValueError, list,
+            binlog.iter_results(self.filename))
+        with open(self.filename, "wb") as fd:
+            fd.write(b"<?xml")
+        self.assertRaises(ValueError, list,
+            binlog.iter_results(self.filename))
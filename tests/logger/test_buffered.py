@@ -0,0 +1,111 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test buffered log output and the log writer thread.
+"""
+import unittest
+import threading
+from linkcheck.logger import _Logger
+from linkcheck.director import logger
+from . import UrlData
+
+
+class FlushCounter (object):
+    """File descriptor counting written data and flushes."""
+
+    def __init__ (self):
+        self.data = []
+        self.flushed = 0
+
+    def write (self, s):
+        self.data.append(s)
+
+    def flush (self):
+        self.flushed = len(self.data)
+
+
+class UrlLogger (_Logger):
+    """Write URLs one per line."""
+
+    LoggerName = "testurls"
+
+    def __init__ (self, **kwargs):
+        super(UrlLogger, self).__init__(**kwargs)
+        self.init_fileoutput(kwargs)
+        self.threads = set()
+        self.ended = False
+
+    def log_url (self, url_data):
+        self.threads.add(threading.current_thread().getName())
+        self.writeln(url_data.url)
+
+    def end_output (self, **kwargs):
+        self.ended = True
+        self.close_fileoutput()
+
+
+class TestBufferedLogger (unittest.TestCase):
+
+    def test_flush_size (self):
+        fd = FlushCounter()
+        log = UrlLogger(fd=fd, flushinterval=60, flushsize=20)
+        log.start_output()
+        for i in range(10):
+            log.log_filter_url(UrlData(u"http://example.org/%d" % i), True)
+        # the size triggers a flush for each URL
+        self.assertEqual(fd.flushed, 10)
+
+    def test_flush_interval (self):
+        fd = FlushCounter()
+        log = UrlLogger(fd=fd, flushinterval=60, flushsize=1000)
+        log.start_output()
+        for i in range(10):
+            log.log_filter_url(UrlData(u"http://example.org/%d" % i), True)
+        self.assertEqual(fd.flushed, 0)
+        log.flush_time -= 60
+        log.check_flush()
+        self.assertEqual(fd.flushed, 10)
+        log = UrlLogger(fd=fd, flushinterval=0)
+        log.log_filter_url(UrlData(u"http://example.org/"), True)
+        self.assertEqual(fd.flushed, 11)
+
+
+class TestLogWriter (unittest.TestCase):
+
+    def get_logger (self):
+        fd = FlushCounter()
+        config = dict(logger=UrlLogger(fd=fd, flushinterval=60),
+            fileoutput=[], verbose=True, warnings=True, flushinterval=1)
+        return logger.Logger(config), fd
+
+    def test_writer (self):
+        aggregate_logger, fd = self.get_logger()
+        aggregate_logger.start_log_output()
+        urls = [u"http://example.org/%d" % i for i in range(100)]
+        for url in urls:
+            aggregate_logger.log_url(UrlData(url))
+        aggregate_logger.end_log_output()
+        log = aggregate_logger.loggers[0]
+        self.assertTrue(log.ended)
+        self.assertEqual(log.threads, set(["LogWriter"]))
+        self.assertEqual([s.rstrip() for s in fd.data[-100:]], urls)
+        self.assertEqual(fd.flushed, len(fd.data))
+
+    def test_without_writer (self):
+        aggregate_logger, fd = self.get_logger()
+        aggregate_logger.log_url(UrlData(u"http://example.org/"))
+        self.assertEqual(fd.data[0].rstrip(), u"http://example.org/")
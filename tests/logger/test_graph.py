@@ -0,0 +1,86 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the graph loggers.
+"""
+import unittest
+from StringIO import StringIO
+from linkcheck.logger.dot import DOTLogger
+from linkcheck.logger.gml import GMLLogger
+from linkcheck.logger.gxml import GraphXMLLogger
+from . import UrlData
+
+
+def get_url (url, parent_url, title, valid=True):
+    """Return a checked URL with given title."""
+    return UrlData(url, parent_url=parent_url, title=title,
+        name=u"link to %s" % title, valid=valid, warnings=[])
+
+
+def log_graph (logger_class):
+    """Log a small graph and return the logger output."""
+    fd = StringIO()
+    logger = logger_class(fd=fd, parts=["realurl", "result"])
+    logger.start_output()
+    urls = [
+        # child logged before its parent
+        get_url(u"http://example.org/a", u"http://example.org/", u"A"),
+        get_url(u"http://example.org/", None, u"Start"),
+        get_url(u"http://example.org/b", u"http://example.org/", u"B"),
+        get_url(u"http://example.org/b", u"http://example.org/a", u"B"),
+        # parent is not a node
+        get_url(u"http://example.org/c", u"http://example.org/x", u"C"),
+        get_url(u"http://example.org/x", u"http://example.org/", u"X",
+            valid=False),
+    ]
+    for url_data in urls:
+        logger.log_filter_url(url_data, True)
+    logger.end_output()
+    return fd.getvalue()
+
+
+class TestGraphLogger (unittest.TestCase):
+
+    def test_dot (self):
+        output = log_graph(DOTLogger)
+        self.assertEqual(output.count(u"->"), 2)
+        self.assertTrue(u'"Start" -> "A" [' in output)
+        self.assertTrue(u'"Start" -> "B" [' in output)
+        self.assertTrue(output.rstrip().endswith(u"}"))
+
+    def test_gml (self):
+        output = log_graph(GMLLogger)
+        self.assertEqual(output.count(u"  node ["), 4)
+        self.assertEqual(output.count(u"  edge ["), 2)
+        self.assertTrue(u"source 1\n    target 0\n" in output)
+        self.assertTrue(u"source 1\n    target 2\n" in output)
+
+    def test_gxml (self):
+        output = log_graph(GraphXMLLogger)
+        self.assertEqual(output.count(u"<node "), 4)
+        self.assertTrue(u'<edge source="1" target="0">' in output)
+        self.assertTrue(u'<edge source="1" target="2">' in output)
+        self.assertTrue(output.index(u"<edge ") < output.index(u"</graph>"))
+
+    def test_close (self):
+        logger = GMLLogger(fd=StringIO())
+        logger.start_output()
+        logger.log_filter_url(get_url(u"http://example.org/", None,
+            u"Start"), True)
+        logger.end_output()
+        self.assertEqual(logger.nodes, {})
+        self.assertEqual(logger.edges, None)
@@ -0,0 +1,117 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the sitemap logger.
+"""
+import unittest
+import os
+import re
+import gzip
+import shutil
+import tempfile
+from StringIO import StringIO
+from linkcheck.logger.sitemapxml import SitemapXmlLogger
+from . import UrlData
+
+
+def log_urls (logger, num):
+    """Log the start URL and num pages."""
+    logger.start_output()
+    logger.log_filter_url(UrlData(u"http://example.org/"), True)
+    for i in range(num):
+        logger.log_filter_url(UrlData(u"http://example.org/%d.html" % i),
+            True)
+    logger.end_output()
+
+
+def get_locs (data):
+    """Return URLs of the loc tags."""
+    return re.findall(r"<loc>(.*)</loc>", data)
+
+
+class TestSitemapLogger (unittest.TestCase):
+
+    def setUp (self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "sitemap.xml")
+
+    def tearDown (self):
+        shutil.rmtree(self.tmpdir)
+
+    def read (self, filename):
+        opener = gzip.open if filename.endswith(".gz") else open
+        fd = opener(os.path.join(self.tmpdir, filename), "rb")
+        try:
+            return fd.read()
+        finally:
+            fd.close()
+
+    def test_single_file (self):
+        logger = SitemapXmlLogger(filename=self.filename, fileoutput=1)
+        log_urls(logger, 5)
+        self.assertEqual(os.listdir(self.tmpdir), ["sitemap.xml"])
+        data = self.read("sitemap.xml")
+        self.assertTrue("<urlset " in data)
+        self.assertEqual(len(get_locs(data)), 6)
+
+    def test_parts (self):
+        logger = SitemapXmlLogger(filename=self.filename, fileoutput=1,
+            maxurls=4)
+        log_urls(logger, 9)
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ["sitemap.xml",
+            "sitemap1.xml", "sitemap2.xml", "sitemap3.xml"])
+        index = self.read("sitemap.xml")
+        self.assertTrue("<sitemapindex " in index)
+        self.assertEqual(get_locs(index), ["http://example.org/sitemap1.xml",
+            "http://example.org/sitemap2.xml",
+            "http://example.org/sitemap3.xml"])
+        urls = []
+        for i in range(1, 4):
+            data = self.read("sitemap%d.xml" % i)
+            self.assertTrue("</urlset>" in data)
+            urls.extend(get_locs(data))
+        self.assertEqual(len(urls), 10)
+        self.assertEqual(urls[-1], "http://example.org/8.html")
+
+    def test_compress (self):
+        logger = SitemapXmlLogger(filename=self.filename, fileoutput=1,
+            maxsize=0x2000+1000, compress="1",
+            baseurl=u"http://example.org/maps/")
+        log_urls(logger, 20)
+        index = self.read("sitemap.xml")
+        locs = get_locs(index)
+        self.assertTrue(len(locs) > 1)
+        self.assertEqual(locs[0], "http://example.org/maps/sitemap1.xml.gz")
+        urls = []
+        for i in range(len(locs)):
+            data = self.read("sitemap%d.xml.gz" % (i+1))
+            self.assertTrue(len(data) <= 0x2000+1000)
+            urls.extend(get_locs(data))
+        self.assertEqual(len(urls), 21)
+
+    def test_compress_single_file (self):
+        logger = SitemapXmlLogger(filename=self.filename, fileoutput=1,
+            compress="1")
+        log_urls(logger, 2)
+        self.assertEqual(os.listdir(self.tmpdir), ["sitemap.xml.gz"])
+        self.assertEqual(len(get_locs(self.read("sitemap.xml.gz"))), 3)
+
+    def test_no_file (self):
+        fd = StringIO()
+        logger = SitemapXmlLogger(fd=fd, maxurls=2)
+        log_urls(logger, 5)
+        self.assertEqual(len(get_locs(fd.getvalue())), 6)
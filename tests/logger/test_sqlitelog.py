@@ -0,0 +1,92 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test the SQLite logger.
+"""
+import unittest
+import os
+import shutil
+import sqlite3
+import tempfile
+from linkcheck.logger.sqlitelog import SqliteLogger, ColumnNames
+from . import UrlData
+
+
+class TestSqliteLogger (unittest.TestCase):
+
+    def setUp (self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "links.sqlite")
+
+    def tearDown (self):
+        shutil.rmtree(self.tmpdir)
+
+    def query (self, sql):
+        conn = sqlite3.connect(self.filename)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def test_batches (self):
+        logger = SqliteLogger(filename=self.filename, batchsize=2,
+            flushinterval=60, indexes="urlname, parentname")
+        logger.start_output()
+        logger.log_filter_url(UrlData(u"http://example.org/",
+            parent_url=u""), True)
+        self.assertEqual(self.query("select count(*) from linksdb"), [(0,)])
+        logger.log_filter_url(UrlData(u"http://example.org/a"), True)
+        # the batch can be queried while checking continues
+        self.assertEqual(self.query("select count(*) from linksdb"), [(2,)])
+        logger.log_filter_url(UrlData(u"http://example.org/b"), True)
+        logger.end_output()
+        rows = self.query("select %s from linksdb" % ",".join(ColumnNames))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1], (u"http://example.org/a",
+            u"http://example.org/", None, 1, u"200 OK", u"Empty content",
+            None, u"http://example.org/a", 1, 2, u"a'b", 0, 1, 42, 0, 1,
+            None))
+        indexes = self.query("select name from sqlite_master "
+                             "where type='index' order by name")
+        self.assertEqual(indexes, [(u"linksdb_parentname",),
+                                   (u"linksdb_urlname",)])
+
+    def test_replace_table (self):
+        for i in range(2):
+            logger = SqliteLogger(filename=self.filename, replace=1)
+            logger.start_output()
+            logger.log_filter_url(UrlData(u"http://example.org/",
+                parent_url=u""), True)
+            logger.end_output()
+        self.assertEqual(self.query("select count(*) from linksdb"), [(1,)])
+
+    def test_keep_table (self):
+        # an existing table is only replaced with the replace option
+        logger = SqliteLogger(filename=self.filename)
+        logger.start_output()
+        logger.log_filter_url(UrlData(u"http://example.org/",
+            parent_url=u""), True)
+        logger.end_output()
+        logger = SqliteLogger(filename=self.filename)
+        logger.start_output()
+        self.assertFalse(logger.is_active)
+        logger.end_output()
+        self.assertEqual(self.query("select count(*) from linksdb"), [(1,)])
+
+    def test_invalid_index (self):
+        self.assertRaises(ValueError, SqliteLogger, filename=self.filename,
+            indexes="urlname;drop")
@@ -43,3 +43,19 @@ class TestDecorators (unittest.TestCase):
             return 42
         self.assertEqual(f(), 42)
         self.assertTrue(log.getvalue())
+
+    def test_lru_memoized (self):
+        calls = []
+        @linkcheck.decorators.lru_memoized(2)
+        def f (x):
+            calls.append(x)
+            return x
+        self.assertEqual(f(u"a"), u"a")
+        self.assertEqual(f(u"a"), u"a")
+        self.assertEqual(calls, [u"a"])
+        # equal str and unicode arguments are cached separately
+        self.assertTrue(isinstance(f("a"), str))
+        f(u"b")
+        self.assertEqual(len(f.cache), 2)
+        f(u"a")
+        self.assertEqual(calls, [u"a", "a", u"b", u"a"])
@@ -0,0 +1,122 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test matching of link patterns.
+"""
+import unittest
+from linkcheck import get_link_pat, linkmatch
+from linkcheck.checker.internpaturl import get_intern_pattern
+
+urls = [
+    u"http://example.com/",
+    u"https://www.example.com/a/b.html",
+    u"http://example.com.example.org/",
+    u"http://example.org/private/x",
+    u"http://example.org/doc.pdf",
+    u"http://user@example.net:8080/?q=example.com",
+    u"ftp://example.com/pub/",
+    u"mailto:user@example.com",
+    u"file:///home/user/index.html",
+    u"",
+]
+
+
+def search (url, patterns):
+    """Search the URL in the patterns one by one."""
+    for entry in patterns:
+        match = entry['pattern'].search(url)
+        if (entry['negate'] and not match) or \
+           (match and not entry['negate']):
+            return entry['strict']
+    return None
+
+
+class TestLinkMatch (unittest.TestCase):
+    """Test the link matcher against searching patterns one by one."""
+
+    def check_urls (self, matcher, patterns):
+        for url in urls:
+            self.assertEqual(matcher.search(url, patterns),
+                search(url, patterns), url)
+
+    def test_combined (self):
+        patterns = [get_link_pat(u"\\.pdf$"), get_link_pat(u"/private/"),
+            get_link_pat(u"^mailto:", strict=True),
+            get_link_pat(u"!^https?:"), get_link_pat(u"(a)\\1"),
+            get_link_pat(u"(?i)EXAMPLE\\.NET"), get_link_pat(u"index")]
+        matcher = linkmatch.LinkMatcher()
+        self.check_urls(matcher, patterns)
+        self.assertEqual([len(g.entries) for g in matcher.groups],
+            [2, 1, 1, 1, 1, 1])
+        patterns = [get_link_pat(u"^https:"), get_link_pat(u"^a|^ftp:")]
+        self.check_urls(matcher, patterns)
+        self.assertEqual(matcher.groups[0].regex.pattern[:4], u"^(?:")
+
+    def test_incremental (self):
+        patterns = []
+        matcher = linkmatch.LinkMatcher()
+        self.check_urls(matcher, patterns)
+        for url in (u"http://example.com/", u"http://example.org",
+                    u"http://user@example.net:8080/"):
+            patterns.append(get_link_pat(get_intern_pattern(url)))
+            self.check_urls(matcher, patterns)
+        self.assertEqual(len(matcher.groups), 1)
+        self.assertTrue(matcher.groups[0].host_only)
+        for url in (u"https://www.example.com/a/b.html",
+                    u"ftp://example.com/pub/"):
+            patterns.append(get_link_pat(get_intern_pattern(url)))
+            self.check_urls(matcher, patterns)
+        patterns.append(get_link_pat(u"!example"))
+        self.check_urls(matcher, patterns)
+        self.assertEqual(len(matcher.groups), 3)
+        # replaced list
+        patterns = patterns[:1]
+        self.check_urls(matcher, patterns)
+        self.assertEqual(len(matcher.groups), 1)
+
+    def test_max_groups (self):
+        patterns = [get_link_pat(u"(x%d)" % i) for i in range(150)]
+        matcher = linkmatch.LinkMatcher()
+        self.assertEqual(matcher.search(u"x149", patterns), False)
+        self.assertEqual(len(matcher.groups), 2)
+
+    def test_host_only (self):
+        for pattern in (u"^https?://(www\\.|)example\\.com/",
+                        u"^http://example\\.com", u"^ftp\\:\\/\\/host\\:21"):
+            self.assertTrue(linkmatch.is_host_only(get_link_pat(pattern)
+                ['pattern']), pattern)
+        for pattern in (u"^https?://(www\\.|)example\\.com/a",
+                        u"example\\.com", u"^http://example.com",
+                        u"^http://example\\.com$", u"^http://example\\.com/?"):
+            self.assertFalse(linkmatch.is_host_only(get_link_pat(pattern)
+                ['pattern']), pattern)
+
+    def test_anchored (self):
+        for pattern in (u"^http:", u"^a|^b", u"^(a|b)"):
+            self.assertTrue(linkmatch.is_anchored(get_link_pat(pattern)
+                ['pattern']), pattern)
+        for pattern in (u"^a|b", u"a^", u"(?m)^a", u"\\^a"):
+            self.assertFalse(linkmatch.is_anchored(get_link_pat(pattern)
+                ['pattern']), pattern)
+
+    def test_host_key (self):
+        self.assertEqual(linkmatch.get_host_key(u"http://example.com/a/b"),
+            u"http://example.com/")
+        self.assertEqual(linkmatch.get_host_key(u"http://example.com?a/b"),
+            u"http://example.com")
+        self.assertEqual(linkmatch.get_host_key(u"mailto:a@example.com"),
+            u"mailto:a@example.com")
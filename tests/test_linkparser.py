@@ -129,3 +129,23 @@ class TestLinkparser (unittest.TestCase):
         url = u'http://example.com/bla/a=b'
         content = u'<a href="%s&quot;">'
         self._test_one_link(content % url, url + u'"')
+
+    def test_composite_finder (self):
+        content = (u'<html><head><meta name="robots" content="nofollow">'
+                   u'<title>Test</title></head>'
+                   u'<body><a name="top" href="alink">x</a></body></html>')
+        links = []
+        callback = lambda url, line, column, name, base: links.append(url)
+        robots = linkparse.MetaRobotsFinder()
+        h = linkparse.CompositeFinder([robots,
+            linkparse.LinkFinder(callback, linkparse.LinkTags),
+            linkparse.LinkFinder(callback, linkparse.AnchorTags)])
+        p = linkcheck.HtmlParser.htmlsax.parser(h)
+        h.parser = p
+        p.feed(content)
+        p.flush()
+        h.parser = None
+        p.handler = None
+        self.assertFalse(robots.follow)
+        self.assertEqual(links, [u"alink", u"top"])
+        self.assertEqual(len(h.finders), 2)
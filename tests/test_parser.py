@@ -288,6 +288,7 @@ class TestParser (unittest.TestCase):
                 self.assertRaises(TypeError, self.htmlparser.peek, -1)
                 self.assertEqual(self.htmlparser.peek(0), "")
                 self.assertEqual(self.htmlparser.peek(4), "name")
+                self.assertEqual(self.htmlparser.peek(100), "name</a>")
 
         self.htmlparser.handler = NamePeeker()
         self.htmlparser.feed(data)
@@ -0,0 +1,119 @@
+# -*- coding: iso-8859-1 -*-
+# Copyright (C) 2014 Bastian Kleineidam
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+Test that the HTML parser backends find the same links.
+"""
+import glob
+import os
+import unittest
+import linkcheck.configuration
+import linkcheck.director
+from linkcheck.checker import get_url_from
+from linkcheck.htmlutil import linkparse
+from linkcheck.parser import HtmlParsers, HtmlAnalyzer, get_collector
+
+datadir = os.path.join(os.path.dirname(__file__), "checker", "data")
+
+
+def find_links (backend, data, tags=linkparse.LinkTags, chunksize=None):
+    """Return list of links found by the given parser backend."""
+    found = []
+    handler = linkparse.LinkFinder(get_collector(found), tags,
+        lookahead=chunksize is not None)
+    parser = HtmlParsers[backend](handler)
+    handler.parser = parser
+    if chunksize is None:
+        chunksize = max(1, len(data))
+    try:
+        for i in range(0, len(data), chunksize):
+            handler.add_data(data[i:i+chunksize])
+            parser.feed(data[i:i+chunksize])
+        parser.flush()
+    except linkparse.StopParse:
+        pass
+    handler.flush_links()
+    handler.parser = None
+    parser.handler = None
+    return found
+
+
+class TestParserBackends (unittest.TestCase):
+    """Compare the regex backend with the htmlsax backend."""
+
+    def get_files (self):
+        """Return HTML test files with well-formed markup."""
+        return [fn for fn in sorted(glob.glob(os.path.join(datadir, "*.html")))
+                if os.path.basename(fn) != "http_quotes.html"]
+
+    def test_equivalence (self):
+        for filename in self.get_files():
+            with open(filename, "rb") as fd:
+                data = fd.read()
+            for tags in (linkparse.LinkTags, linkparse.AnchorTags):
+                self.assertEqual(find_links("regex", data, tags=tags),
+                    find_links("htmlsax", data, tags=tags), filename)
+
+    def test_chunks (self):
+        for filename in self.get_files():
+            with open(filename, "rb") as fd:
+                data = fd.read()
+            for backend in HtmlParsers:
+                self.assertEqual(find_links(backend, data),
+                    find_links(backend, data, chunksize=7), filename)
+
+    def test_chunk_boundary_name (self):
+        data = '<a href="a">long link name</a>\n<a href="b">b</a>\n'
+        links = [(u"a", 1, 1, u"long link name", u""),
+                 (u"b", 2, 1, u"b", u"")]
+        for backend in HtmlParsers:
+            for chunksize in (1, 12, 16, 20):
+                self.assertEqual(find_links(backend, data,
+                    chunksize=chunksize), links, (backend, chunksize))
+
+    def test_analyzer_chunks (self):
+        config = linkcheck.configuration.Configuration()
+        config['logger'] = config.logger_new('none')
+        aggregate = linkcheck.director.get_aggregate(config)
+        url_data = get_url_from(u"http://localhost/", 0, aggregate)
+        # the link name spans the boundary of two content parts
+        head = '<html><body>' + ' ' * 16370 + '<a href="a">'
+        tail = 'link name</a><a href="b" title="b">' + 'x' * 300 + '</a>'
+        for backend in HtmlParsers:
+            config["htmlparser"] = backend
+            analyzer = HtmlAnalyzer(url_data, anchors=False)
+            analyzer.feed(head + 'link ')
+            analyzer.feed(tail)
+            content = analyzer.finish()
+            self.assertEqual([link[3] for link in content.links],
+                [u"link link name", u"b"], backend)
+
+    def test_skipped_markup (self):
+        data = ('<!-- <a href="comment"> -->\n'
+                '<script>document.write("<a href=\'script\'>")</script>\n'
+                '<![CDATA[<a href="cdata">]]><a href="ok">ok</a>\n')
+        self.assertEqual(find_links("regex", data),
+            [(u"ok", 3, 29, u"ok", u"")])
+
+    def test_attributes (self):
+        data = ('<a HREF=a/>a</a>'
+                '<a href="b>c">b</a>'
+                "<img src='d' />"
+                '<a href=e">e</a>')
+        self.assertEqual([link[0] for link in find_links("regex", data)],
+            [u"a/", u"b>c", u"d", u"e"])
+        self.assertEqual([link[0] for link in find_links("regex", data)],
+            [link[0] for link in find_links("htmlsax", data)])
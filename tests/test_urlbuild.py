@@ -72,3 +72,36 @@ class TestUrlBuild (unittest.TestCase):
         o = get_url_from(base_url, recursion_level, aggregate, parent_url=parent_url)
         o.build_url()
         self.assertEqual(o.url, parent_url+base_url)
+
+    def test_add_seen_url (self):
+        aggregate = get_test_aggregate()
+        parent = get_url_from(u"http://example.org/a/", 0, aggregate)
+        parent.add_url(u"b.html", line=1)
+        parent.add_url(u"/a/b.html", line=2, name=u"dup")
+        parent.add_url(u"mailto:calvin@example.org", line=3)
+        parent.add_url(u"mailto:calvin@example.org", line=4)
+        urlqueue = aggregate.urlqueue
+        self.assertEqual(urlqueue.qsize(), 4)
+        # all links are queued as pending records without cache key
+        o1 = urlqueue.get(timeout=0)
+        self.assertTrue(isinstance(o1, linkcheck.checker.urlbase.PendingUrl))
+        self.assertEqual(o1.cache_url, None)
+        self.assertEqual(o1.urlparts[1], u"example.org")
+        u1 = o1.materialize()
+        # the queued duplicate gets the cache key of the checked URL
+        urlqueue.add_seen(o1.seen_key, u1.cache_url)
+        aggregate.urlqueue.host_scheduler.times.clear()
+        queued = [urlqueue.get(timeout=0) for dummy in range(3)]
+        o2 = [o for o in queued if o.is_http()][0]
+        self.assertEqual(o2.cache_url, u1.cache_url)
+        self.assertEqual((o2.line, o2.name, o2.recursion_level), (2, u"dup", 1))
+        o3 = o2.materialize()
+        self.assertEqual(o3.url, u1.url)
+        self.assertEqual(o3.line, 2)
+        for o in queued:
+            if not o.is_http():
+                self.assertEqual(o.cache_url, None)
+                self.assertTrue(o.materialize().has_result)
+        # URLs found later reference the seen cache key
+        parent.add_url(u"b.html", line=5)
+        self.assertEqual(urlqueue.get(timeout=0).cache_url, u1.cache_url)